@@ -0,0 +1,48 @@
+import numpy as np
+
+SATURATION_LEVEL = 250  # Pixel value counted as saturated by the arc
+
+
+class ArcGate:
+    """Cheap arc-on test run before segmentation.
+
+    Looks at one 2x2 Bayer quad (one R, two G, one B pixel) every `step`
+    pixels in each direction of the raw frame, without debayering; sampling
+    single pixels at an even step would only ever read one colour channel.
+    The arc is considered on when the mean brightness reaches
+    brightness_threshold or when at least saturated_percent of the sampled
+    pixels are saturated. Dark frames between beads and before the strike
+    fail both tests and skip inference.
+    """
+
+    def __init__(self, brightness_threshold=20.0, saturated_percent=0.05, step=8):
+        self.brightness_threshold = float(brightness_threshold)
+        self.saturated_fraction = float(saturated_percent) / 100.0
+        self.step = max(int(step), 2)
+        self.arc_on = None
+        self.off_count = 0
+        self.last_stats = None
+
+    def check(self, bayer):
+        """True when the frame shows an arc. Logs each arc on / arc off transition."""
+        step = self.step
+        total = 0
+        count = 0
+        saturated_count = 0
+        for dy, dx in ((0, 0), (0, 1), (1, 0), (1, 1)):
+            sample = bayer[dy::step, dx::step]
+            total += int(sample.sum(dtype=np.uint64))
+            count += sample.size
+            saturated_count += int(np.count_nonzero(sample >= SATURATION_LEVEL))
+        mean = total / count
+        saturated = saturated_count / count
+        arc_on = mean >= self.brightness_threshold or saturated >= self.saturated_fraction
+        self.last_stats = {"mean": mean, "saturated": saturated}
+
+        if arc_on != self.arc_on:
+            state = "on" if arc_on else "off"
+            print(f"[Arc Gate] arc {state} (mean {mean:.1f}, {saturated:.2%} saturated)")
+            self.arc_on = arc_on
+        if not arc_on:
+            self.off_count += 1
+        return arc_on
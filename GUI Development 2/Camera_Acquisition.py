@@ -0,0 +1,196 @@
+import threading
+import queue
+import time
+
+DEFAULT_GRAB_SETTINGS = {
+    "max_num_buffer": 5,
+    "output_queue_size": 1,
+    "grab_strategy": "LatestImageOnly",
+    "retrieve_timeout_ms": 1000,
+    "frame_queue_size": 8,
+    "acquisition_frame_rate": None,
+}
+
+
+class AcquisitionEngine:
+    """Continuously grabs frames from an open camera on its own thread.
+
+    Grabbing is started once and frames are pulled with retrieve(), so the
+    camera free-runs instead of being re-armed for every frame the way
+    GrabOne does. Works with any CameraInterface from Camera_Backends.
+
+    When a FrameRingBuffer is given, each frame is copied straight from the
+    driver buffer into the ring's "bayer" plane and the frame carries a slot
+    index instead of its own array.
+
+    ROI and exposure changes requested from other threads are applied by the
+    grab thread between two retrieves, so once grabbing has started the
+    camera is only ever touched from the grab thread.
+    """
+
+    def __init__(self, camera, grab_settings=None, frame_ring=None):
+        self.camera = camera
+        self.frame_ring = frame_ring
+        self.grab_settings = dict(DEFAULT_GRAB_SETTINGS)
+        if grab_settings:
+            self.grab_settings.update(grab_settings)
+
+        self.frames = queue.Queue(maxsize=int(self.grab_settings["frame_queue_size"]))
+        self.running = False
+        self.thread = None
+
+        self.grabbed_count = 0
+        self.failed_count = 0
+        self.dropped_count = 0
+        self._pending_slot = None
+        self._pending_roi = None
+        self._pending_exposure = None
+        self.request_lock = threading.Lock()
+
+    def start(self):
+        if self.running:
+            return
+
+        self.grabbed_count = 0
+        self.failed_count = 0
+        self.dropped_count = 0
+
+        self.camera.start_grabbing(self.grab_settings)
+        self.running = True
+        self.thread = threading.Thread(target=self._grab_loop, daemon=True)
+        self.thread.start()
+        print(f"✅ Acquisition started ({self.grab_settings['grab_strategy']})")
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+        try:
+            self.camera.stop_grabbing()
+        except Exception as e:
+            print(f"❌ Error stopping acquisition: {e}")
+
+        # Discard anything that was grabbed but never consumed
+        self.flush()
+        print(f"Acquisition stopped: {self.grabbed_count} grabbed, "
+              f"{self.failed_count} failed, {self.dropped_count} dropped")
+
+    def get_frame(self, timeout=1.0):
+        """Return the next grabbed frame, or None if none arrived in time."""
+        try:
+            return self.frames.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def flush(self):
+        """Throw away every frame grabbed so far but not yet consumed."""
+        while True:
+            try:
+                self._discard_frame(self.frames.get_nowait())
+            except queue.Empty:
+                break
+
+    def request_roi(self, roi):
+        """Ask the grab thread to switch the camera to a new ROI (None for the full sensor)."""
+        with self.request_lock:
+            self._pending_roi = (roi,)
+
+    def request_exposure(self, exposure_time, on_applied=None):
+        """Ask the grab thread to write a new exposure time.
+
+        on_applied(requested, actual) is called from the grab thread once the
+        camera has accepted it (actual is None if the camera doesn't report it).
+        """
+        with self.request_lock:
+            self._pending_exposure = (exposure_time, on_applied)
+
+    def _apply_pending_exposure(self):
+        with self.request_lock:
+            pending, self._pending_exposure = self._pending_exposure, None
+        if pending is None:
+            return
+        exposure_time, on_applied = pending
+        try:
+            actual = self.camera.set_exposure(exposure_time)
+        except Exception as e:
+            print(f"❌ Error setting exposure: {e}")
+            return
+        if on_applied is not None:
+            on_applied(exposure_time, actual)
+
+    def _apply_pending_roi(self):
+        with self.request_lock:
+            pending, self._pending_roi = self._pending_roi, None
+        if pending is None:
+            return
+        try:
+            applied = self.camera.set_roi(pending[0])
+            print(f"ROI set to {applied}")
+        except Exception as e:
+            print(f"❌ Error setting ROI: {e}")
+
+    def _grab_loop(self):
+        timeout_ms = int(self.grab_settings["retrieve_timeout_ms"])
+        allocate = self._allocate_slot if self.frame_ring is not None else None
+
+        while self.running and self.camera.is_grabbing():
+            self._apply_pending_roi()
+            self._apply_pending_exposure()
+            self._pending_slot = None
+            try:
+                frame = self.camera.retrieve(timeout_ms, allocate)
+            except Exception as e:
+                print(f"❌ Error retrieving frame: {e}")
+                if self._pending_slot is not None:
+                    self.frame_ring.release(self._pending_slot)
+                continue
+
+            if frame is None:
+                continue
+            if "error" in frame:
+                self.failed_count += 1
+                print(f"❌ Grab failed: {frame['error']}")
+                continue
+            if frame.get("dropped"):
+                # Every slot is still held downstream
+                self.grabbed_count += 1
+                self.dropped_count += 1
+                continue
+
+            self.grabbed_count += 1
+            frame["host_time"] = time.perf_counter()
+            if self.frame_ring is not None:
+                frame["slot"] = self._pending_slot
+                del frame["image"]  # Consumers read the slot's planes instead
+            self._put_frame(frame)
+
+    def _allocate_slot(self, height, width):
+        slot = self.frame_ring.acquire(timeout=0)
+        if slot is None:
+            return None
+        try:
+            self.frame_ring.set_shape(slot, height, width)
+        except ValueError as e:
+            print(f"❌ {e}")
+            self.frame_ring.release(slot)
+            return None
+        self._pending_slot = slot
+        return self.frame_ring.plane(slot, "bayer")
+
+    def _put_frame(self, frame):
+        # Keep the grab thread running at sensor rate: if nobody is keeping up,
+        # throw away the oldest frame rather than block the camera.
+        try:
+            self.frames.put_nowait(frame)
+        except queue.Full:
+            try:
+                self._discard_frame(self.frames.get_nowait())
+                self.dropped_count += 1
+            except queue.Empty:
+                pass
+            self.frames.put_nowait(frame)
+
+    def _discard_frame(self, frame):
+        if self.frame_ring is not None and "slot" in frame:
+            self.frame_ring.release(frame["slot"])
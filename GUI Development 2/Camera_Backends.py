@@ -0,0 +1,447 @@
+import os
+import glob
+import time
+import threading
+import numpy as np
+import cv2
+
+try:
+    from pypylon import pylon
+except ImportError:
+    pylon = None  # Replay camera still works without the pylon SDK
+
+FRAME_EXTENSIONS = (".png", ".bmp", ".tif", ".tiff", ".jpg")
+
+
+class CameraInterface:
+    """Everything the recording pipeline needs from a camera.
+
+    retrieve() hands back one frame's metadata and copies the image into the
+    array returned by allocate(height, width), or into a fresh array if no
+    allocate function is given.
+    """
+
+    model_name = "Unknown"
+    timestamp_tick_frequency = 1e9  # camera timestamp ticks per second
+    roi = None  # (offset_x, offset_y, width, height) being read out, None for the full sensor
+
+    def open(self):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def get_size(self):
+        """Return (height, width) of the frames currently being delivered."""
+        raise NotImplementedError
+
+    def get_sensor_size(self):
+        """Return (height, width) of the full sensor, whatever the current ROI."""
+        raise NotImplementedError
+
+    def set_roi(self, roi):
+        """Read out only (offset_x, offset_y, width, height), or the full sensor for None.
+
+        Returns the ROI actually applied after the camera's own alignment.
+        Frames retrieved afterwards carry it as "roi".
+        """
+        raise NotImplementedError
+
+    def set_exposure(self, exposure_time):
+        """Apply an exposure time and return the value the camera actually accepted."""
+        raise NotImplementedError
+
+    def start_grabbing(self, grab_settings):
+        raise NotImplementedError
+
+    def stop_grabbing(self):
+        raise NotImplementedError
+
+    def is_grabbing(self):
+        raise NotImplementedError
+
+    def retrieve(self, timeout_ms, allocate=None):
+        """Return {"frame_id", "timestamp", "image"}, {"dropped": True}, {"error": ...} or None on timeout.
+
+        Cameras that know the exposure of each frame also add "exposure_time".
+        """
+        raise NotImplementedError
+
+
+class PylonCamera(CameraInterface):
+    """Basler camera through pypylon's InstantCamera."""
+
+    def __init__(self, device=None):
+        self.device = device
+        self.camera = None
+        self.chunk_exposure = False
+        self.grab_strategy = None
+        self.sensor_size = None
+
+    @staticmethod
+    def detect():
+        """Return the first attached Basler device, or None."""
+        if pylon is None:
+            print("pypylon is not installed")
+            return None
+        try:
+            devices = pylon.TlFactory.GetInstance().EnumerateDevices()
+            return devices[0] if devices else None
+        except Exception as e:
+            print(f"Error detecting camera: {e}")
+            return None
+
+    def open(self):
+        if self.device is None:
+            self.device = self.detect()
+        if self.device is None:
+            raise RuntimeError("No Basler camera found")
+        self.camera = pylon.InstantCamera(pylon.TlFactory.GetInstance().CreateDevice(self.device))
+        self.camera.Open()
+        self.model_name = self.camera.GetDeviceInfo().GetModelName()
+        if hasattr(self.camera, 'SensorWidth'):
+            self.sensor_size = (self.camera.SensorHeight.GetValue(), self.camera.SensorWidth.GetValue())
+        else:
+            self.sensor_size = (self.camera.HeightMax.GetValue() + self.camera.OffsetY.GetValue(),
+                                self.camera.WidthMax.GetValue() + self.camera.OffsetX.GetValue())
+        self.initialize_settings()
+
+    def initialize_settings(self):
+        camera = self.camera
+        try:
+            # Basic settings that should work on most Basler cameras
+            if camera.GetDeviceInfo().IsGigEDevice():
+                # GigE specific settings
+                if hasattr(camera, 'GevSCPSPacketSize'):
+                    camera.GevSCPSPacketSize.SetValue(9000)
+                if hasattr(camera, 'GevSCPD'):
+                    camera.GevSCPD.SetValue(0)
+                if hasattr(camera, 'GevTimestampTickFrequency'):
+                    self.timestamp_tick_frequency = float(camera.GevTimestampTickFrequency.GetValue())
+            # Have the camera attach each frame's exposure time as chunk data
+            if hasattr(camera, 'ChunkModeActive'):
+                camera.ChunkModeActive.SetValue(True)
+                camera.ChunkSelector.SetValue("ExposureTime")
+                camera.ChunkEnable.SetValue(True)
+                self.chunk_exposure = True
+            print("✅ Camera settings initialized successfully")
+        except Exception as e:
+            print(f"❌ Error initializing camera settings: {e}")
+
+    def set_frame_rate(self, frame_rate):
+        """Cap the acquisition frame rate, or let the camera free-run with None."""
+        camera = self.camera
+        if hasattr(camera, 'AcquisitionFrameRateEnable'):
+            camera.AcquisitionFrameRateEnable.SetValue(frame_rate is not None)
+            if frame_rate is not None and hasattr(camera, 'AcquisitionFrameRateAbs'):
+                camera.AcquisitionFrameRateAbs.SetValue(float(frame_rate))
+
+    def close(self):
+        if self.camera is not None:
+            if self.camera.IsGrabbing():
+                self.camera.StopGrabbing()
+            self.camera.Close()
+
+    def get_size(self):
+        return self.camera.Height.GetValue(), self.camera.Width.GetValue()
+
+    def get_sensor_size(self):
+        return self.sensor_size
+
+    def set_roi(self, roi):
+        camera = self.camera
+        # Width and Height can't change while grabbing, so pause the stream around the change
+        was_grabbing = camera.IsGrabbing()
+        if was_grabbing:
+            camera.StopGrabbing()
+        try:
+            if roi is None:
+                roi = (0, 0, self.sensor_size[1], self.sensor_size[0])
+            offset_x, offset_y, width, height = roi
+            # Zero the offsets first so the new size is always allowed
+            camera.OffsetX.SetValue(0)
+            camera.OffsetY.SetValue(0)
+            for node, value in ((camera.Width, width), (camera.Height, height),
+                                (camera.OffsetX, offset_x), (camera.OffsetY, offset_y)):
+                value = max(min(int(value), node.GetMax()), node.GetMin())
+                node.SetValue(value - (value - node.GetMin()) % node.GetInc())
+            applied = (camera.OffsetX.GetValue(), camera.OffsetY.GetValue(),
+                       camera.Width.GetValue(), camera.Height.GetValue())
+            full = applied == (0, 0, self.sensor_size[1], self.sensor_size[0])
+            self.roi = None if full else applied
+            return applied
+        finally:
+            if was_grabbing:
+                camera.StartGrabbing(self.grab_strategy)
+
+    def set_exposure(self, exposure_time):
+        self.camera.ExposureTimeRaw.SetValue(int(exposure_time))
+        # The camera rounds to its own increment
+        return self.camera.ExposureTimeRaw.GetValue()
+
+    def start_grabbing(self, grab_settings):
+        strategies = {
+            "OneByOne": pylon.GrabStrategy_OneByOne,
+            "LatestImageOnly": pylon.GrabStrategy_LatestImageOnly,
+            "LatestImages": pylon.GrabStrategy_LatestImages,
+            "UpcomingImage": pylon.GrabStrategy_UpcomingImage,
+        }
+        try:
+            if hasattr(self.camera, 'MaxNumBuffer'):
+                self.camera.MaxNumBuffer.SetValue(int(grab_settings["max_num_buffer"]))
+            # OutputQueueSize only has an effect with the LatestImages strategy
+            if hasattr(self.camera, 'OutputQueueSize'):
+                self.camera.OutputQueueSize.SetValue(int(grab_settings["output_queue_size"]))
+        except Exception as e:
+            print(f"❌ Error applying grab settings: {e}")
+        self.set_frame_rate(grab_settings.get("acquisition_frame_rate"))
+
+        self.grab_strategy = strategies.get(grab_settings["grab_strategy"], pylon.GrabStrategy_LatestImageOnly)
+        self.camera.StartGrabbing(self.grab_strategy)
+
+    def stop_grabbing(self):
+        if self.camera.IsGrabbing():
+            self.camera.StopGrabbing()
+
+    def is_grabbing(self):
+        return self.camera.IsGrabbing()
+
+    def retrieve(self, timeout_ms, allocate=None):
+        grab_result = self.camera.RetrieveResult(timeout_ms, pylon.TimeoutHandling_Return)
+        if grab_result is None or not grab_result.IsValid():
+            return None
+
+        try:
+            if not grab_result.GrabSucceeded():
+                return {"error": grab_result.ErrorDescription}
+
+            frame = {
+                "frame_id": grab_result.BlockID,
+                "timestamp": grab_result.TimeStamp,
+                "roi": self.roi,
+            }
+            if self.chunk_exposure:
+                try:
+                    frame["exposure_time"] = grab_result.ChunkExposureTime.GetValue()
+                except Exception:
+                    pass  # Chunk missing from this frame; the scheduler's write log is used instead
+            if allocate is None:
+                frame["image"] = grab_result.Array
+                return frame
+
+            with grab_result.GetArrayZeroCopy() as img_array:
+                dst = allocate(img_array.shape[0], img_array.shape[1])
+                if dst is None:
+                    return {"dropped": True}
+                np.copyto(dst, img_array)
+            frame["image"] = dst
+            return frame
+        finally:
+            grab_result.Release()
+
+
+class ReplayCamera(CameraInterface):
+    """Streams a recorded experiment folder as if it were a live camera.
+
+    Accepts an experiment folder (frames under "Raw Images/frame_XXXXX.png")
+    or any folder of images such as assets. Frames are loaded up front so
+    disk reads don't limit the replay rate, and colour frames are
+    re-mosaiced to the BG Bayer pattern the live camera delivers.
+    """
+
+    model_name = "Replay"
+
+    def __init__(self, folder, fps=200.0, bayer=True, loop=True):
+        self.folder = folder
+        self.fps = float(fps)
+        self.bayer = bayer
+        self.loop = loop
+        self.frames = []
+        self.exposure_time = None
+        self.grabbing = False
+        self.lock = threading.Lock()
+        self.frame_index = 0
+        self.next_due = 0.0
+
+    @staticmethod
+    def list_frames(folder):
+        raw_folder = os.path.join(folder, "Raw Images")
+        if os.path.isdir(raw_folder):
+            folder = raw_folder
+        paths = sorted(glob.glob(os.path.join(folder, "frame_*.*")))
+        if not paths:
+            paths = sorted(p for p in glob.glob(os.path.join(folder, "*.*"))
+                           if p.lower().endswith(FRAME_EXTENSIONS))
+        return paths
+
+    @staticmethod
+    def mosaic_bayer_bg(image):
+        """Inverse of cv2.COLOR_BAYER_BG2RGB: keep one colour sample per pixel."""
+        height, width = image.shape[:2]
+        bayer = np.empty((height, width), dtype=np.uint8)
+        bayer[0::2, 0::2] = image[0::2, 0::2, 0]
+        bayer[0::2, 1::2] = image[0::2, 1::2, 1]
+        bayer[1::2, 0::2] = image[1::2, 0::2, 1]
+        bayer[1::2, 1::2] = image[1::2, 1::2, 2]
+        return bayer
+
+    def open(self):
+        paths = self.list_frames(self.folder)
+        if not paths:
+            raise RuntimeError(f"No frames found in {self.folder}")
+
+        frames = []
+        for path in paths:
+            image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+            if image is None:
+                print(f"Skipping unreadable frame {path}")
+                continue
+            if image.ndim == 3:
+                image = image[:, :, :3]
+                if self.bayer:
+                    image = self.mosaic_bayer_bg(image)
+                else:
+                    image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            frames.append(np.ascontiguousarray(image))
+
+        if not frames:
+            raise RuntimeError(f"No readable frames in {self.folder}")
+        # Every frame must match the first one's size
+        height, width = frames[0].shape[:2]
+        self.frames = [f for f in frames if f.shape[:2] == (height, width)]
+        print(f"✅ Replay camera loaded {len(self.frames)} frames ({width}x{height}) from {self.folder}")
+
+    def close(self):
+        self.grabbing = False
+        self.frames = []
+
+    def get_size(self):
+        if self.roi is not None:
+            return self.roi[3], self.roi[2]
+        return self.frames[0].shape[:2]
+
+    def get_sensor_size(self):
+        return self.frames[0].shape[:2]
+
+    def set_roi(self, roi):
+        height, width = self.get_sensor_size()
+        if roi is not None:
+            offset_x, offset_y, roi_width, roi_height = (int(v) for v in roi)
+            # Even offsets keep the BG Bayer pattern
+            offset_x = min(max(offset_x, 0), width - 1) & ~1
+            offset_y = min(max(offset_y, 0), height - 1) & ~1
+            roi_width = min(max(roi_width, 1), width - offset_x)
+            roi_height = min(max(roi_height, 1), height - offset_y)
+            roi = (offset_x, offset_y, roi_width, roi_height)
+            if roi == (0, 0, width, height):
+                roi = None
+        with self.lock:
+            self.roi = roi
+        return roi if roi is not None else (0, 0, width, height)
+
+    def set_exposure(self, exposure_time):
+        with self.lock:
+            self.exposure_time = exposure_time
+        return exposure_time
+
+    def start_grabbing(self, grab_settings):
+        with self.lock:
+            self.frame_index = 0
+            self.next_due = time.perf_counter()
+            self.grabbing = True
+
+    def stop_grabbing(self):
+        self.grabbing = False
+
+    def is_grabbing(self):
+        return self.grabbing
+
+    def retrieve(self, timeout_ms, allocate=None):
+        # Work out the wait under the lock but sleep without it, so exposure and
+        # ROI writes from other threads never wait on the frame pacing
+        with self.lock:
+            if not self.grabbing:
+                return None
+            finished = self.frame_index >= len(self.frames) and not self.loop
+            # Pace delivery to the configured frame rate
+            wait = self.next_due - time.perf_counter()
+        if finished or wait > timeout_ms / 1000.0:
+            time.sleep(timeout_ms / 1000.0)
+            return None
+        if wait > 0:
+            time.sleep(wait)
+
+        with self.lock:
+            if not self.grabbing:
+                return None
+            self.next_due = max(self.next_due + 1.0 / self.fps, time.perf_counter() - 1.0 / self.fps)
+
+            image = self.frames[self.frame_index % len(self.frames)]
+            if self.roi is not None:
+                offset_x, offset_y, width, height = self.roi
+                image = image[offset_y:offset_y + height, offset_x:offset_x + width]
+            frame = {
+                "frame_id": self.frame_index,
+                "timestamp": time.perf_counter_ns(),
+                "exposure_time": self.exposure_time,
+                "roi": self.roi,
+            }
+            self.frame_index += 1
+
+        if allocate is None:
+            frame["image"] = image.copy()
+            return frame
+
+        dst = allocate(image.shape[0], image.shape[1])
+        if dst is None:
+            return {"dropped": True}
+        np.copyto(dst, image)
+        frame["image"] = dst
+        return frame
+
+
+def create_camera(recording_settings):
+    """Build the camera selected in the recording settings (not yet opened)."""
+    if recording_settings.get("camera_source") == "Replay":
+        return ReplayCamera(
+            recording_settings.get("replay_folder", ""),
+            fps=float(recording_settings.get("replay_fps", 200)),
+            bayer=bool(recording_settings.get("replay_bayer", True)),
+            loop=bool(recording_settings.get("replay_loop", True)),
+        )
+
+    device = PylonCamera.detect()
+    if device is None:
+        return None
+    return PylonCamera(device)
+
+
+if __name__ == "__main__":
+    # Quick load test: replay a folder through the acquisition engine and report the achieved rate
+    import sys
+    from Camera_Acquisition import AcquisitionEngine
+    from Frame_Ring_Buffer import FrameRingBuffer
+
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "assets")
+    fps = float(sys.argv[2]) if len(sys.argv) > 2 else 200.0
+    duration = 5.0
+
+    camera = ReplayCamera(folder, fps=fps)
+    camera.open()
+    height, width = camera.get_size()
+    frame_ring = FrameRingBuffer(16, height, width, {"bayer": 1, "raw": 3})
+    engine = AcquisitionEngine(camera, frame_ring=frame_ring)
+    engine.start()
+
+    received = 0
+    t_end = time.perf_counter() + duration
+    while time.perf_counter() < t_end:
+        frame = engine.get_frame(timeout=0.5)
+        if frame is None:
+            continue
+        slot = frame["slot"]
+        frame_ring.debayered(slot)
+        frame_ring.release(slot)
+        received += 1
+    engine.stop()
+    print(f"Requested {fps:.0f} fps, received {received / duration:.1f} fps")
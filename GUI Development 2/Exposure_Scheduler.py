@@ -0,0 +1,87 @@
+import bisect
+import threading
+import time
+
+# A frame grabbed this soon after an exposure write may still have been
+# exposed with the previous value, unless the camera reports it per frame.
+EXPOSURE_SETTLE_S = 0.01
+
+
+class ExposureScheduler:
+    """Precomputed Fixed/Iterate exposure schedule from the recording settings.
+
+    The schedule is built once when recording starts. update() maps the
+    elapsed recording time to a step and only writes to the camera when
+    that step changes, so Fixed mode touches the camera exactly once.
+
+    Every write is logged with the value the camera actually accepted, and
+    captured_exposure() uses that log to tag each frame with the exposure it
+    was taken at, unless the camera already reported it with the frame.
+    """
+
+    def __init__(self, recording_settings):
+        self.mode = recording_settings.get("et_mode", "Fixed")
+        if self.mode == "Iterate":
+            et_start = int(recording_settings.get("et_start"))
+            et_end = int(recording_settings.get("et_end"))
+            et_step = int(recording_settings.get("et_step"))
+            self.step_duration = float(recording_settings.get("et_time"))
+            self.schedule = list(range(et_start, et_end + 1, et_step)) or [et_start]
+        else:
+            self.step_duration = None
+            self.schedule = [int(recording_settings.get("et_fixed"))]
+
+        self.lock = threading.Lock()
+        self.current_step = None
+        self.write_times = []   # host time of each camera write
+        self.write_values = []  # exposure the camera reported after that write
+        self.write_count = 0
+
+    def step_at(self, elapsed_time):
+        """Return (step index into the schedule, loop count) for a time since recording start."""
+        if self.step_duration is None:
+            return 0, 0
+        steps_passed = int(elapsed_time // self.step_duration)
+        return steps_passed % len(self.schedule), steps_passed // len(self.schedule)
+
+    def start(self, camera):
+        """Write the first step before grabbing starts so the first frame is already correct."""
+        self.current_step = None
+        self.write_times = []
+        self.write_values = []
+        self.write_count = 0
+        return self.update(camera, 0.0)
+
+    def update(self, camera, elapsed_time, engine=None):
+        """Push the exposure for this time to the camera if the step changed.
+
+        With an AcquisitionEngine the write is handed to its grab thread, which
+        owns the camera while grabbing; the write is logged once it is applied.
+        Returns (requested exposure, loop count).
+        """
+        step, loop_count = self.step_at(elapsed_time)
+        exposure_time = self.schedule[step]
+        if step != self.current_step:
+            if engine is not None:
+                engine.request_exposure(exposure_time, self.log_write)
+            else:
+                self.log_write(exposure_time, camera.set_exposure(exposure_time))
+            self.current_step = step
+            self.write_count += 1
+        return exposure_time, loop_count
+
+    def log_write(self, exposure_time, actual):
+        """Record a camera write with the value the camera reported (None: assume it took the request)."""
+        with self.lock:
+            self.write_times.append(time.perf_counter())
+            self.write_values.append(exposure_time if actual is None else actual)
+
+    def captured_exposure(self, frame):
+        """Exposure a grabbed frame was actually captured at."""
+        if frame.get("exposure_time") is not None:
+            return frame["exposure_time"]  # Reported by the camera itself
+        with self.lock:
+            if not self.write_values:
+                return None
+            index = bisect.bisect_right(self.write_times, frame["host_time"] - EXPOSURE_SETTLE_S) - 1
+            return self.write_values[max(index, 0)]
@@ -0,0 +1,299 @@
+import threading
+import queue
+import time
+
+# How a stage behaves when its queue is full:
+#   "never_drop"  - the producer waits as long as it takes (raw and measurement saving)
+#   "latest_only" - the queued frame is replaced by the newest one (preview)
+#   "block"       - the producer waits up to block_timeout, then the frame is dropped (metrics)
+DROP_POLICIES = ("never_drop", "latest_only", "block")
+
+
+class PipelineStage:
+    """One consumer of the frame stream with its own bounded queue and worker thread."""
+
+    def __init__(self, name, worker, policy="block", maxsize=8, block_timeout=0.5):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy '{policy}' for stage '{name}'")
+        self.name = name
+        self.worker = worker
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.queue = queue.Queue(maxsize=1 if policy == "latest_only" else int(maxsize))
+        self.on_done = None  # set by FramePipeline to release the frame's ring slot
+        self.on_drop = None  # called with every frame this stage skips
+
+        self.running = False
+        self.thread = None
+        self.processed_count = 0
+        self.dropped_count = 0
+        self.max_depth = 0
+        self.busy_time = 0.0
+
+    def offer(self, item):
+        """Queue an item according to the drop policy. Returns False if it was dropped."""
+        if self.policy == "never_drop":
+            self.queue.put(item)
+        elif self.policy == "latest_only":
+            while True:
+                try:
+                    self.queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    try:
+                        stale = self.queue.get_nowait()
+                    except queue.Empty:
+                        continue
+                    # The evicted frame will never reach the worker, so finish its task here or join() never returns
+                    self.queue.task_done()
+                    self.dropped_count += 1
+                    self._dropped(stale)
+                    self._done(stale)
+        else:
+            try:
+                self.queue.put(item, timeout=self.block_timeout)
+            except queue.Full:
+                self.dropped_count += 1
+                self._dropped(item)
+                return False
+
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f"stage-{self.name}", daemon=True)
+        self.thread.start()
+
+    def stop(self, drain=True):
+        """Stop the worker. With drain=True everything already queued is processed first."""
+        if drain:
+            self.queue.join()
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+        # Anything left over still holds a ring slot
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self._done(item)
+            self.queue.task_done()
+
+    def stats(self):
+        return {
+            "depth": self.queue.qsize(),
+            "max_depth": self.max_depth,
+            "processed": self.processed_count,
+            "dropped": self.dropped_count,
+            "busy_time": self.busy_time,
+        }
+
+    def _run(self):
+        while self.running:
+            try:
+                item = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            t0 = time.perf_counter()
+            try:
+                self.worker(item)
+                self.processed_count += 1
+            except Exception as e:
+                print(f"❌ Error in {self.name} stage: {e}")
+            finally:
+                self.busy_time += time.perf_counter() - t0
+                self._done(item)
+                self.queue.task_done()
+
+    def _done(self, item):
+        if self.on_done is not None:
+            self.on_done(item)
+
+    def _dropped(self, item):
+        if self.on_drop is not None:
+            try:
+                self.on_drop(item)
+            except Exception as e:
+                print(f"❌ Error handling drop in {self.name} stage: {e}")
+
+
+class BatchingStage(PipelineStage):
+    """A stage whose worker takes a list of frames instead of one.
+
+    The worker is called as soon as batch_size frames are queued, or once
+    max_wait_ms has passed since the first frame of the batch arrived,
+    whichever comes first. Every frame is still released individually.
+    """
+
+    def __init__(self, name, worker, policy="block", maxsize=8, block_timeout=0.5,
+                 batch_size=4, max_wait_ms=20.0):
+        super().__init__(name, worker, policy, maxsize, block_timeout)
+        self.batch_size = int(batch_size)
+        self.max_wait = float(max_wait_ms) / 1000.0
+        self.batch_count = 0
+
+    def stats(self):
+        stats = super().stats()
+        stats["batches"] = self.batch_count
+        stats["fps"] = self.processed_count / self.busy_time if self.busy_time > 0 else 0.0
+        return stats
+
+    def _run(self):
+        while self.running:
+            try:
+                batch = [self.queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            t0 = time.perf_counter()
+            try:
+                self.worker(batch)
+                self.processed_count += len(batch)
+                self.batch_count += 1
+            except Exception as e:
+                print(f"❌ Error in {self.name} stage: {e}")
+            finally:
+                self.busy_time += time.perf_counter() - t0
+                for item in batch:
+                    self._done(item)
+                    self.queue.task_done()
+
+
+class FramePipeline:
+    """Fans frames out from the producer directly to every stage.
+
+    If a FrameRingBuffer is given, each stage holds the frame's ring slot
+    until it has processed or dropped the frame.
+    """
+
+    def __init__(self, frame_ring=None):
+        self.frame_ring = frame_ring
+        self.stages = {}
+
+    def add_stage(self, name, worker, policy="block", maxsize=8, block_timeout=0.5, on_drop=None,
+                  batch_size=None, max_wait_ms=20.0):
+        """Add a stage; with a batch_size the worker receives lists of up to that many frames."""
+        if batch_size is None:
+            stage = PipelineStage(name, worker, policy, maxsize, block_timeout)
+        else:
+            stage = BatchingStage(name, worker, policy, maxsize, block_timeout, batch_size, max_wait_ms)
+        stage.on_done = self._release
+        stage.on_drop = on_drop
+        self.stages[name] = stage
+        return stage
+
+    def start(self):
+        for stage in self.stages.values():
+            stage.start()
+
+    def stop(self, drain=True):
+        for stage in self.stages.values():
+            stage.stop(drain=drain)
+
+    def publish(self, frame_data):
+        """Hand one frame to every stage. The producer's own slot hold is given up."""
+        slot = frame_data.get("slot")
+        if self.frame_ring is not None and slot is not None:
+            self.frame_ring.retain(slot, len(self.stages))
+
+        for stage in self.stages.values():
+            if not stage.offer(frame_data):
+                self._release(frame_data)
+
+        self._release(frame_data)
+
+    def stats(self):
+        return {name: stage.stats() for name, stage in self.stages.items()}
+
+    def format_stats(self):
+        return "  ".join(
+            f"{name}: {s['depth']} queued, {s['dropped']} dropped"
+            + (f", {s['fps']:.1f} fps in {s['batches']} batches" if "batches" in s else "")
+            for name, s in self.stats().items()
+        )
+
+    def _release(self, frame_data):
+        slot = frame_data.get("slot")
+        if self.frame_ring is not None and slot is not None:
+            self.frame_ring.release(slot)
+
+
+class FrameJoiner:
+    """Joins the results of parallel stages back together by frame index.
+
+    A frame is registered once when it is grabbed, each stage then submits
+    its result (or None if it skipped the frame), and once every expected
+    stage has reported the merged frame is passed to on_complete.
+    """
+
+    def __init__(self, expected_stages, on_complete, frame_ring=None, max_pending=64):
+        self.expected_stages = set(expected_stages)
+        self.on_complete = on_complete
+        self.frame_ring = frame_ring
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.pending = {}  # frame index -> [frame_data, stages still outstanding]
+        self.forced_count = 0
+
+    def add_frame(self, frame_index, frame_data):
+        """Register a newly grabbed frame; the joiner holds its own ring slot reference."""
+        slot = frame_data.get("slot")
+        if self.frame_ring is not None and slot is not None:
+            self.frame_ring.retain(slot)
+
+        if not self.expected_stages:
+            self._emit(frame_data)
+            return
+
+        overflow = []
+        with self.lock:
+            # Stages write their results into a copy, not the dict they were handed
+            self.pending[frame_index] = [dict(frame_data), set(self.expected_stages)]
+            # A stalled stage must not pin ring slots forever: flush the oldest frames
+            while len(self.pending) > self.max_pending:
+                oldest = min(self.pending)
+                overflow.append(self.pending.pop(oldest)[0])
+                self.forced_count += 1
+        for stale in overflow:
+            self._emit(stale)
+
+    def submit(self, frame_index, stage_name, result=None):
+        """Merge one stage's result into the frame; emit it when nothing is outstanding."""
+        with self.lock:
+            entry = self.pending.get(frame_index)
+            if entry is None:
+                return  # Already flushed
+            frame_data, outstanding = entry
+            if result:
+                frame_data.update(result)
+            outstanding.discard(stage_name)
+            if outstanding:
+                return
+            del self.pending[frame_index]
+        self._emit(frame_data)
+
+    def flush(self):
+        """Emit everything still waiting, e.g. when recording stops."""
+        with self.lock:
+            remaining = [self.pending[index][0] for index in sorted(self.pending)]
+            self.pending.clear()
+        for frame_data in remaining:
+            self._emit(frame_data)
+
+    def _emit(self, frame_data):
+        try:
+            self.on_complete(frame_data)
+        except Exception as e:
+            print(f"❌ Error emitting joined frame: {e}")
@@ -0,0 +1,114 @@
+import threading
+import queue
+import numpy as np
+import cv2
+
+
+class FrameRingBuffer:
+    """Fixed pool of preallocated frame slots shared by every pipeline stage.
+
+    Each slot holds one array per named plane (e.g. "bayer", "raw",
+    "annotated"). Stages pass slot indices around instead of images, and a
+    slot only goes back into the ring once every holder has released it.
+
+    Frames arrive as raw Bayer data; the RGB "raw" plane is only filled the
+    first time a consumer asks for it through debayered(), and every later
+    consumer of that slot shares the same result.
+    """
+
+    def __init__(self, num_slots, height, width, planes):
+        # planes: {"raw": 3, "bayer": 1, ...} -> number of channels per plane
+        self.num_slots = int(num_slots)
+        self.height = int(height)
+        self.width = int(width)
+        # Slots are stored flat so a frame smaller than the slot still gets a
+        # contiguous view that OpenCV can write into with dst=
+        self.channels = dict(planes)
+        self.planes = {
+            name: np.zeros((self.num_slots, self.height * self.width * channels), dtype=np.uint8)
+            for name, channels in self.channels.items()
+        }
+
+        self.lock = threading.Lock()
+        self.ref_counts = [0] * self.num_slots
+        self.shapes = [(self.height, self.width)] * self.num_slots
+        self.debayer_locks = [threading.Lock() for _ in range(self.num_slots)]
+        self.is_debayered = [False] * self.num_slots
+        self.free_slots = queue.Queue()
+        for slot in range(self.num_slots):
+            self.free_slots.put(slot)
+
+    @classmethod
+    def from_camera(cls, camera, num_slots, planes):
+        """Size the ring from the camera's current resolution."""
+        height, width = camera.get_size()
+        return cls(num_slots, height, width, planes)
+
+    def acquire(self, timeout=None):
+        """Take a free slot for a new frame, or return None if none frees up in time."""
+        try:
+            if timeout == 0:
+                slot = self.free_slots.get_nowait()
+            else:
+                slot = self.free_slots.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self.lock:
+            self.ref_counts[slot] = 1
+            self.shapes[slot] = (self.height, self.width)
+            self.is_debayered[slot] = False
+        return slot
+
+    def retain(self, slot, count=1):
+        with self.lock:
+            self.ref_counts[slot] += count
+
+    def release(self, slot, count=1):
+        """Drop holds on a slot; it goes back on the free list only when the last hold goes."""
+        with self.lock:
+            held = self.ref_counts[slot]
+            if held <= 0:
+                # Already free: queueing it again would hand one buffer to two frames
+                print(f"❌ Frame ring slot {slot} released while not held, ignoring")
+                return
+            if count > held:
+                print(f"❌ Frame ring slot {slot} released {count} times with only {held} holds")
+            self.ref_counts[slot] = max(held - count, 0)
+            free = self.ref_counts[slot] == 0
+        if free:
+            self.free_slots.put(slot)
+
+    def set_shape(self, slot, height, width):
+        """Record the size of the frame held in a slot (may be smaller than the slot)."""
+        if height * width > self.height * self.width:
+            raise ValueError(f"Frame {width}x{height} does not fit in a {self.width}x{self.height} slot")
+        self.shapes[slot] = (int(height), int(width))
+
+    def plane(self, slot, name):
+        """Writable view for the stage that produces this plane."""
+        height, width = self.shapes[slot]
+        channels = self.channels[name]
+        flat = self.planes[name][slot, :height * width * channels]
+        if channels == 1:
+            return flat.reshape(height, width)
+        return flat.reshape(height, width, channels)
+
+    def view(self, slot, name):
+        """Read-only view for consumers of this plane."""
+        view = self.plane(slot, name)
+        view.flags.writeable = False
+        return view
+
+    def debayered(self, slot, source="bayer", target="raw"):
+        """Read-only RGB view of a slot, debayering it on first use."""
+        with self.debayer_locks[slot]:
+            if not self.is_debayered[slot]:
+                cv2.cvtColor(self.view(slot, source), cv2.COLOR_BAYER_BG2RGB, dst=self.plane(slot, target))
+                self.is_debayered[slot] = True
+        return self.view(slot, target)
+
+    def free_count(self):
+        return self.free_slots.qsize()
+
+    def memory_bytes(self):
+        return sum(plane.nbytes for plane in self.planes.values())
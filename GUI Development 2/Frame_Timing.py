@@ -0,0 +1,124 @@
+import threading
+import numpy as np
+
+
+class FrameTimingService:
+    """Frame rate, jitter and dropped frames from the camera's own timestamps.
+
+    Keeps a rolling window of hardware timestamps and frame IDs. FPS is
+    averaged over the whole window instead of taken from the gap between two
+    Python loop iterations, so it describes the camera rather than the host.
+    A jump in frame ID (or, after an ID wrap, a timestamp gap of several
+    periods) counts as dropped frames.
+
+    When the host arrival time is passed to record(), the service also learns
+    the offset between the camera clock and time.perf_counter() (the smallest
+    host-minus-camera difference in the window, i.e. the fastest delivery) and
+    returns each frame's capture time on the host clock.
+    """
+
+    def __init__(self, window=120, tick_frequency=1e9):
+        self.window = int(window)
+        self.tick_frequency = float(tick_frequency)
+        self.lock = threading.Lock()
+        self.timestamps = np.zeros(self.window, dtype=np.float64)  # seconds
+        self.clock_offsets = np.full(self.window, np.inf)  # host time - camera time, seconds
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.count = 0
+            self.last_frame_id = None
+            self.last_timestamp = None
+            self.dropped_total = 0
+            self.gap_count = 0
+            self.largest_gap = 0
+            self.clock_offsets[:] = np.inf
+
+    def record(self, frame_id, camera_timestamp, host_time=None):
+        """Add one frame and return its timing: fps, interval_ms, gap (frames missed before it)
+        and capture_time (on the perf_counter clock, or None without host_time)."""
+        t = camera_timestamp / self.tick_frequency
+        with self.lock:
+            capture_time = None
+            if host_time is not None:
+                self.clock_offsets[self.count % self.window] = host_time - t
+                capture_time = t + float(self.clock_offsets.min())
+            gap = 0
+            interval = None
+            if self.last_timestamp is not None:
+                interval = t - self.last_timestamp
+                id_step = frame_id - self.last_frame_id
+                if id_step > 0:
+                    gap = id_step - 1
+                else:
+                    # Frame ID wrapped or was reset: estimate the gap from the timestamps
+                    period = self._median_interval()
+                    if period:
+                        gap = max(int(round(interval / period)) - 1, 0)
+                if gap:
+                    self.dropped_total += gap
+                    self.gap_count += 1
+                    self.largest_gap = max(self.largest_gap, gap)
+
+            self.timestamps[self.count % self.window] = t
+            self.count += 1
+            self.last_frame_id = frame_id
+            self.last_timestamp = t
+
+            return {
+                "fps": self._fps(),
+                "interval_ms": interval * 1000.0 if interval is not None else None,
+                "gap": gap,
+                "capture_time": capture_time,
+            }
+
+    def stats(self):
+        """Smoothed fps, inter-frame interval percentiles and dropped-frame totals."""
+        with self.lock:
+            intervals = self._intervals()
+            stats = {
+                "fps": self._fps(),
+                "frames": self.count,
+                "dropped": self.dropped_total,
+                "gaps": self.gap_count,
+                "largest_gap": self.largest_gap,
+                "jitter_p50_ms": None,
+                "jitter_p95_ms": None,
+                "jitter_p99_ms": None,
+            }
+        if len(intervals):
+            # Jitter is each interval's deviation from the typical frame period
+            deviation = np.abs(intervals - np.median(intervals)) * 1000.0
+            p50, p95, p99 = np.percentile(deviation, [50, 95, 99])
+            stats.update(jitter_p50_ms=p50, jitter_p95_ms=p95, jitter_p99_ms=p99)
+        return stats
+
+    def format_stats(self):
+        stats = self.stats()
+        if stats["jitter_p50_ms"] is None:
+            return f"{stats['fps']:.1f} fps"
+        return (f"{stats['fps']:.1f} fps  jitter p50 {stats['jitter_p50_ms']:.2f} ms / "
+                f"p95 {stats['jitter_p95_ms']:.2f} ms / p99 {stats['jitter_p99_ms']:.2f} ms  "
+                f"{stats['dropped']} dropped in {stats['gaps']} gaps")
+
+    def _ordered(self):
+        n = min(self.count, self.window)
+        if self.count <= self.window:
+            return self.timestamps[:n]
+        start = self.count % self.window
+        return np.concatenate((self.timestamps[start:], self.timestamps[:start]))
+
+    def _intervals(self):
+        return np.diff(self._ordered())
+
+    def _median_interval(self):
+        intervals = self._intervals()
+        return float(np.median(intervals)) if len(intervals) else None
+
+    def _fps(self):
+        timestamps = self._ordered()
+        if len(timestamps) < 2:
+            return 0.0
+        span = timestamps[-1] - timestamps[0]
+        return (len(timestamps) - 1) / span if span > 0 else 0.0
@@ -35,6 +35,8 @@ class GraphSettingsGUI:
                 
         # Initialize save options
         self.save_charts = tk.BooleanVar(value=False)
+        # Chart x axis: frame index, or torch travel distance from RSI
+        self.x_axis = tk.StringVar(value="Frame Index")
         
         self.load_settings()
         self.create_widgets()
@@ -102,6 +104,7 @@ class GraphSettingsGUI:
                     self.show_charts[chart_group].set(value)
 
             self.save_charts.set(settings.get("save_charts", False))
+            self.x_axis.set(settings.get("x_axis", "Frame Index"))
             self.save_folder = settings.get("save_folder", "")
             self.frame_counts_settings = settings.get("frame_counts", {})
 
@@ -173,6 +176,13 @@ class GraphSettingsGUI:
         save_frame.pack(fill="x", pady=5, padx=5)
         ctk.CTkCheckBox(save_frame, text="Save all charts after recording", variable=self.save_charts).pack(anchor="w", pady=5)
 
+        # X axis options
+        x_axis_frame = ctk.CTkFrame(main_frame)
+        ctk.CTkLabel(x_axis_frame, text="Chart X Axis", padx=5, pady=5).pack()
+        x_axis_frame.pack(fill="x", pady=5, padx=5)
+        for text in ["Frame Index", "Travel Distance"]:
+            ctk.CTkRadioButton(x_axis_frame, text=text, variable=self.x_axis, value=text).pack(anchor="w", pady=2, padx=5)
+
         # Save location
         # save_location_frame = ctk.CTkFrame(main_frame)
         # ctk.CTkLabel(save_location_frame, text="Save Location", padx=5, pady=5).pack()
@@ -198,6 +208,7 @@ class GraphSettingsGUI:
             "metrics": {metric: bool(var.get()) for metric, var in self.metrics.items()},
             "show_charts": {chart: bool(var.get()) for chart, var in self.show_charts.items()},
             "save_charts": bool(self.save_charts.get()),
+            "x_axis": self.x_axis.get(),
             "chart_groups": self.chart_groups,
             "frame_counts": {metric: str(var.get()) for metric, var in self.metric_frame_counts.items()},
             "save_folder": str(self.save_folder.get()) if isinstance(self.save_folder, tk.StringVar) else str(self.save_folder)
@@ -0,0 +1,256 @@
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import cv2
+import torch
+import yaml
+from ultralytics import YOLO
+from Inference_Input import LetterboxInput
+
+try:
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+except ImportError:
+    CalibrationDataReader = object
+    quantize_static = None
+
+BACKENDS = ("PyTorch", "ONNX Runtime", "OpenVINO")
+FRAME_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+def exported_model_path(pt_path, backend, int8=False):
+    """Where the export of a .pt file for a backend lives (next to the weights)."""
+    stem = os.path.splitext(pt_path)[0]
+    suffix = "_int8" if int8 else ""
+    if backend == "ONNX Runtime":
+        return f"{stem}{suffix}.onnx"
+    if backend == "OpenVINO":
+        return f"{stem}{suffix}_openvino_model"
+    return pt_path
+
+
+def resolve_model_path(segmentation_settings):
+    """Model file to load for the configured backend, the .pt weights if it has not been exported yet."""
+    pt_path = segmentation_settings["segmentation_file"]
+    backend = segmentation_settings.get("inference_backend", "PyTorch")
+    path = exported_model_path(pt_path, backend, segmentation_settings.get("int8_quantization", False))
+    if not os.path.exists(path):
+        if backend != "PyTorch":
+            print(f"⚠️ No {backend} export at {path}, using the PyTorch weights (export it in Segmentation Settings)")
+        return pt_path
+    return path
+
+
+def recorded_frames(folder, limit=None):
+    """Image files under a recording folder, evenly thinned out to at most `limit`."""
+    paths = []
+    for root, _, files in os.walk(folder):
+        paths.extend(os.path.join(root, name) for name in files if name.lower().endswith(FRAME_EXTENSIONS))
+    paths.sort()
+    if limit is not None and len(paths) > limit:
+        step = len(paths) / limit
+        paths = [paths[int(i * step)] for i in range(limit)]
+    return paths
+
+
+def load_frame(path):
+    """RGB frame from a saved raw image; Bayer-mode recordings are debayered like the live stream."""
+    image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        return None
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_BAYER_BG2RGB)
+    # Raw frames are written straight from the RGB ring buffer, so reading them back gives RGB again
+    return np.ascontiguousarray(image[:, :, :3])
+
+
+class FrameCalibrationReader(CalibrationDataReader):
+    """Feeds recorded frames, letterboxed exactly like process_frame does, to the ONNX quantiser."""
+
+    def __init__(self, paths, input_name, imgsz):
+        self.paths = iter(paths)
+        self.input_name = input_name
+        self.letterbox = LetterboxInput(imgsz)
+
+    def get_next(self):
+        for path in self.paths:
+            frame = load_frame(path)
+            if frame is not None:
+                tensor, _ = self.letterbox.prepare(frame)
+                return {self.input_name: tensor.numpy().copy()}
+        return None
+
+
+def export_model(pt_path, backend, imgsz=640, int8=False, calibration_folder=None, calibration_frames=300):
+    """Export .pt weights for ONNX Runtime or OpenVINO, optionally INT8 post-training quantised.
+
+    INT8 calibration uses frames from a recording folder so the activation
+    ranges match real arc images. Returns the exported model path.
+    """
+    target = exported_model_path(pt_path, backend, int8)
+    if backend == "PyTorch":
+        return target
+    if int8 and not (calibration_folder and recorded_frames(calibration_folder, 1)):
+        raise ValueError("INT8 quantisation needs a folder of recorded frames for calibration")
+
+    model = YOLO(pt_path)
+    t0 = time.perf_counter()
+    if backend == "ONNX Runtime":
+        # Dynamic axes so the batched segmentation stage can run any batch size
+        onnx_path = model.export(format="onnx", imgsz=imgsz, simplify=True, dynamic=True)
+        if int8:
+            if quantize_static is None:
+                raise ImportError("onnxruntime is required for INT8 quantisation")
+            import onnxruntime
+            input_name = onnxruntime.InferenceSession(
+                onnx_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+            reader = FrameCalibrationReader(
+                recorded_frames(calibration_folder, calibration_frames), input_name, imgsz)
+            quantize_static(onnx_path, target, reader, quant_format=QuantFormat.QDQ,
+                            activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+        exported = target if int8 else onnx_path
+
+    elif backend == "OpenVINO":
+        data_yaml = None
+        if int8:
+            # Ultralytics calibrates OpenVINO (through NNCF) on the 'val' split of a dataset yaml
+            folder = os.path.abspath(calibration_folder)
+            dataset = {"path": folder, "train": folder, "val": folder, "names": dict(model.names)}
+            with tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False) as f:
+                yaml.safe_dump(dataset, f)
+                data_yaml = f.name
+        try:
+            kwargs = {"data": data_yaml, "fraction": 1.0} if int8 else {}
+            exported = model.export(format="openvino", imgsz=imgsz, int8=int8, dynamic=True, **kwargs)
+        finally:
+            if data_yaml is not None:
+                os.remove(data_yaml)
+    else:
+        raise ValueError(f"Unknown inference backend: {backend}")
+
+    exported = str(exported)
+    if os.path.abspath(exported) != os.path.abspath(target):
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        shutil.move(exported, target)
+    print(f"✅ Exported {os.path.basename(pt_path)} for {backend}{' (INT8)' if int8 else ''} "
+          f"in {time.perf_counter() - t0:.1f} s -> {target}")
+    return target
+
+
+def class_masks(results, num_classes, shape):
+    """(num_classes, H, W) boolean union of every instance mask of each class."""
+    union = torch.zeros((num_classes, *shape), dtype=torch.bool)
+    if results.masks is None or results.boxes is None or len(results.boxes) == 0:
+        return union
+    masks = results.masks.data.float()
+    if masks.shape[1:] != shape:
+        masks = torch.nn.functional.interpolate(masks[None], size=shape, mode="nearest")[0]
+    masks = (masks > 0.5).cpu()
+    for cls, mask in zip(results.boxes.cls.long().cpu().tolist(), masks):
+        if cls < num_classes:
+            union[cls] |= mask
+    return union
+
+
+def compare_backends(registry, baseline_path, candidate_path, frame_paths, imgsz=640):
+    """Latency and per-class mask IoU of a backend against the PyTorch baseline on recorded frames.
+
+    Both models run through the registry, with the same letterboxed input and
+    precision handling as the live segmentation stage.
+    """
+    baseline = registry.get(baseline_path)
+    candidate = registry.get(candidate_path, imgsz=imgsz)
+    names = [baseline.names[i] for i in sorted(baseline.names)]
+    inputs = {}
+    timings = {"baseline": [], "candidate": []}
+    intersections = torch.zeros(len(names))
+    unions = torch.zeros(len(names))
+    frames = 0
+
+    def run(key, model, frame):
+        half = model.overrides.get("half", False)
+        letterbox = inputs.setdefault(key, LetterboxInput(imgsz, registry.device, half))
+        tensor, _ = letterbox.prepare(frame)
+        if registry.device == "cuda":
+            torch.cuda.synchronize()
+        t0 = time.perf_counter()
+        results = model(tensor, verbose=False)[0]
+        if registry.device == "cuda":
+            torch.cuda.synchronize()
+        timings[key].append((time.perf_counter() - t0) * 1000)
+        return results
+
+    with torch.no_grad():
+        for path in frame_paths:
+            frame = load_frame(path)
+            if frame is None:
+                continue
+            base_results = run("baseline", baseline, frame)
+            cand_results = run("candidate", candidate, frame)
+            shape = tuple(base_results.masks.data.shape[1:]) if base_results.masks is not None else (imgsz, imgsz)
+            base_masks = class_masks(base_results, len(names), shape)
+            cand_masks = class_masks(cand_results, len(names), shape)
+            intersections += (base_masks & cand_masks).flatten(1).sum(1)
+            unions += (base_masks | cand_masks).flatten(1).sum(1)
+            frames += 1
+
+    def latency(values):
+        values = np.asarray(values) if values else np.zeros(1)
+        return {"mean_ms": float(values.mean()), "p95_ms": float(np.percentile(values, 95))}
+
+    return {
+        "frames": frames,
+        "baseline": latency(timings["baseline"]),
+        "candidate": latency(timings["candidate"]),
+        # Classes neither model found anywhere have no IoU
+        "mask_iou": {name: (float(intersections[i] / unions[i]) if unions[i] > 0 else None)
+                     for i, name in enumerate(names)},
+    }
+
+
+def format_comparison(report, backend):
+    lines = [
+        f"{report['frames']} frames",
+        f"PyTorch: {report['baseline']['mean_ms']:.1f} ms mean, {report['baseline']['p95_ms']:.1f} ms p95",
+        f"{backend}: {report['candidate']['mean_ms']:.1f} ms mean, {report['candidate']['p95_ms']:.1f} ms p95",
+    ]
+    for name, iou in report["mask_iou"].items():
+        lines.append(f"{name} mask IoU: {'n/a' if iou is None else f'{iou:.3f}'}")
+    return "\n".join(lines)
+
+
+def benchmark_batch_sizes(registry, model_path, frame_paths, batch_sizes=(1, 2, 4, 8), imgsz=640):
+    """Segmentation throughput in frames/s for each batch size, over the same recorded frames."""
+    model = registry.get(model_path, imgsz=imgsz)
+    frames = [frame for frame in (load_frame(path) for path in frame_paths) if frame is not None]
+    letterbox = LetterboxInput(imgsz, registry.device, model.overrides.get("half", False))
+    throughput = {}
+    with torch.no_grad():
+        for batch_size in batch_sizes:
+            letterbox.configure(imgsz, letterbox.half, batch_size)
+            if registry.device == "cuda":
+                torch.cuda.synchronize()
+            t0 = time.perf_counter()
+            for start in range(0, len(frames), batch_size):
+                batch, _ = letterbox.prepare_batch(frames[start:start + batch_size])
+                model(batch, verbose=False)
+            if registry.device == "cuda":
+                torch.cuda.synchronize()
+            elapsed = time.perf_counter() - t0
+            throughput[batch_size] = len(frames) / elapsed if elapsed > 0 else 0.0
+    return throughput
+
+
+if __name__ == "__main__":
+    # python Inference_Backends.py <model (.pt, .onnx or _openvino_model)> <recording folder> [batch sizes...]
+    import sys
+    from Model_Registry import ModelRegistry
+
+    model_path, folder = sys.argv[1], sys.argv[2]
+    sizes = [int(size) for size in sys.argv[3:]] or [1, 2, 4, 8]
+    registry = ModelRegistry("cuda" if torch.cuda.is_available() else "cpu")
+    paths = recorded_frames(folder, limit=200)
+    for batch_size, fps in benchmark_batch_sizes(registry, model_path, paths, sizes).items():
+        print(f"batch size {batch_size}: {fps:.1f} frames/s over {len(paths)} frames")
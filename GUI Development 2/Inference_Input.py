@@ -0,0 +1,105 @@
+import numpy as np
+import cv2
+import torch
+
+LETTERBOX_FILL = 114  # Same grey padding the model was trained with
+
+
+class LetterboxInput:
+    """Reused input buffers for the segmentation model.
+
+    Frames are resized with their aspect ratio kept and centred on a square
+    imgsz x imgsz canvas (letterboxing) instead of being stretched. The canvas,
+    the resize target and the model input tensor are allocated once and only
+    rebuilt when the frame size or imgsz changes; normalisation to 0-1 happens
+    in place on the input tensor, in the model's precision.
+
+    With batch > 1 there is one canvas and one input row per frame, so a
+    batch can be assembled while earlier rows are still being copied to the
+    GPU. All frames of a batch are expected to have the same size.
+    """
+
+    def __init__(self, imgsz=640, device="cpu", half=False, batch=1):
+        self.device = device
+        self.half = bool(half)
+        self.batch = int(batch)
+        self.imgsz = None
+        self.geometry = None
+        self.resize(imgsz)
+
+    def configure(self, imgsz, half, batch=None):
+        """Match the buffers to a model's input size and precision, and optionally a batch size."""
+        if bool(half) != self.half:
+            self.half = bool(half)
+            self.imgsz = None  # Forces the input tensor to be reallocated in the new dtype
+        if batch is not None and int(batch) > self.batch:
+            self.batch = int(batch)
+            self.imgsz = None
+        self.resize(imgsz)
+
+    def resize(self, imgsz):
+        """(Re)allocate the buffers for a new model input size."""
+        imgsz = int(imgsz)
+        if imgsz == self.imgsz:
+            return
+        self.imgsz = imgsz
+        pin = self.device == "cuda"
+        self.canvas = torch.full((self.batch, imgsz, imgsz, 3), LETTERBOX_FILL, dtype=torch.uint8, pin_memory=pin)
+        self.canvas_np = self.canvas.numpy()
+        dtype = torch.float16 if self.half else torch.float32
+        self.input = torch.empty((self.batch, 3, imgsz, imgsz), dtype=dtype, device=self.device)
+        self.geometry = None
+
+    def prepare_batch(self, frames):
+        """Letterbox several RGB frames into rows of the input tensor. Returns the (N, 3, H, W) tensor and the transform."""
+        if len(frames) > self.batch:
+            self.configure(self.imgsz, self.half, len(frames))
+        transform = None
+        for index, frame in enumerate(frames):
+            _, transform = self.prepare(frame, index)
+        return self.input[:len(frames)], transform
+
+    def prepare(self, frame, index=0):
+        """Letterbox an RGB frame into the input tensor. Returns the tensor and (scale, pad_x, pad_y)."""
+        height, width = frame.shape[:2]
+        if self.geometry is None or self.geometry[0] != (height, width):
+            scale = min(self.imgsz / height, self.imgsz / width)
+            new_w, new_h = int(round(width * scale)), int(round(height * scale))
+            pad_x, pad_y = (self.imgsz - new_w) // 2, (self.imgsz - new_h) // 2
+            # Border only has to be repainted when the layout changes
+            self.canvas_np[:] = LETTERBOX_FILL
+            self.resized = np.empty((new_h, new_w, 3), dtype=np.uint8)
+            self.geometry = ((height, width), (new_w, new_h), (scale, pad_x, pad_y))
+
+        _, (new_w, new_h), transform = self.geometry
+        _, pad_x, pad_y = transform
+        if (new_w, new_h) == (width, height):
+            self.canvas_np[index, pad_y:pad_y + new_h, pad_x:pad_x + new_w] = frame
+        else:
+            cv2.resize(frame, (new_w, new_h), dst=self.resized, interpolation=cv2.INTER_LINEAR)
+            self.canvas_np[index, pad_y:pad_y + new_h, pad_x:pad_x + new_w] = self.resized
+
+        # HWC uint8 -> CHW in the model's dtype, then scale in place
+        row = self.input[index:index + 1]
+        row.copy_(self.canvas[index].permute(2, 0, 1).unsqueeze(0), non_blocking=True)
+        row.mul_(1.0 / 255.0)
+        return row, transform
+
+    def content_region(self, mask_size):
+        """(y0, y1, x0, x1) of the letterboxed frame inside a mask of mask_size = (h, w)."""
+        _, (new_w, new_h), (_, pad_x, pad_y) = self.geometry
+        mask_h, mask_w = mask_size
+        y0 = int(round(pad_y * mask_h / self.imgsz))
+        y1 = int(round((pad_y + new_h) * mask_h / self.imgsz))
+        x0 = int(round(pad_x * mask_w / self.imgsz))
+        x1 = int(round((pad_x + new_w) * mask_w / self.imgsz))
+        return y0, y1, x0, x1
+
+
+def boxes_to_image(boxes, transform):
+    """Map xyxy boxes from letterboxed input coordinates back to the original frame."""
+    scale, pad_x, pad_y = transform
+    boxes = boxes.clone()
+    boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad_x) / scale
+    boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad_y) / scale
+    return boxes
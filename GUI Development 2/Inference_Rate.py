@@ -0,0 +1,174 @@
+import copy
+import math
+import numpy as np
+import cv2
+
+class InferenceRateController:
+    """Chooses how often to run full segmentation so the stage keeps up with the camera.
+
+    Every k-th frame is segmented and the frames in between are propagated.
+    Over k frames the stage then spends t_infer + (k - 1) * t_propagate, which
+    must fit in k frame intervals, so
+
+        k = ceil((t_infer - t_propagate) / (frame_interval - t_propagate))
+
+    clamped to [1, max_interval]. All three times are exponential moving
+    averages of what was actually measured.
+    """
+
+    def __init__(self, max_interval=8, smoothing=0.2):
+        self.max_interval = int(max_interval)
+        self.smoothing = float(smoothing)
+        self.inference_time = None
+        self.propagation_time = 0.0
+        self.frame_interval = None
+        self.interval = 1
+        self.frames_since_inference = 0
+        self.inferred_count = 0
+        self.propagated_count = 0
+
+    def should_infer(self, frame_interval=None):
+        """Call once per frame, in order. frame_interval is the camera's frame spacing in seconds."""
+        if frame_interval:
+            self.frame_interval = self._average(self.frame_interval, frame_interval)
+            self._update_interval()
+        if self.frames_since_inference + 1 >= self.interval:
+            self.frames_since_inference = 0
+            return True
+        self.frames_since_inference += 1
+        return False
+
+    def record_inference(self, seconds):
+        self.inference_time = self._average(self.inference_time, seconds)
+        self.inferred_count += 1
+        self._update_interval()
+
+    def record_propagation(self, seconds):
+        self.propagation_time = self._average(self.propagation_time if self.propagated_count else None, seconds)
+        self.propagated_count += 1
+        self._update_interval()
+
+    def format_stats(self):
+        if self.inference_time is None:
+            return "segment every frame"
+        return (f"segment every {self.interval} frame(s), inference {self.inference_time * 1000:.1f} ms, "
+                f"propagation {self.propagation_time * 1000:.1f} ms")
+
+    def _average(self, current, value):
+        return value if current is None else current + self.smoothing * (value - current)
+
+    def _update_interval(self):
+        if self.inference_time is None or self.frame_interval is None:
+            return
+        spare = self.frame_interval - self.propagation_time
+        if spare <= 0:
+            self.interval = self.max_interval
+            return
+        needed = math.ceil((self.inference_time - self.propagation_time) / spare)
+        self.interval = min(max(needed, 1), self.max_interval)
+
+
+def tracking_image(bayer):
+    """Half-resolution luminance for tracking: the green sample of each BG Bayer quad, no debayering."""
+    return np.ascontiguousarray(bayer[0::2, 1::2])
+
+
+class MeasurementTracker:
+    """Carries the last segmentation forward to frames that are not segmented.
+
+    Works in the frame's own (ROI) pixel coordinates, like process_frame.
+    Each class box is moved by the median sparse optical flow (pyramidal
+    Lucas-Kanade on the half-resolution tracking image) of corner points
+    inside it; areas, widths and heights are kept from the last segmented
+    frame. An ROI change between frames is a pure coordinate shift and is
+    applied on top. Masks, when kept, are moved by the same shift; they are
+    dropped when the ROI changes because the frame size changes with it.
+    """
+
+    def __init__(self, class_names, max_points=32, scale=2):
+        self.class_names = list(class_names)
+        self.max_points = int(max_points)
+        self.scale = int(scale)
+        self.previous = None  # tracking image of the last frame
+        self.roi = None
+        self.measurements = None
+        self.masks = None
+
+    def ready(self):
+        return self.measurements is not None
+
+    def reset(self):
+        self.previous = None
+        self.measurements = None
+        self.masks = None
+
+    def update(self, image, measurements, masks, roi):
+        """Start tracking from a segmented frame (measurements in frame coordinates, before ROI offsets)."""
+        self.previous = image.copy()
+        self.measurements = copy.deepcopy(measurements)
+        self.masks = {cls: mask for cls, mask in masks.items() if mask is not None}
+        self.roi = roi
+
+    def propagate(self, image, roi):
+        """Measurements and masks for the next frame; the tracker moves on to that frame."""
+        roi_dx, roi_dy = self._roi_shift(roi)
+        measurements = copy.deepcopy(self.measurements)
+        masks = {}
+        same_geometry = roi_dx == 0 and roi_dy == 0 and image.shape == self.previous.shape
+
+        for cls, name in enumerate(self.class_names):
+            data = measurements.get(name)
+            if data is None or data.get("x_min") is None:
+                continue
+            dx, dy = self._flow(image, data) if same_geometry else (0, 0)
+            dx += roi_dx
+            dy += roi_dy
+            for key in ("x_min", "x_max", "centroid_x"):
+                if data.get(key) is not None:
+                    data[key] += dx
+            for key in ("y_min", "y_max", "centroid_y"):
+                if data.get(key) is not None:
+                    data[key] += dy
+            if cls in self.masks and same_geometry:
+                masks[cls] = self._shift_mask(self.masks[cls], dx, dy)
+
+        self.previous = image.copy()
+        self.measurements = copy.deepcopy(measurements)
+        self.masks = masks
+        self.roi = roi
+        return measurements, masks
+
+    def _roi_shift(self, roi):
+        """Offset to add to old frame coordinates so they are correct in the new ROI."""
+        old = self.roi or (0, 0)
+        new = roi or (0, 0)
+        return old[0] - new[0], old[1] - new[1]
+
+    def _flow(self, image, data):
+        """Median (dx, dy) in frame pixels of the tracked corners inside one class box."""
+        s = self.scale
+        height, width = self.previous.shape
+        x0, x1 = max(int(data["x_min"]) // s, 0), min(int(data["x_max"]) // s + 1, width)
+        y0, y1 = max(int(data["y_min"]) // s, 0), min(int(data["y_max"]) // s + 1, height)
+        if x1 - x0 < 4 or y1 - y0 < 4:
+            return 0, 0
+        region = np.zeros_like(self.previous)
+        region[y0:y1, x0:x1] = 255
+        points = cv2.goodFeaturesToTrack(self.previous, self.max_points, 0.01, 3, mask=region)
+        if points is None:
+            return 0, 0
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(self.previous, image, points, None,
+                                                    winSize=(15, 15), maxLevel=2)
+        good = status.ravel() == 1
+        if not good.any():
+            return 0, 0
+        shift = np.median((moved - points).reshape(-1, 2)[good], axis=0) * s
+        return int(round(shift[0])), int(round(shift[1]))
+
+    @staticmethod
+    def _shift_mask(mask, dx, dy):
+        if dx == 0 and dy == 0:
+            return mask
+        matrix = np.float32([[1, 0, dx], [0, 1, dy]])
+        return cv2.warpAffine(mask, matrix, (mask.shape[1], mask.shape[0]),
+                              flags=cv2.INTER_NEAREST, borderValue=0)
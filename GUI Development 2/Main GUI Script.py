@@ -12,6 +12,24 @@ from Recording_settings_GUI import RecordingsettingsGUI
 from Annotation_Settings_GUI import AnnotationSettingsGUI
 from Material_Defaults_GUI import MaterialDefaultsGUI
 from Graph_Settings_GUI import GraphSettingsGUI
+from Camera_Acquisition import AcquisitionEngine
+from Camera_Backends import create_camera
+from Frame_Ring_Buffer import FrameRingBuffer
+from Frame_Pipeline import FramePipeline, PipelineStage, FrameJoiner
+from Exposure_Scheduler import ExposureScheduler
+from Frame_Timing import FrameTimingService
+from Sensor_ROI import AdaptiveROI, InferenceCrop, roi_to_full_frame
+from RSI_Listener import RSIListener
+from RSI_Recorder import RSIRecorder
+from Model_Registry import ModelRegistry
+from Inference_Input import LetterboxInput
+from Mask_Measurements import measure_masks
+from Inference_Backends import resolve_model_path
+from Inference_Rate import InferenceRateController, MeasurementTracker, tracking_image
+from Segmentation_Overlay import LabelMapRenderer
+from Polygon_Measurements import PolygonRecorder, measure_polygons, polygon_mask
+from Arc_Gate import ArcGate
+from Measurement_Log import MeasurementWorkbook
 from PIL import Image, ImageTk
 from collections import deque
 import time
@@ -20,14 +38,11 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import socket
 import threading
 import queue
-from pypylon import pylon
 import sys
 import cv2
 import xml.etree.ElementTree as ET
 from ultralytics import YOLO
 from datetime import datetime
-import openpyxl
-from openpyxl.styles import Font
 import torch
 import torch.nn.functional as F
 sys.path.append(os.path.dirname(__file__))  # Ensure current folder is in path
@@ -61,6 +76,7 @@ cam = 0
 cam_lock = threading.Lock()
 R_IP = "192.168.1.25"
 R_PORT = 59152
+rsi_listener = None  # Started the first time an Automatic recording is armed
 
 global start_time_integer
 start_time_integer = 0
@@ -69,6 +85,67 @@ start_time_integer = 0
 IP = "169.254.235.230"
 PORT = 139
 
+# Buffer, queue and grab strategy settings applied when grabbing starts.
+# A frame rate of None lets the camera free-run at the sensor's maximum rate.
+camera_grab_settings = {
+    "max_num_buffer": 5,
+    "output_queue_size": 1,
+    "grab_strategy": "LatestImageOnly",
+    "retrieve_timeout_ms": 1000,
+    "frame_queue_size": 8,
+    "acquisition_frame_rate": None,
+}
+
+# Number of preallocated frame slots shared by acquisition, annotation,
+# segmentation, saving and preview. Memory use is fixed by this, not run length.
+FRAME_RING_SLOTS = 16
+FRAME_RING_PLANES = {"bayer": 1, "raw": 3, "annotated": 3, "segmented": 3}
+
+# Queue bound and drop policy for each stage. Annotation and segmentation run
+# in parallel on every grabbed frame (segmentation skips frames it can't keep up
+# with), their results are joined back by frame index, and the joined frame is
+# fanned out to the saving and preview stages.
+pipeline_stage_settings = {
+    "annotate": {"policy": "block", "maxsize": 8},
+    "segment": {"policy": "latest_only", "maxsize": 1},
+    "metrics": {"policy": "block", "maxsize": 32, "block_timeout": 0.5},
+    "save_images": {"policy": "never_drop", "maxsize": 8},
+    "save_measurements": {"policy": "never_drop", "maxsize": 32},
+    "preview": {"policy": "latest_only", "maxsize": 1},
+}
+
+global camera, acquisition_engine, frame_ring, processing_pipeline, output_pipeline
+camera = None
+acquisition_engine = None
+exposure_scheduler = None
+frame_timing = None
+roi_controller = None
+# Adaptive inference rate: segment every k-th frame, track the boxes in between
+inference_rate = None
+measurement_tracker = None
+# Segmentation timing for the status panel and the end-of-recording summary,
+# instead of a print per inference on the hot path
+segmentation_timing = {"calls": 0, "frames": 0, "total_ms": 0.0, "max_ms": 0.0, "skipped_loading": 0,
+                       "waiting": False}
+segmentation_timing_lock = threading.Lock()
+# Instance outlines of every frame, written in polygon measurement mode
+polygon_recorder = None
+# Measurement workbook kept open for the whole recording
+measurement_log = None
+# Skips segmentation on dark frames (arc off)
+arc_gate = None
+# Crop window around the last detections for crop-to-ROI inference
+inference_crop = None
+# Torch path length since recording started, from the RSI pose of each frame
+travel_distance = None
+last_torch_position = None
+frame_ring = None
+processing_pipeline = None
+output_pipeline = None
+frame_joiner = None
+metrics_stage = None
+acquiring_thread = None
+
 # Ensure assets directory exists
 if not os.path.exists(ASSETS_DIR):
     os.makedirs(ASSETS_DIR)
@@ -198,7 +275,19 @@ buttons_frame.grid(row=1, column=0, padx=10, pady=5, sticky="w")
 
 ###############
 def open_segmentation_settings():
-    SegmentationSettingsGUI(window, callback = update_class_values)
+    SegmentationSettingsGUI(window, callback = update_segmentation_settings)
+
+def update_segmentation_settings():
+    """Reload the segmentation settings and swap in a newly selected model in the background."""
+    global segmentation_settings
+    if os.path.exists("segmentation_settings.json"):
+        with open("segmentation_settings.json", 'r') as f:
+            segmentation_settings = json.load(f)
+    configure_model_warm_up()
+    model_registry.load_async(resolve_model_path(segmentation_settings), on_ready=model_ready,
+                              imgsz=segmentation_settings.get("export_imgsz"))
+    update_model_status_loop()
+    update_class_values()
 
 def open_recording_settings():
     RecordingsettingsGUI(window, callback=update_gui_from_settings)
@@ -248,9 +337,19 @@ is_recording = False
 
 ### TOGGLE RECORDING FUNCTION. THIS IS WHERE THE RECORDING OF THE IMAGES STARTS.
 def toggle_recording():
-    global is_recording, timestamp, experiment_folder
+    global is_recording, timestamp, experiment_folder, acquisition_engine, frame_ring, exposure_scheduler, frame_timing
+    global roi_controller, travel_distance, last_torch_position, inference_rate, measurement_tracker, polygon_recorder
+    global arc_gate, inference_crop, measurement_log
+    global processing_pipeline, output_pipeline, frame_joiner, metrics_stage, acquiring_thread
 
     if record_button.cget("text") == "Start Recording":
+        if camera is None:
+            print("❌ No camera connected — cannot start recording.")
+            return
+        if "segment" in processing_stage_names(recording_settings) and model_registry.active() is None:
+            # Recording only starts once the model is warm, so the first frames aren't lost to initialisation
+            print(f"⏳ {model_registry.format_status()} — try again when it is ready.")
+            return
         print("\n--- Starting Recording ---")
         t0 = time.perf_counter()
 
@@ -269,26 +368,66 @@ def toggle_recording():
         t2 = time.perf_counter()
         print(f"[Timing] Experiment folder created: {t2 - t1:.4f} s")
 
-        threading.Thread(target=video_acquiring_worker, daemon=True).start()
+        roi_controller = None
+        if recording_settings.get("adaptive_roi"):
+            # Start from the full sensor; the ROI then follows the detections
+            camera.set_roi(None)
+            roi_controller = AdaptiveROI(
+                camera.get_sensor_size(),
+                padding=int(recording_settings.get("roi_padding", 64)),
+                hysteresis=int(recording_settings.get("roi_hysteresis", 32)),
+            )
+        inference_rate = None
+        measurement_tracker = None
+        reset_segmentation_timing()
+        if adaptive_inference_enabled():
+            inference_rate = InferenceRateController(int(segmentation_settings.get("max_inference_interval", 8)))
+            measurement_tracker = MeasurementTracker(class_names)
+        arc_gate = None
+        if segmentation_settings.get("arc_gate"):
+            arc_gate = ArcGate(
+                brightness_threshold=float(segmentation_settings.get("arc_brightness_threshold", 20)),
+                saturated_percent=float(segmentation_settings.get("arc_saturated_percent", 0.05)),
+            )
+        inference_crop = None
+        if segmentation_settings.get("crop_inference"):
+            inference_crop = InferenceCrop(padding=int(segmentation_settings.get("crop_padding", 48)))
+        polygon_recorder = None
+        if polygon_measurement_enabled():
+            polygon_recorder = PolygonRecorder(os.path.join(experiment_folder, "polygons.bin"))
+        measurement_log = None
+        if raw_experiment_excel_data_settings.get("Save Raw Data in Excel") == True:
+            measurement_log = MeasurementWorkbook(
+                os.path.join(experiment_folder, "Raw Segmentation Data.xlsx"), MEASUREMENT_COLUMNS)
+        frame_ring = FrameRingBuffer.from_camera(camera, FRAME_RING_SLOTS, FRAME_RING_PLANES)
+        print(f"[Memory] Frame ring: {FRAME_RING_SLOTS} slots, {frame_ring.memory_bytes() / 1e6:.1f} MB")
+        output_pipeline = build_output_pipeline(frame_ring)
+        frame_joiner = FrameJoiner(processing_stage_names(recording_settings), output_pipeline.publish,
+                                   frame_ring, max_pending=FRAME_RING_SLOTS)
+        processing_pipeline = build_processing_pipeline(frame_ring, recording_settings)
+        metrics_stage = PipelineStage("metrics", metrics_worker, **pipeline_stage_settings["metrics"])
+        output_pipeline.start()
+        metrics_stage.start()
+        processing_pipeline.start()
         t3 = time.perf_counter()
-        print(f"[Timing] Video acquiring thread started: {t3 - t2:.4f} s")
-
-        threading.Thread(target=image_saving_worker, daemon=True).start()
+        print(f"[Timing] Pipeline stages started: {t3 - t2:.4f} s")
+
+        # The first exposure step is written before grabbing starts
+        exposure_scheduler = ExposureScheduler(recording_settings)
+        exposure_scheduler.start(camera)
+        frame_timing = FrameTimingService(tick_frequency=camera.timestamp_tick_frequency)
+        travel_distance = None
+        last_torch_position = None
+        acquisition_engine = AcquisitionEngine(camera, camera_grab_settings, frame_ring)
+        acquisition_engine.start()
+
+        acquiring_thread = threading.Thread(target=video_acquiring_worker, daemon=True)
+        acquiring_thread.start()
         t4 = time.perf_counter()
-        print(f"[Timing] Image saving thread started: {t4 - t3:.4f} s")
-
-        threading.Thread(target=measurement_saving_worker, daemon=True).start()
-        t5 = time.perf_counter()
-        print(f"[Timing] Measurement saving thread started: {t5 - t4:.4f} s")
-
-        threading.Thread(target=draw_preview_worker, daemon=True).start()
-        t6 = time.perf_counter()
-        print(f"[Timing] Preview drawing thread started: {t6 - t5:.4f} s")
+        print(f"[Timing] Acquisition started: {t4 - t3:.4f} s")
 
-        update_recording_loop()
-        t7 = time.perf_counter()
-        print(f"[Timing] update_recording_loop() scheduled: {t7 - t6:.4f} s")
-        print(f"[Total Startup Time] {t7 - t0:.4f} s")
+        update_pipeline_status_loop()
+        print(f"[Total Startup Time] {t4 - t0:.4f} s")
 
     else:
         print("\n--- Stopping Recording ---")
@@ -299,17 +438,101 @@ def toggle_recording():
         )
         is_recording = False
 
-        save_all_charts(graph_settings, canvases)
-        update_camera_status(big_status_display,'idle')
-
-def save_measurements_to_excel(frame_counter, measurements, excel_settings, exposure_time):
-    global annotation_settings
-    base_dir = experiment_folder
-    excel_path = os.path.join(base_dir, "Raw Segmentation Data.xlsx")  # Updated filename
-
+        # Draining the save queues can take a while, so shut down off the Tk thread
+        threading.Thread(target=finish_recording, daemon=True).start()
+
+def finish_recording():
+    """Stop acquisition, let every stage finish its queue, then save the charts."""
+    global acquisition_engine, processing_pipeline, output_pipeline, frame_joiner, metrics_stage, acquiring_thread
+    if acquiring_thread is not None:
+        acquiring_thread.join(timeout=5.0)
+        acquiring_thread = None
+
+    if acquisition_engine is not None:
+        acquisition_engine.stop()
+        acquisition_engine = None
+    if rsi_listener is not None and rsi_listener.recorder is not None:
+        recorder, rsi_listener.recorder = rsi_listener.recorder, None
+        recorder.close()
+    if roi_controller is not None:
+        print(f"[ROI] {roi_controller.change_count} ROI changes")
+        try:
+            camera.set_roi(None)
+        except Exception as e:
+            print(f"❌ Error restoring the full sensor ROI: {e}")
+    if exposure_scheduler is not None:
+        print(f"[Exposure] {exposure_scheduler.write_count} exposure writes over {frame_count} frames")
+    if frame_timing is not None:
+        print(f"[Timing] Camera: {frame_timing.format_stats()}")
+    if arc_gate is not None:
+        print(f"[Arc Gate] {arc_gate.off_count} frames skipped with the arc off")
+    if inference_crop is not None:
+        print(f"[Crop Inference] {inference_crop.crop_count} cropped, {inference_crop.full_count} full-frame inferences")
+    if inference_rate is not None:
+        print(f"[Segmentation] {inference_rate.inferred_count} inferred, {inference_rate.propagated_count} propagated "
+              f"({inference_rate.format_stats()})")
+
+    # Shut down upstream first so every stage sees the last frames
+    if processing_pipeline is not None:
+        processing_pipeline.stop(drain=True)
+    if frame_joiner is not None:
+        frame_joiner.flush()
+    if metrics_stage is not None:
+        metrics_stage.stop(drain=True)
+    if output_pipeline is not None:
+        output_pipeline.stop(drain=True)
+        print(f"[Pipeline] {format_pipeline_stats()}")
+    if polygon_recorder is not None:
+        polygon_recorder.close()
+    if measurement_log is not None:
+        measurement_log.close()
+    if processing_pipeline is not None and "segment" in processing_pipeline.stages:
+        segment_stats = processing_pipeline.stages["segment"].stats()
+        batch_size, max_wait_ms = segmentation_batch_settings()
+        busy = segment_stats["busy_time"]
+        print(f"[Segmentation] batch size {batch_size}, max wait {max_wait_ms:g} ms: "
+              f"{segment_stats['processed'] / busy if busy > 0 else 0.0:.1f} frames/s over "
+              f"{segment_stats['processed']} frames")
+        print(f"[Segmentation] {format_segmentation_timing()}")
+
+    processing_pipeline = None
+    output_pipeline = None
+    frame_joiner = None
+    metrics_stage = None
+
+    window.after(0, save_all_charts, graph_settings, canvases)
+    post_camera_status('idle')
+
+# Fixed column layout of the measurement workbook. Every row is written against
+# all of these, so columns a given frame lacks (no pose, no segmentation result,
+# no centroid in dense mode) stay blank instead of depending on the first row.
+MEASUREMENT_CLASSES = ["Arc Flash", "Solidification Pool", "Welding Wire"]
+MEASUREMENT_KEYS = ["area", "x_min", "x_max", "y_min", "y_max", "width", "height",
+                    "centroid_x", "centroid_y", "x_avg", "y_avg"]
+MEASUREMENT_COLUMNS = [
+    "Frame", "IPOC", "Torch X (mm)", "Torch Y (mm)", "Torch Z (mm)", "Travel Distance (mm)",
+    "Segmentation Type", "Filename", "Starting Exposure Time", "Ending Exposure Time", "Increment",
+    "Exposure Time", "Filter Applied", "Material", "Job Number", "Wire Feed Speed (in/min)",
+    "Travel Speed (in/min)", "Camera Model", "Lens Model", "Illumination", "Viewing Angle",
+    "Shielding Gas", "Current (A)", "Voltage (V)", "Heat Input", "CTWD",
+    "Frame ID", "Camera FPS", "Frame Interval (ms)", "Dropped Before Frame", "ROI",
+    "Segmentation Source",
+] + [f"{feature}_{key}" for feature in MEASUREMENT_CLASSES for key in MEASUREMENT_KEYS]
+
+def save_measurements_to_excel(frame_counter, measurements, excel_settings, exposure_time, timing=None, pose=None,
+                               segmentation_source=None):
     # Construct row data from settings and measurements
     row_data = {
         "Frame": frame_counter,
+    }
+    # Robot pose at capture time, from RSI
+    if pose is not None:
+        row_data["IPOC"] = pose.get("ipoc")
+        row_data["Torch X (mm)"] = pose.get("x")
+        row_data["Torch Y (mm)"] = pose.get("y")
+        row_data["Torch Z (mm)"] = pose.get("z")
+        row_data["Travel Distance (mm)"] = pose.get("travel_distance")
+    row_data.update({
         "Segmentation Type": excel_settings.get("Segmentation Type", ""),
         "Filename": f"frame_{frame_counter:05d}.png",
         "Starting Exposure Time": excel_settings.get("Starting Exposure Time (\u03bcs)", ""),
@@ -330,7 +553,20 @@ def save_measurements_to_excel(frame_counter, measurements, excel_settings, expo
         "Voltage (V)": excel_settings.get("Voltage (V)", ""),
         "Heat Input": excel_settings.get("Heat Input (J/mm)", ""),
         "CTWD": excel_settings.get("CTWD (mm)", ""),
-    }
+    })
+
+    # Camera-side timing from the frame timing service
+    if timing is not None:
+        row_data["Frame ID"] = timing.get("frame_id")
+        row_data["Camera FPS"] = round(timing["fps"], 2)
+        row_data["Frame Interval (ms)"] = timing.get("interval_ms")
+        row_data["Dropped Before Frame"] = timing.get("gap")
+        roi = timing.get("roi")
+        row_data["ROI"] = "Full" if roi is None else "{}, {}, {}x{}".format(*roi)
+
+    # Whether this frame's measurements came from the model or were tracked from the last segmented frame
+    if segmentation_source is not None:
+        row_data["Segmentation Source"] = segmentation_source
 
     # Add measurements per class
     for feature, data in measurements.items():
@@ -349,29 +585,14 @@ def save_measurements_to_excel(frame_counter, measurements, excel_settings, expo
         else:
             data["y_avg"] = None
     
-    for feature in ["Arc Flash", "Solidification Pool", "Welding Wire"]:
+    for feature in MEASUREMENT_CLASSES:
         if feature in measurements:
             for key, val in measurements[feature].items():
                 col = f"{feature}_{key}"
                 row_data[col] = val
 
-    # Initialize file if needed
-    file_exists = os.path.exists(excel_path)
-    if not file_exists:
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Measurements"
-        for i, key in enumerate(row_data.keys(), 1):
-            cell = ws.cell(row=1, column=i, value=key)
-            cell.font = Font(bold=True)
-        wb.save(excel_path)
-
-    # Append data
-    ws = wb.active
-    headers = [cell.value for cell in ws[1]]
-    row = [row_data.get(h, "") for h in headers]
-    ws.append(row)
-    wb.save(excel_path)
+    # Streamed into the open workbook; the file is written when recording stops
+    measurement_log.append(row_data)
 
 def save_frame_images(raw_image, annotated_image, segmented_image, frame_counter):
     global experiment_folder
@@ -418,70 +639,403 @@ def save_all_charts(graph_settings, canvases):
         fig.savefig(save_path)
         print(f"Chart saved: {save_path}")
 
-acquired_queue = queue.Queue()
-save_image_queue = queue.Queue()
-save_measurements_queue = queue.Queue()
-draw_queue = queue.Queue()
+def get_rsi_listener():
+    """Start the RSI listener once and keep it for the rest of the session."""
+    global rsi_listener
+    if rsi_listener is None:
+        listener = RSIListener(recording_settings.get("rsi_ip", R_IP), int(recording_settings.get("rsi_port", R_PORT)))
+        listener.start()
+        rsi_listener = listener
+    return rsi_listener
+
+def wait_for_rsi_start(listener):
+    """Block the grab thread until CAM goes high. Returns False if recording was stopped first."""
+    post_camera_status("waiting_rsi")
+    listener.cam_falling.clear()
+    while is_recording:
+        if listener.cam_high.wait(timeout=0.1):
+            listener.cam_falling.clear()
+            # Frames queued while waiting were taken before the weld started
+            acquisition_engine.flush()
+            return True
+    return False
 
 def video_acquiring_worker():
     global is_recording
-    while is_recording:
-        raw_image, annotated_image, segmented_image, measurements, exposure_time = video_acquiring(recording_settings, annotation_settings)
-        frame_data = {
-            "frame_count": frame_count,
-            "raw_image": raw_image,
-            "annotated_image": annotated_image,
-            "segmented_image": segmented_image,
-            "measurements": measurements,
-            "exposure_time": exposure_time
-        }
-        acquired_queue.put(frame_data)
+    listener = None
+    if recording_settings.get("rsi_mode") == "Automatic":
+        listener = get_rsi_listener()
+        # Keep the raw RSI stream with the experiment so the run can be replayed offline
+        listener.recorder = RSIRecorder(os.path.join(experiment_folder, "rsi_packets.bin"))
+        if not wait_for_rsi_start(listener):
+            return
+    post_camera_status("recording")
 
-def image_saving_worker():
     while is_recording:
-        frame_data = save_image_queue.get()
-        save_frame_images(
-            frame_data["raw_image"],
-            frame_data["annotated_image"],
-            frame_data["segmented_image"],
-            frame_data["frame_count"]
+        if listener is not None and listener.cam_falling.is_set():
+            print("📴 RSI signal ended — stopping recording.")
+            window.after(0, toggle_recording)
+            break
+        frame_data = video_acquiring(recording_settings)
+        if frame_data is None:
+            continue  # Nothing was grabbed this time round
+        frame_joiner.add_frame(frame_data["frame_count"], frame_data)
+        processing_pipeline.publish(frame_data)
+
+def annotation_worker(frame_data):
+    result = None
+    try:
+        slot = frame_data["slot"]
+        annotated_plane = frame_ring.plane(slot, "annotated")
+        np.copyto(annotated_plane, frame_ring.debayered(slot))
+        annotate_raw_image(
+            annotated_plane, annotation_settings, frame_data["exposure_time"],
+            frame_data["loop_count"], frame_data["elapsed_time"], frame_data["fps"]
         )
-        
-def measurement_saving_worker():
-    while is_recording:
-        frame_data = save_measurements_queue.get()
-        if raw_experiment_excel_data_settings.get("Save Raw Data in Excel") == True:
-            save_measurements_to_excel(
-                frame_data["frame_count"],
-                frame_data["measurements"],
-                raw_experiment_excel_data_settings,
-                frame_data["exposure_time"]
-            )
+        result = {"annotated_image": frame_ring.view(slot, "annotated")}
+    finally:
+        frame_joiner.submit(frame_data["frame_count"], "annotate", result)
 
-def draw_preview_worker():
-    while is_recording:
-        frame_data = draw_queue.get()
-        window.after(0, draw_video_previews_from_frames, recording_settings, {
-            "video_raw": frame_data["raw_image"],
-            "video_annotated": frame_data["annotated_image"],
-            "video_segmented": frame_data["segmented_image"]
+def segmentation_worker(frame_data):
+    result = None
+    try:
+        slot = frame_data["slot"]
+        model = segmentation_model(1)
+        if model is None:
+            return
+        if not frame_has_arc(frame_data):
+            result = arc_off_result(frame_data)
+            return
+        raw_rgb = frame_ring.debayered(slot)
+
+        t0 = time.perf_counter()
+        measurements, largest_masks, largest_boxes, polygons = segment_frame(frame_data, raw_rgb, model)
+        record_segmentation_time((time.perf_counter() - t0) * 1000)
+
+        result = finish_segmentation(frame_data, raw_rgb, measurements, largest_masks, largest_boxes, polygons)
+    finally:
+        frame_joiner.submit(frame_data["frame_count"], "segment", result)
+
+def adaptive_segmentation_worker(frame_data):
+    """Segment every k-th frame (k from the measured latency) and track the measurements on the others."""
+    result = None
+    try:
+        slot = frame_data["slot"]
+        model = segmentation_model(1)
+        if model is None:
+            return
+        if not frame_has_arc(frame_data):
+            # Nothing to track across a dark gap; the next arc frame is segmented afresh
+            measurement_tracker.reset()
+            result = arc_off_result(frame_data)
+            return
+        image = tracking_image(frame_ring.view(slot, "bayer"))
+        interval_ms = frame_data["frame_interval_ms"]
+        infer = inference_rate.should_infer(interval_ms / 1000 if interval_ms else None)
+
+        t0 = time.perf_counter()
+        if infer or not measurement_tracker.ready():
+            raw_rgb = frame_ring.debayered(slot)
+            measurements, largest_masks, largest_boxes, polygons = segment_frame(frame_data, raw_rgb, model)
+            inference_rate.record_inference(time.perf_counter() - t0)
+            record_segmentation_time((time.perf_counter() - t0) * 1000)
+            # Track from frame coordinates; finish_segmentation shifts the measurements to the full sensor
+            measurement_tracker.update(image, measurements, largest_masks, frame_data["roi"])
+            source = "inferred"
+        else:
+            measurements, largest_masks = measurement_tracker.propagate(image, frame_data["roi"])
+            largest_masks = {cls: largest_masks.get(cls) for cls in range(len(class_names))}
+            largest_boxes = {}
+            polygons = None
+            inference_rate.record_propagation(time.perf_counter() - t0)
+            raw_rgb = frame_ring.debayered(slot)
+            source = "propagated"
+
+        result = finish_segmentation(frame_data, raw_rgb, measurements, largest_masks, largest_boxes, polygons, source)
+    finally:
+        frame_joiner.submit(frame_data["frame_count"], "segment", result)
+
+def segmentation_batch_worker(batch):
+    """Batched segmentation stage: one forward pass per run of same-sized frames, results split back per frame."""
+    results = {}
+    try:
+        model = segmentation_model(len(batch))
+        if model is None:
+            return
+        lit = []
+        for frame_data in batch:
+            if frame_has_arc(frame_data):
+                lit.append(frame_data)
+            else:
+                results[frame_data["frame_count"]] = arc_off_result(frame_data)
+        if not lit:
+            return
+        frames = [frame_ring.debayered(frame_data["slot"]) for frame_data in lit]
+
+        # An ROI change can resize the frames part way through a batch
+        t0 = time.perf_counter()
+        groups = []
+        for frame_data, raw_rgb in zip(lit, frames):
+            if groups and groups[-1][1][0].shape == raw_rgb.shape:
+                groups[-1][0].append(frame_data)
+                groups[-1][1].append(raw_rgb)
+            else:
+                groups.append(([frame_data], [raw_rgb]))
+        for group_frames, group_images in groups:
+            outputs = process_frames(group_images, model, class_names, segmentation_needs_masks())
+            for frame_data, raw_rgb, output in zip(group_frames, group_images, outputs):
+                results[frame_data["frame_count"]] = finish_segmentation(frame_data, raw_rgb, *output)
+        record_segmentation_time((time.perf_counter() - t0) * 1000, len(lit))
+    finally:
+        for frame_data in batch:
+            frame_joiner.submit(frame_data["frame_count"], "segment", results.get(frame_data["frame_count"]))
+
+def segment_frame(frame_data, raw_rgb, model):
+    """process_frame on the crop window around the last detections when crop inference is on, else the full frame."""
+    # Models that failed to warm up at the crop size (fixed-shape exports) always run full frames
+    if inference_crop is None or not model_registry.supports_imgsz(crop_imgsz()):
+        return process_frame(raw_rgb, model, class_names, segmentation_needs_masks())
+    frame_size = raw_rgb.shape[:2]
+    crop = inference_crop.window(frame_size, frame_data["roi"])
+    try:
+        output = process_frame(raw_rgb, model, class_names, segmentation_needs_masks(), crop)
+    except Exception as e:
+        if crop is None:
+            raise
+        # A model cached before crop inference was turned on was never warmed up at the crop size
+        print(f"⚠️ Crop inference failed, using full frames for this model: {e}")
+        model_registry.mark_unsupported_imgsz(crop_imgsz())
+        output = process_frame(raw_rgb, model, class_names, segmentation_needs_masks())
+    inference_crop.update(output[0], frame_size, frame_data["roi"])
+    return output
+
+def crop_imgsz():
+    return int(segmentation_settings.get("crop_imgsz", 320))
+
+def segmentation_model(frame_total):
+    """Active model, or None while it is still loading. Logged once per change, not once per skipped frame."""
+    model = model_registry.active()
+    with segmentation_timing_lock:
+        was_waiting = segmentation_timing["waiting"]
+        segmentation_timing["waiting"] = model is None
+        if model is None:
+            segmentation_timing["skipped_loading"] += frame_total
+        skipped = segmentation_timing["skipped_loading"]
+    if model is None and not was_waiting:
+        print("Segmentation model is still loading, skipping frames until it is ready")
+    elif model is not None and was_waiting:
+        print(f"Segmentation model ready, {skipped} frames skipped while it loaded")
+    return model
+
+def record_segmentation_time(ms, frame_total=1):
+    with segmentation_timing_lock:
+        segmentation_timing["calls"] += 1
+        segmentation_timing["frames"] += frame_total
+        segmentation_timing["total_ms"] += ms
+        segmentation_timing["max_ms"] = max(segmentation_timing["max_ms"], ms)
+
+def reset_segmentation_timing():
+    with segmentation_timing_lock:
+        segmentation_timing.update(calls=0, frames=0, total_ms=0.0, max_ms=0.0, skipped_loading=0, waiting=False)
+
+def format_segmentation_timing():
+    with segmentation_timing_lock:
+        timing = dict(segmentation_timing)
+    text = "no frames segmented"
+    if timing["calls"]:
+        text = (f"{timing['frames']} frames in {timing['calls']} inference calls, "
+                f"{timing['total_ms'] / timing['calls']:.1f} ms mean, {timing['max_ms']:.1f} ms max per call")
+    if timing["skipped_loading"]:
+        text += f", {timing['skipped_loading']} skipped while the model loaded"
+    return text
+
+def frame_has_arc(frame_data):
+    """Arc gate on the raw Bayer data; always True when the gate is off."""
+    return arc_gate is None or arc_gate.check(frame_ring.view(frame_data["slot"], "bayer"))
+
+def arc_off_result(frame_data):
+    """Result for a frame the arc gate rejected: no inference, every class empty, logged as "arc off"."""
+    measurements = {name: {key: None for key in ("area", "x_min", "x_max", "y_min", "y_max", "width", "height")}
+                    for name in class_names}
+    no_masks = {cls: None for cls in range(len(class_names))}
+    return finish_segmentation(frame_data, frame_ring.debayered(frame_data["slot"]), measurements,
+                               no_masks, {}, None, "arc off")
+
+def segmentation_needs_masks():
+    return recording_settings.get("video_segmented") or recording_settings.get("image_segmented")
+
+def finish_segmentation(frame_data, raw_rgb, measurements, largest_masks, largest_boxes, polygons=None,
+                        source="inferred"):
+    """Draw one frame's segmentation, update the ROI and metrics, and return its joiner result.
+
+    polygons are the instance outlines in polygon measurement mode (None
+    otherwise). source is "inferred" when the model ran on this frame,
+    "propagated" when the measurements were tracked from the last segmented
+    frame and "arc off" when the arc gate skipped it.
+    """
+    slot = frame_data["slot"]
+    create_visualization(raw_rgb, largest_masks, largest_boxes, measurements,
+                         output=frame_ring.plane(slot, "segmented"))
+    # Metrics and charts always work in full-sensor coordinates
+    roi_to_full_frame(measurements, frame_data["roi"])
+    if polygons is not None and frame_data["roi"] is not None:
+        offset = np.array(frame_data["roi"][:2], dtype=np.float32)
+        polygons = [(cls, points + offset) for cls, points in polygons]
+    if roi_controller is not None:
+        # frame_data["roi"] is what the camera applied to this frame, not what was last requested
+        new_roi = roi_controller.update(measurements, frame_data["roi"])
+        if new_roi is not None:
+            acquisition_engine.request_roi(new_roi)
+    # Dark frames would only add gaps to the charts
+    if source != "arc off":
+        metrics_stage.offer({
+            "frame_count": frame_data["frame_count"],
+            "measurements": measurements,
+            "travel_distance": frame_data["travel_distance"],
+            "segmentation_source": source,
         })
-        
-        
+    return {
+        "measurements": measurements,
+        "segmented_image": frame_ring.view(slot, "segmented"),
+        "segmentation_source": source,
+        "polygons": polygons,
+    }
 
-def update_recording_loop():
-    if is_recording:
-        try:
-            if not acquired_queue.empty():
-                frame_data = acquired_queue.get()
+def skip_processing(stage_name):
+    """Drop handler: tell the joiner a stage will never report on this frame."""
+    return lambda frame_data: frame_joiner.submit(frame_data["frame_count"], stage_name, None)
+
+def processing_stage_names(recording_settings):
+    names = []
+    if recording_settings.get("video_annotated"):
+        names.append("annotate")
+    if recording_settings.get("video_segmented"):
+        names.append("segment")
+    return names
+
+def segmentation_batch_settings():
+    """(batch size, max wait in ms) for the segmentation stage; a batch size of 1 means no batching."""
+    batch_size = max(1, int(segmentation_settings.get("batch_size", 1)))
+    return batch_size, float(segmentation_settings.get("batch_max_wait_ms", 20))
+
+def polygon_measurement_enabled():
+    return segmentation_settings.get("measurement_mode", "Dense") == "Polygon"
+
+def adaptive_inference_enabled():
+    """Adaptive inference rate is for live runs; batching already trades latency for throughput."""
+    return bool(segmentation_settings.get("adaptive_inference")) and segmentation_batch_settings()[0] == 1
+
+def build_processing_pipeline(frame_ring, recording_settings):
+    """Stages that work on every grabbed frame in parallel, joined back by frame index."""
+    pipeline = FramePipeline(frame_ring)
+    workers = {
+        "annotate": annotation_worker,
+        "segment": segmentation_worker,
+    }
+    for name in processing_stage_names(recording_settings):
+        settings = dict(pipeline_stage_settings[name])
+        worker = workers[name]
+        if name == "segment":
+            batch_size, max_wait_ms = segmentation_batch_settings()
+            if batch_size > 1:
+                # Batches need a real queue to fill from; frames that still don't fit are skipped
+                worker = segmentation_batch_worker
+                settings.update(policy="block", maxsize=4 * batch_size, block_timeout=0.0,
+                                batch_size=batch_size, max_wait_ms=max_wait_ms)
+            elif adaptive_inference_enabled():
+                # Lossless, so every grabbed frame reaches the worker and gets a result, inferred or
+                # propagated, and should_infer() counts camera frames. Propagation is cheap and the
+                # controller widens k when inference falls behind, so the queue drains.
+                worker = adaptive_segmentation_worker
+                settings.update(policy="never_drop", maxsize=8)
+        pipeline.add_stage(name, worker, on_drop=skip_processing(name), **settings)
+    return pipeline
+
+def raw_image_for_saving(frame_data):
+    """Raw frame to write: the single-channel Bayer data in Bayer mode, else debayered RGB."""
+    if not recording_settings.get("video_raw"):
+        return None
+    if recording_settings.get("raw_format") == "Bayer":
+        return frame_ring.view(frame_data["slot"], "bayer")
+    return frame_ring.debayered(frame_data["slot"])
+
+def image_saving_worker(frame_data):
+    save_frame_images(
+        raw_image_for_saving(frame_data),
+        frame_data["annotated_image"],
+        frame_data["segmented_image"],
+        frame_data["frame_count"]
+    )
 
-                # Dispatch to workers
-                save_image_queue.put(frame_data)
-                save_measurements_queue.put(frame_data)
-                draw_queue.put(frame_data)
+def measurement_saving_worker(frame_data):
+    if polygon_recorder is not None and frame_data.get("polygons") is not None:
+        polygon_recorder.write(frame_data["frame_count"], frame_data["polygons"])
+    if measurement_log is not None:
+        save_measurements_to_excel(
+            frame_data["frame_count"],
+            frame_data["measurements"],
+            raw_experiment_excel_data_settings,
+            frame_data["exposure_time"],
+            {
+                "frame_id": frame_data["frame_id"],
+                "fps": frame_data["fps"],
+                "interval_ms": frame_data["frame_interval_ms"],
+                "gap": frame_data["dropped_before"],
+                "roi": frame_data["roi"],
+            },
+            robot_pose_for_log(frame_data),
+            frame_data.get("segmentation_source")
+        )
 
-        finally:
-            window.after(30, update_recording_loop)  # Schedule next GUI check
+def robot_pose_for_log(frame_data):
+    pose = frame_data["robot_pose"]
+    if pose is None:
+        return None
+    return dict(pose, travel_distance=frame_data["travel_distance"])
+
+def draw_preview_worker(frame_data):
+    # Convert and resize on the stage thread; only the label update runs on Tk
+    preview_images = prepare_video_previews(recording_settings, {
+        "video_raw": frame_ring.debayered(frame_data["slot"]) if recording_settings.get("video_raw") else None,
+        "video_annotated": frame_data["annotated_image"],
+        "video_segmented": frame_data["segmented_image"]
+    })
+    window.after(0, draw_video_previews_from_frames, recording_settings, preview_images)
+
+def build_output_pipeline(frame_ring):
+    """Wire every consumer of the joined frames to its own bounded stage."""
+    pipeline = FramePipeline(frame_ring)
+    workers = {
+        "save_images": image_saving_worker,
+        "save_measurements": measurement_saving_worker,
+        "preview": draw_preview_worker,
+    }
+    for name, worker in workers.items():
+        pipeline.add_stage(name, worker, **pipeline_stage_settings[name])
+    return pipeline
+
+def format_pipeline_stats():
+    parts = []
+    if processing_pipeline is not None:
+        parts.append(processing_pipeline.format_stats())
+    if metrics_stage is not None:
+        stats = metrics_stage.stats()
+        parts.append(f"metrics: {stats['depth']} queued, {stats['dropped']} dropped")
+    if output_pipeline is not None:
+        parts.append(output_pipeline.format_stats())
+    return "  ".join(part for part in parts if part)
+
+def update_pipeline_status_loop():
+    """Show camera timing plus per-stage queue depth and drop counts while recording."""
+    status = f"{model_registry.format_status()}\n{format_pipeline_stats()}"
+    if frame_timing is not None:
+        status = f"Camera: {frame_timing.format_stats()}\n{status}"
+    status = f"{status}\nSegmentation: {format_segmentation_timing()}"
+    if inference_rate is not None:
+        status = f"{status}\nSegmentation: {inference_rate.format_stats()}"
+    pipeline_status_display.configure(text=status)
+    if is_recording:
+        window.after(1000, update_pipeline_status_loop)
 
 record_button = ctk.CTkButton(buttons_frame, 
                              text="Start Recording",
@@ -532,11 +1086,23 @@ def update_graphs():
 
 def update_gui_from_settings():
     """Update GUI elements based on latest settings"""
+    global recording_settings, rsi_listener
+    camera_keys = ["camera_source", "replay_folder", "replay_fps", "replay_bayer", "replay_loop"]
+    previous_camera = {key: recording_settings.get(key) for key in camera_keys}
+    previous_rsi = (recording_settings.get("rsi_ip"), recording_settings.get("rsi_port"))
+
     # Reload settings
     if os.path.exists("recording_settings.json"):
         with open("recording_settings.json", 'r') as f:
-            global recording_settings
             recording_settings = json.load(f)
+
+    if {key: recording_settings.get(key) for key in camera_keys} != previous_camera:
+        reconnect_camera()
+    # Rebind the RSI listener on the next Automatic recording if its address changed
+    if rsi_listener is not None and not is_recording and \
+            (recording_settings.get("rsi_ip"), recording_settings.get("rsi_port")) != previous_rsi:
+        rsi_listener.stop()
+        rsi_listener = None
     
     # Add image viewing field to display image if the setting is selected
     reset_recording()
@@ -600,6 +1166,16 @@ def update_camera_status(label, state, detail=""):
     if label.cget("text") != status_text or label.cget("text_color") != status_color:
         label.configure(text=status_text, text_color=status_color)
 
+last_posted_status = None
+
+def post_camera_status(state, detail=""):
+    """Schedule a status update from a worker thread, skipping repeats of the same state."""
+    global last_posted_status
+    if (state, detail) == last_posted_status:
+        return
+    last_posted_status = (state, detail)
+    window.after(0, update_camera_status, big_status_display, state, detail)
+
 
 
 big_status_display.grid(row=1, column=0, sticky="ew", padx=10, pady=(5, 10))
@@ -611,16 +1187,26 @@ big_camera_display = ctk.CTkLabel(status_frame,
                                   text_color="yellow",
                                   anchor="e")
 big_camera_display.grid(row=1,column=1, sticky="ew", padx=10, pady= (5,10))
+
+pipeline_status_display = ctk.CTkLabel(status_frame,
+                                       text="",
+                                       font=("Arial", 12),
+                                       anchor="w")
+pipeline_status_display.grid(row=2, column=0, columnspan=2, sticky="ew", padx=10, pady=(0,10))
 # Optional: make sure the frame expands with window resizing
 status_frame.grid_columnconfigure(0, weight=1)
 
+# Overlay for segment_raw_image, by class index: Arc Flash, Solidification Pool, Welding Wire
+single_image_renderer = LabelMapRenderer([(0, 0, 255), (0, 255, 0), (255, 0, 0)], alpha=0.5)
+
 def segment_raw_image(raw_image, segmentation_settings):
+    """Segment one image outside the recording pipeline and return (class data, overlay)."""
     if not segmentation_settings.get("apply_segmentation", False):
         return {}, raw_image
 
-    # Load YOLOv8 model
-    model_path = segmentation_settings["segmentation_file"]
-    model = YOLO(model_path)
+    # Cached after the first load
+    model_path = resolve_model_path(segmentation_settings)
+    model = model_registry.get(model_path, segmentation_settings.get("export_imgsz"))
 
     # Perform segmentation
     results = model(raw_image)[0]
@@ -632,14 +1218,8 @@ def segment_raw_image(raw_image, segmentation_settings):
     # Desired classes
     target_classes = ["Welding Wire", "Solidification Zone", "Arc Flash"]
     class_names = ["Arc Flash", "Solidification Pool", "Welding Wire"]
-    colors = {
-        "Welding Wire": (255, 0, 0),
-        "Solidification Zone": (0, 255, 0),
-        "Arc Flash": (0, 0, 255),
-    }
-
     class_data = {}
-    overlay = raw_image.copy()
+    labels = single_image_renderer.label_map(raw_image.shape)
 
     found_any = False  # Flag to check if any relevant class was detected
 
@@ -667,43 +1247,15 @@ def segment_raw_image(raw_image, segmentation_settings):
             "class_area": area
         }
 
-        # Overlay colored mask
+        # Collect the masks into one label map, blended once below
         if mask_np.shape[:2] != raw_image.shape[:2]:
             mask_np = cv2.resize(mask_np, (raw_image.shape[1], raw_image.shape[0]), interpolation=cv2.INTER_NEAREST)
-
-        colored_mask = np.zeros_like(raw_image, dtype=np.uint8)
-        colored_mask[mask_np.astype(bool)] = colors[class_name]
-        overlay = cv2.addWeighted(overlay, 1.0, colored_mask, 0.5, 0)
+        single_image_renderer.add_mask(labels, int(cls_id), mask_np)
 
     if not found_any:
         return {}, raw_image
 
-    return class_data, overlay
-
-def set_ET_time(recording_settings,time):
-    if recording_settings.get("et_mode") == "Fixed":
-        return recording_settings.get("et_fixed"), 0  # Fixed mode, loop count always 0
-
-    elif recording_settings.get("et_mode") == "Iterate":
-        et_start = recording_settings.get("et_start")
-        et_end = recording_settings.get("et_end")
-        et_step = recording_settings.get("et_step")
-        time_increment = recording_settings.get("et_time")
-
-        # Total number of unique steps before looping
-        total_steps = ((int(et_end) - int(et_start)) // int(et_step)) + 1
-
-        # How many time steps have passed
-        steps_passed = int(time // int(time_increment))
-
-        # Determine loop count and current step
-        loop_count = steps_passed // total_steps
-        current_step = steps_passed % total_steps
-
-        # Calculate current exposure
-        exposure_time = int(et_start) + int(current_step) * int(et_step)
-
-        return exposure_time, loop_count
+    return class_data, single_image_renderer.render(raw_image, labels)
 
 # def annotate_raw_image(frame, annotation_settings, exposure_time, loop_count, elapsed_time, fps):
 #     annotated_frame = frame
@@ -862,43 +1414,6 @@ def calculate_fps(frame_count, start_time):
     fps = frame_count / elapsed_time if elapsed_time > 0 else 0
     return fps, elapsed_time
 
-def calculate_instantaneous_fps(prev_time):
-    current_time = time.time()
-    time_diff = current_time - prev_time
-    fps = 1.0 / time_diff if time_diff > 0 else 0
-    return fps, current_time
-
-def parse_rsi_data(xml_data):
-    """Parses RSI XML data and extracts the CAM value."""
-    try:
-        root = ET.fromstring(xml_data)
-        cam_value = int(root.find("CAM").text)  # Convert CAM to integer (0 or 1)
-        return cam_value
-    except Exception as e:
-        print(f"Error parsing XML: {e}")
-        return None
-
-def receive_data():
-    """Receives RSI data, detects CAM transition, and updates the global `cam` variable."""
-    global cam
-    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-        s.bind((R_IP, R_PORT))
-        print(f"Listening on {R_IP}:{R_PORT}")
-        
-        while True:
-            try:
-                data, addr = s.recvfrom(1024)
-                data_str = data.decode('utf-8')
-                
-                new_cam = parse_rsi_data(data_str)
-                if new_cam is not None:
-                    with cam_lock:
-                        cam = new_cam
-                else:
-                    with cam_lock:
-                        cam = 0
-            except Exception as e:
-                print(f"Error receiving data: {e}")
 x_max_cumulative = {
     "Arc Flash": [],
     "Solidification Pool": [],
@@ -963,13 +1478,15 @@ output_data = {
         "Arc Flash": [],
         "Solidification Pool": [],
         "Welding Wire": [],
-        "Graph Frame Index": []
+        "Graph Frame Index": [],
+        "Graph Travel Distance": []
     },
     "X Maximum": {
         "Arc Flash": [],
         "Solidification Pool": [],
         "Welding Wire": [],
-        "Graph Frame Index": []
+        "Graph Frame Index": [],
+        "Graph Travel Distance": []
     }
 }
 
@@ -1014,10 +1531,11 @@ def should_output(metric, frame_counter, frame_count_settings):
     count = frame_count_settings.get(metric, 10)
     return frame_counter != 0 and frame_counter % int(count) == 0
 
-def output_metric_data(metric, frame_counter, cumulative_data, output_data):
+def output_metric_data(metric, frame_counter, cumulative_data, output_data, travel_distance=None):
     if metric not in output_data:
         output_data[metric] = {name: [] for name in class_names}
         output_data[metric]["Graph Frame Index"] = []
+        output_data[metric]["Graph Travel Distance"] = []
 
     metric_type = metric_configs[metric]["type"]
     func = metric_configs[metric]["func"]
@@ -1037,12 +1555,14 @@ def output_metric_data(metric, frame_counter, cumulative_data, output_data):
         output_data[metric][class_name].append(output)
 
     output_data[metric]["Graph Frame Index"].append(frame_counter)
+    # NaN keeps the two x columns aligned when no RSI pose was available
+    output_data[metric]["Graph Travel Distance"].append(np.nan if travel_distance is None else travel_distance)
 
     # Reset for next batch
     for class_name in class_names:
         cumulative_data[metric][class_name].clear()
 
-def calculate_metrics_over_frames(all_class_data, settings, output_data):
+def calculate_metrics_over_frames(all_class_data, settings, output_data, travel_distance=None):
     global frame_counter
     graph_key = []
     metrics_settings = settings.get("metrics", {})
@@ -1060,60 +1580,110 @@ def calculate_metrics_over_frames(all_class_data, settings, output_data):
                 compute_and_append(metric, class_name, values, cumulative_data)
 
         if should_output(metric, frame_counter, frame_count_settings):
-            output_metric_data(metric, frame_counter, cumulative_data, output_data)
+            output_metric_data(metric, frame_counter, cumulative_data, output_data, travel_distance)
             graph_key.append(metric)
     frame_counter = frame_counter +1
     return graph_key
 
-def create_visualization(frame, masks, boxes, measurements):
-    """Create visualization with masks and measurements."""
-    output = frame.copy()
-    class_names = ['Arc Flash', 'Solidification Pool', 'Welding Wire']
-    colors = {
-        0: (255, 0, 0),    # Arc Flash - Blue
-        1: (0, 255, 0),    # Solidification Pool - Green
-        2: (0, 0, 255)     # Welding Wire - Red
-    }
+def create_visualization(frame, masks, boxes, measurements, output=None):
+    """Create visualization with masks and measurements.
 
+    All class masks are blended in one pass through segmentation_renderer.
+    Boxes and labels are only drawn when show_boxes / show_labels are set in
+    the annotation settings. Without those keys the overlay looks as it always
+    did: label text, no boxes. With show_boxes on (annotation_settings.json
+    ships with it on for the annotated stream) the segmented stream gets class
+    boxes too.
+    """
+    class_names = ['Arc Flash', 'Solidification Pool', 'Welding Wire']
+    labels = segmentation_renderer.label_map(frame.shape)
+    drawn = []
     for cls in range(len(class_names)):
-        mask = masks[cls]
+        mask = masks.get(cls)
         if mask is not None and isinstance(mask, np.ndarray) and mask.ndim == 2:
-            # Apply color mask
-            colored_mask = np.zeros_like(frame)
-            colored_mask[mask > 0] = colors[cls]
-            output = cv2.addWeighted(output, 0.7, colored_mask, 0.3, 0)
-
-            # Add label with measurements
-            class_name = class_names[cls]
-            measurement = measurements.get(class_name, {})
-            
-            if measurement.get('width') is not None:
-                area = measurement['area']
-                width = measurement['width']
-                height = measurement['height']
-
-                # Unpack boxes[cls] and ignore extra elements
-                box = boxes.get(cls)
-                if box is not None:
-                    # Extract only the first four values: x1, y1, x2, y2
-                    x1, y1, x2, y2 = box[:4].cpu().numpy()  # Convert tensor to numpy array (if it's a tensor)
-                else:
-                    # Default to the measurement's min coordinates if box is None
-                    x1, y1 = measurement.get('x_min', 0), measurement.get('y_min', 0)
-                    x2, y2 = x1 + measurement.get('width', 0), y1 + measurement.get('height', 0)
-
-                label = f"{class_name} ({width}x{height}, {area:,d}px)"
-                cv2.putText(output, label, (int(x1), int(y1) - 10), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
-        
+            segmentation_renderer.add_mask(labels, cls, mask)
+            drawn.append(cls)
+    output = segmentation_renderer.render(frame, labels, output)
+
+    manual_settings = annotation_settings.get("manual_settings", {})
+    show_boxes = manual_settings.get("show_boxes", False)
+    show_labels = manual_settings.get("show_labels", True)
+    if not (show_boxes or show_labels):
+        return output
+
+    for cls in drawn:
+        class_name = class_names[cls]
+        measurement = measurements.get(class_name, {})
+        if measurement.get('width') is None:
+            continue
+        area = measurement['area']
+        width = measurement['width']
+        height = measurement['height']
+
+        # Unpack boxes[cls] and ignore extra elements
+        box = boxes.get(cls)
+        if box is not None:
+            # Extract only the first four values: x1, y1, x2, y2
+            x1, y1, x2, y2 = box[:4].cpu().numpy()  # Convert tensor to numpy array (if it's a tensor)
+        else:
+            # Default to the measurement's min coordinates if box is None
+            x1, y1 = measurement.get('x_min', 0), measurement.get('y_min', 0)
+            x2, y2 = x1 + measurement.get('width', 0), y1 + measurement.get('height', 0)
+
+        if show_boxes:
+            cv2.rectangle(output, (int(x1), int(y1)), (int(x2), int(y2)), segmentation_renderer.colors[cls], 2)
+        if show_labels:
+            label = f"{class_name} ({width}x{height}, {area:,d}px)"
+            cv2.putText(output, label, (int(x1), int(y1) - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+
     return output
 
-model = YOLO(segmentation_settings["segmentation_file"]) 
 class_names = ['Arc Flash', 'Solidification Pool', 'Welding Wire']
 device = "cuda" if torch.cuda.is_available() else "cpu"
+# The configured weights (or their ONNX/OpenVINO export) load and warm up in the background
+# so the window opens straight away
+model_registry = ModelRegistry(device)
+
+def configure_model_warm_up():
+    """Warm-up options for models loaded from now on: torch.compile and the batch sizes to pre-run."""
+    model_registry.set_compile(segmentation_settings.get("compile_model", False))
+    model_registry.warmup_batch_sizes = (segmentation_batch_settings()[0],)
+    model_registry.warmup_imgsz = (crop_imgsz(),) if segmentation_settings.get("crop_inference") else ()
+
+def model_ready(model):
+    window.after(0, update_model_status_loop)
 
-def process_frame(frame, model, class_names):
-    """Optimized: Process a frame and return segmentation results with timing."""
+def update_model_status_loop():
+    """Show model readiness and its cold-start / steady-state latency while not recording."""
+    if is_recording:
+        return  # update_pipeline_status_loop includes it
+    pipeline_status_display.configure(text=model_registry.format_status())
+    if model_registry.loading_path is not None:
+        window.after(500, update_model_status_loop)
+
+configure_model_warm_up()
+model_registry.load_async(resolve_model_path(segmentation_settings), on_ready=model_ready,
+                          imgsz=segmentation_settings.get("export_imgsz"))
+update_model_status_loop()
+# Preallocated letterbox buffers for process_frame, resized to each model's imgsz
+inference_input = LetterboxInput(640, device, model_registry.half)
+# Separate buffers for crop-to-ROI inference, so switching between crop and full frame never reallocates
+crop_input = LetterboxInput(crop_imgsz(), device, model_registry.half)
+# Mask overlay for the segmentation stage: Arc Flash, Solidification Pool, Welding Wire
+segmentation_renderer = LabelMapRenderer([(255, 0, 0), (0, 255, 0), (0, 0, 255)], alpha=0.3)
+
+def process_frame(frame, model, class_names, need_masks=True, crop=None):
+    """Optimized: Process a frame and return segmentation results with timing.
+
+    Measurements are taken at the model's mask resolution and mapped to image
+    pixels analytically. Only the largest mask of each class is upsampled to
+    the frame size, and only when need_masks is set (segmented preview/save).
+    With a crop window (x, y, w, h) only that part of the frame is segmented,
+    see process_crop.
+    """
+    if crop is not None:
+        return process_crop(frame, model, class_names, need_masks, crop)
     # t_start = time.time()
 
     orig_H, orig_W, _ = frame.shape
@@ -1122,90 +1692,89 @@ def process_frame(frame, model, class_names):
     # model.to(device)
     # model.eval()
 
-    # Convert frame to tensor
+    # Letterbox into the reused input tensor, in the precision the model was loaded with.
+    # PyTorch, ONNX Runtime and OpenVINO models all take the same tensor and return the same Results
     # t_preprocessing_start = time.time()
-    input_size = 640
-    resized_frame = cv2.resize(frame, (input_size, input_size))
-
-    frame_tensor = (
-        torch.from_numpy(resized_frame)
-        .permute(2, 0, 1)
-        .unsqueeze(0)
-        .float()
-        / 255.0
-    )
-
-    if device == "cuda":
-        frame_tensor = frame_tensor.to(device).half()
-        model = model.half()
-    else:
-        frame_tensor = frame_tensor.to(device)
+    inference_input.configure(ModelRegistry.input_size(model), model.overrides.get("half", False))
+    frame_tensor, (letterbox_scale, pad_x, pad_y) = inference_input.prepare(frame)
+    input_size = inference_input.imgsz
 
     # t_inference_start = time.time()
     results = model(frame_tensor)[0]
     # t_post_inference_start = time.time()
 
-    # Initialize data structures
-    data = {name: {
-        'area': None,
-        'x_min': None,
-        'x_max': None,
-        'y_min': None,
-        'y_max': None,
-        'width': None,
-        'height': None
-    } for name in class_names}
-
+    return measure_results(results, (orig_H, orig_W), (letterbox_scale, pad_x, pad_y), input_size,
+                           class_names, need_masks)
+
+def process_crop(frame, model, class_names, need_masks, crop):
+    """Segment a window of the frame at the smaller crop imgsz and translate the results back to frame pixels.
+
+    The window is letterboxed into its own input buffer, so the pool gets
+    more model pixels than in a full-frame pass while the model does less work.
+    """
+    x0, y0, crop_w, crop_h = crop
+    window = frame[y0:y0 + crop_h, x0:x0 + crop_w]
+    crop_input.configure(crop_imgsz(), model.overrides.get("half", False))
+    crop_tensor, transform = crop_input.prepare(window)
+    results = model(crop_tensor, verbose=False)[0]
+    data, largest_masks, largest_boxes, polygons = measure_results(
+        results, (crop_h, crop_w), transform, crop_input.imgsz, class_names, need_masks, crop_input)
+
+    # Same shift as a sensor ROI: window coordinates -> frame coordinates
+    roi_to_full_frame(data, crop)
+    offset = torch.tensor([x0, y0, x0, y0], dtype=torch.float32)
+    for cls, box in largest_boxes.items():
+        if box is not None:
+            box = box.clone()
+            box[:4] += offset.to(box.dtype)
+            largest_boxes[cls] = box
+    for cls, mask in largest_masks.items():
+        if mask is not None:
+            full_mask = np.zeros(frame.shape[:2], dtype=np.uint8)
+            full_mask[y0:y0 + crop_h, x0:x0 + crop_w] = mask
+            largest_masks[cls] = full_mask
+    if polygons is not None:
+        polygons = [(cls, points + np.float32([x0, y0])) for cls, points in polygons]
+    return data, largest_masks, largest_boxes, polygons
+
+def process_frames(frames, model, class_names, need_masks=True):
+    """Segment several same-sized frames in one batched forward pass.
+
+    Returns one (measurements, largest_masks, largest_boxes, polygons) tuple per frame,
+    in the order the frames were given.
+    """
+    orig_H, orig_W, _ = frames[0].shape
+    inference_input.configure(ModelRegistry.input_size(model), model.overrides.get("half", False), len(frames))
+    batch_tensor, transform = inference_input.prepare_batch(frames)
+    results = model(batch_tensor, verbose=False)
+    return [
+        measure_results(frame_results, (orig_H, orig_W), transform, inference_input.imgsz, class_names, need_masks)
+        for frame_results in results
+    ]
+
+def measure_polygon_results(results, image_size, transform, class_names, need_masks):
+    """Polygon measurement mode: everything comes from the mask outlines, no dense mask is upsampled."""
+    data, largest_polygons, polygons = measure_polygons(results, transform, image_size, class_names)
     largest_masks = {i: None for i in range(len(class_names))}
     largest_boxes = {i: None for i in range(len(class_names))}
-    largest_areas = {i: 0 for i in range(len(class_names))}
-
-    if hasattr(results, 'masks') and results.masks is not None:
-        masks = results.masks.data
-        boxes = results.boxes.data
-
-        masks = F.interpolate(masks.unsqueeze(1).float(), size=(orig_H, orig_W), mode='nearest').squeeze(1)
-
-        for i, (mask, box) in enumerate(zip(masks, boxes)):
-            cls = int(box[5])
-            cls_name = class_names[cls]
-
-            binary_mask = (mask > 0.5)
-            area = binary_mask.sum().item()
-
-            if area > largest_areas[cls]:
-                largest_areas[cls] = area
-                largest_masks[cls] = binary_mask.detach().cpu().numpy().astype(np.uint8)
-                largest_boxes[cls] = box.detach().cpu()
-
-                ys, xs = torch.where(binary_mask)
-                if ys.numel() > 0:
-                    x_min = int(xs.min().item())
-                    x_max = int(xs.max().item())
-                    y_min = int(ys.min().item())
-                    y_max = int(ys.max().item())
-                    width = x_max - x_min
-                    height = y_max - y_min
-
-                    data[cls_name].update({
-                        'area': int(area),
-                        'x_min': x_min,
-                        'x_max': x_max,
-                        'y_min': y_min,
-                        'y_max': y_max,
-                        'width': width,
-                        'height': height
-                    })
-
-    # t_end = time.time()
-
-    # Print timing for diagnostics
-    # print(f"Total time: {t_end - t_start:.4f}s")
-    # print(f" - Preprocessing: {t_inference_start - t_preprocessing_start:.4f}s")
-    # print(f" - Inference: {t_post_inference_start - t_inference_start:.4f}s")
-    # print(f" - Post-processing: {t_end - t_post_inference_start:.4f}s")
-
-    return data, largest_masks, largest_boxes
+    if need_masks:
+        for cls, points in largest_polygons.items():
+            largest_masks[cls] = polygon_mask(points, image_size)
+    return data, largest_masks, largest_boxes, polygons
+
+def measure_results(results, image_size, transform, input_size, class_names, need_masks, letterbox=None):
+    """Per-class measurements, largest masks and boxes of one frame's Results in frame pixels.
+
+    Returns (measurements, largest_masks, largest_boxes, polygons); polygons
+    is only filled in polygon measurement mode. letterbox is the input buffer
+    the frame went through (inference_input unless given).
+    """
+    letterbox = letterbox or inference_input
+    if polygon_measurement_enabled():
+        return measure_polygon_results(results, image_size, transform, class_names, need_masks)
+    data, largest_masks, largest_boxes = measure_masks(
+        results, image_size, transform, input_size, class_names, need_masks, letterbox)
+    return data, largest_masks, largest_boxes, None
 
 
 global metric_to_class_key
@@ -1221,186 +1790,133 @@ metric_to_class_key = {
     "Class Area" : "area_average",
     "Class Area Standard Deviation" : "area_std_deviation"
 }
-device = "cuda" if torch.cuda.is_available() else "cpu"
-model = YOLO("yolov8n-seg.pt")  # Or however you load your model
-model.to(device)
-model.eval()
 class_names = ["Arc Flash", "Solidification Pool", "Welding Wire"]  # Or your own list like ["Wire", "Arc", ...]
 
-def initialize_camera_settings(camera):
-    try:
-        # Basic settings that should work on most Basler cameras
-        if camera.GetDeviceInfo().IsGigEDevice():
-            # GigE specific settings
-            if hasattr(camera, 'GevSCPSPacketSize'):
-                camera.GevSCPSPacketSize.SetValue(9000)
-            if hasattr(camera, 'GevSCPD'):
-                camera.GevSCPD.SetValue(0)
-            
-        # Check and set buffer and queue settings
-        if hasattr(camera, 'MaxNumBuffer'):
-            camera.MaxNumBuffer.SetValue(5)
-        if hasattr(camera, 'OutputQueueSize'):
-            camera.OutputQueueSize.SetValue(1)
-            
-        # Set acquisition settings if available
-        if hasattr(camera, 'GrabStrategy'):
-            camera.GrabStrategy.SetValue('LatestImageOnly')
-        if hasattr(camera, 'AcquisitionFrameRateEnable'):
-            camera.AcquisitionFrameRateEnable.SetValue(True)
-            if hasattr(camera, 'AcquisitionFrameRate'):
-                camera.AcquisitionFrameRate.SetValue(30.0)
-                
-        camera._settings_initialized = True
-        print("✅ Camera settings initialized successfully")
-        
-    except Exception as e:
-        print(f"❌ Error initializing camera settings: {e}")
-        # Set flag even if failed to prevent repeated attempts
-        camera._settings_initialized = True
-
-
-
-def video_acquiring(recording_settings, annotation_settings):
-    import time  # Make sure this is imported
-    global frame_count, start_time_integer, start_time, prev_frame_time
-    global segmentation_settings, image_paths, output_data, metric_to_class_key
-
-    t_start = time.perf_counter()
-
-    if recording_settings.get("rsi_mode") == "Automatic":
-        update_camera_status(big_status_display,"waiting_rsi")
-        cam_value = receive_data()
-        while cam_value != 1:
-            time.sleep(0.05)
-            cam_value = receive_data()
-        update_camera_status(big_status_display,"recording")
-    else:
-        update_camera_status(big_status_display,"recording")
-    t_cam_check = time.perf_counter()
+def video_acquiring(recording_settings):
+    """Grab stage: advance the exposure schedule and take the next frame's ring slot."""
+    global frame_count, start_time_integer, start_time, travel_distance, last_torch_position
 
     if start_time_integer == 0:
         start_time = time.time()
-        prev_frame_time = start_time
         start_time_integer = 1
 
     elapsed_time = time.time() - start_time
-    frame_count += 1
 
-    exposure_time, loop_count = set_ET_time(recording_settings, elapsed_time)
-    camera.ExposureTimeRaw.SetValue(int(exposure_time))
-    t_exposure = time.perf_counter()
-    
-    
-    
-    
-    grab_result = camera.GrabOne(1000)  # Keep timeout but with optimized settings
-    
-    t_grab = time.perf_counter()
+    # Only writes to the camera when the schedule moves to a new step, through the grab thread
+    requested_exposure, loop_count = exposure_scheduler.update(camera, elapsed_time, acquisition_engine)
 
-    raw_image = None
-    annotated_image = None
-    segmented_image = None
-    measurements = {}
-
-    if grab_result and grab_result.IsValid() and grab_result.GrabSucceeded():
-        img_array = grab_result.Array
-        raw_rgb = cv2.cvtColor(img_array, cv2.COLOR_BAYER_BG2RGB)
-        fps, prev_frame_time = calculate_instantaneous_fps(prev_frame_time)
-
-        if recording_settings.get("video_raw"):
-            raw_image = raw_rgb.copy()
-
-        if recording_settings.get("video_annotated"):
-            annotated_image = annotate_raw_image(
-                raw_rgb.copy(), annotation_settings, exposure_time,
-                loop_count, elapsed_time, fps
-            )
-
-        t_annotation = time.perf_counter()
-
-        if recording_settings.get("video_segmented"):
-            t0 = time.perf_counter()
-            # image_path = image_paths["image_raw"]
-            # t1 = time.perf_counter()
-            # print(f"[Timing] Fetch image path: {(t1 - t0)*1000:.2f} ms")
-
-            # image = Image.open(image_path).convert('RGB')
-            # t2 = time.perf_counter()
-            # print(f"[Timing] Load and convert image: {(t2 - t1)*1000:.2f} ms")
-
-            # sample_image = np.array(image, dtype=np.uint8)
-            # t3 = time.perf_counter()
-            # print(f"[Timing] Convert image to NumPy array: {(t3 - t2)*1000:.2f} ms")
-
-            measurements, largest_masks, largest_boxes = process_frame(raw_image, model, class_names)
-            t4 = time.perf_counter()
-            print(f"[Timing] Run segmentation (process_frame): {(t4 - t3)*1000:.2f} ms")
-
-            segmented_image = create_visualization(raw_image, largest_masks, largest_boxes, measurements)
-            t5 = time.perf_counter()
-            print(f"[Timing] Create visualization: {(t5 - t4)*1000:.2f} ms")
-
-            total_time = t5 - t0
-            print(f"[Timing] Total time for video_segmented block: {total_time*1000:.2f} ms")
-
-        t_segmentation = time.perf_counter()
+    frame = acquisition_engine.get_frame(timeout=1.0)
+    if frame is None:
+        print("❌ No frame received from the acquisition engine.")
+        return None
+    exposure_time = exposure_scheduler.captured_exposure(frame)
 
-        if recording_settings.get("rsi_mode") == "Automatic":
-            cam_value = receive_data()
-            if cam_value == 0:
-                print("📴 RSI signal ended — stopping recording.")
-                toggle_recording()
-    else:
-        print("❌ Grab failed or returned invalid result.")
+    frame_count += 1
+    slot = frame["slot"]
+
+    # No debayering here: consumers that need RGB call frame_ring.debayered()
+    timing = frame_timing.record(frame["frame_id"], frame["timestamp"], frame["host_time"])
+    if timing["gap"]:
+        print(f"⚠️ {timing['gap']} frame(s) dropped before frame {frame['frame_id']}")
+
+    # Join the robot pose at the moment of capture from the RSI ring
+    robot_pose = None
+    if rsi_listener is not None:
+        robot_pose = rsi_listener.ring.pose_at(timing["capture_time"])
+    if robot_pose is not None:
+        position = np.array((robot_pose["x"], robot_pose["y"], robot_pose["z"]))
+        if last_torch_position is None:
+            travel_distance = 0.0
+        else:
+            travel_distance += float(np.linalg.norm(position - last_torch_position))
+        last_torch_position = position
+
+    return {
+        "slot": slot,
+        "frame_count": frame_count,
+        "frame_id": frame["frame_id"],
+        "camera_timestamp": frame["timestamp"],
+        "roi": frame.get("roi"),
+        "robot_pose": robot_pose,
+        "travel_distance": travel_distance if robot_pose is not None else None,
+        "raw_image": None,
+        "annotated_image": None,
+        "segmented_image": None,
+        "measurements": {},
+        "exposure_time": exposure_time,
+        "requested_exposure_time": requested_exposure,
+        "loop_count": loop_count,
+        "elapsed_time": elapsed_time,
+        "fps": timing["fps"],
+        "frame_interval_ms": timing["interval_ms"],
+        "dropped_before": timing["gap"],
+    }
 
-    t_rsi = time.perf_counter()
-    if recording_settings.get("video_segmented"):
-        result = calculate_metrics_over_frames(measurements, graph_settings, output_data)
-        if result:
-            for key in result:
-                ax = axes[key]
-                metric = metric_to_class_key[key]
-                for feature in ["Arc Flash", "Solidification Pool", "Welding Wire"]:
-                    x_data = output_data[key]["Graph Frame Index"]
-                    y_data = output_data[key][feature]
-
-                    if feature == "Solidification Pool":
-                        feature = "Solidification Zone"
-
-                    desired_value = int(class_values[str(material_selection)][feature][metric]["value"])
-                    tol_pos = int(class_values[str(material_selection)][feature][metric]["pos_tolerance"])
-                    tol_neg = int(class_values[str(material_selection)][feature][metric]["neg_tolerance"])
-
-                    if segmentation_settings.get("compare_values"):
-                        for i, y in enumerate(y_data):
-                            if y > desired_value + tol_pos or y < desired_value - tol_neg:
-                                detail = (
-                                    f"{feature} - {metric} out of tolerance at frame {i} "
-                                    f"(Value: {y}, Expected: {desired_value} ±{tol_neg}/{tol_pos})"
-                                )
-                                print(f"[Tolerance Violation] {detail}")
-                                update_camera_status(big_status_display,"tolerance_error", detail)
-
-                    plot_feature_on_axes(
-                        ax, feature, x_data, y_data,
-                        desired_value, tol_pos, tol_neg, key
+def metrics_worker(item):
+    """Metrics stage: aggregate measurements, check tolerances and queue a chart redraw."""
+    result = calculate_metrics_over_frames(item["measurements"], graph_settings, output_data, item["travel_distance"])
+    if not result:
+        return
+    source = item.get("segmentation_source", "inferred")
+
+    chart_updates = {}
+    for key in result:
+        metric = metric_to_class_key[key]
+        for feature in ["Arc Flash", "Solidification Pool", "Welding Wire"]:
+            # Copy so the Tk thread never plots a list that is still growing
+            x_data = list(output_data[key][chart_x_key()])
+            y_data = list(output_data[key][feature])
+
+            if feature == "Solidification Pool":
+                feature = "Solidification Zone"
+
+            desired_value = int(class_values[str(material_selection)][feature][metric]["value"])
+            tol_pos = int(class_values[str(material_selection)][feature][metric]["pos_tolerance"])
+            tol_neg = int(class_values[str(material_selection)][feature][metric]["neg_tolerance"])
+
+            # Earlier points were already checked when they were appended
+            if segmentation_settings.get("compare_values") and y_data:
+                i, y = len(y_data) - 1, y_data[-1]
+                if y > desired_value + tol_pos or y < desired_value - tol_neg:
+                    detail = (
+                        f"{feature} - {metric} out of tolerance at frame {i} "
+                        f"(Value: {y}, Expected: {desired_value} ±{tol_neg}/{tol_pos})"
                     )
-                canvases[key].draw()
-
-    t_plot = time.perf_counter()
-
-    # --- Print step durations ---
-    print(f"[Timing] RSI check:              {(t_cam_check - t_start):.4f} s")
-    print(f"[Timing] Exposure config:        {(t_exposure - t_cam_check):.4f} s")
-    print(f"[Timing] Frame grab:             {(t_grab - t_exposure):.4f} s")
-    print(f"[Timing] Annotation:             {(t_annotation - t_grab):.4f} s")
-    print(f"[Timing] Segmentation + masks:   {(t_segmentation - t_annotation):.4f} s")
-    print(f"[Timing] RSI post check:         {(t_rsi - t_segmentation):.4f} s")
-    print(f"[Timing] Metric calc + plotting: {(t_plot - t_rsi):.4f} s")
-    print(f"[Timing] Total video_acquiring:  {(t_plot - t_start):.4f} s\n")
+                    # Tracked values are estimates: log them, but only a segmented frame raises the alarm
+                    if source == "propagated":
+                        print(f"[Tolerance Violation, propagated] {detail}")
+                    else:
+                        print(f"[Tolerance Violation] {detail}")
+                        post_camera_status("tolerance_error", detail)
+
+            chart_updates.setdefault(key, []).append(
+                (feature, x_data, y_data, desired_value, tol_pos, tol_neg)
+            )
 
-    return raw_image, annotated_image, segmented_image, measurements, exposure_time
+    window.after(0, update_metric_charts, chart_updates)
+
+def chart_x_key():
+    """output_data column used for the chart x axis."""
+    if graph_settings.get("x_axis") == "Travel Distance":
+        return "Graph Travel Distance"
+    return "Graph Frame Index"
+
+def chart_x_label():
+    if graph_settings.get("x_axis") == "Travel Distance":
+        return "Travel Distance (mm)"
+    return "Frame Index"
+
+def update_metric_charts(chart_updates):
+    """Redraw the charts for the metrics that produced a new point (Tk thread)."""
+    for key, features in chart_updates.items():
+        if key not in axes:
+            continue  # Chart not shown
+        for feature, x_data, y_data, desired_value, tol_pos, tol_neg in features:
+            plot_feature_on_axes(
+                axes[key], feature, x_data, y_data,
+                desired_value, tol_pos, tol_neg, key
+            )
+        canvases[key].draw_idle()
 
 
 
@@ -1431,11 +1947,8 @@ def establish_preview_frames(recording_settings):
                 preview_col += 1
                 i += 1
 
-def draw_video_previews_from_frames(recording_settings, frame_dict):
-    """Update existing preview frames with new images, resized based on number of active previews."""
-    if not preview_frames:
-        establish_preview_frames(recording_settings)
-    
+def prepare_video_previews(recording_settings, frame_dict):
+    """Convert frames to PIL images resized based on number of active previews."""
     # Determine how many previews are being shown
     
     active_keys = [key for key in ["video_raw", "video_annotated", "video_segmented"]
@@ -1443,7 +1956,7 @@ def draw_video_previews_from_frames(recording_settings, frame_dict):
     
     num_previews = len(active_keys)
     if num_previews == 0:
-        return
+        return {}
 
     # Base total preview area (you can adjust these)
     max_width = 2000
@@ -1453,6 +1966,7 @@ def draw_video_previews_from_frames(recording_settings, frame_dict):
     preview_width = max_width // num_previews
     preview_height = int(max_height * 0.5)  # adjust height proportionally
 
+    preview_images = {}
     for key in active_keys:
         try:
             frame = frame_dict[key]
@@ -1460,13 +1974,25 @@ def draw_video_previews_from_frames(recording_settings, frame_dict):
                 frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 img_pil = Image.fromarray(frame_rgb)
 
-                img_pil = img_pil.resize((preview_width, preview_height))
+                preview_images[key] = img_pil.resize((preview_width, preview_height))
+        except Exception as e:
+            print(f"Error preparing preview for {key}:", e)
 
+    return preview_images
+
+def draw_video_previews_from_frames(recording_settings, preview_images):
+    """Update existing preview frames with already resized images."""
+    if not preview_frames:
+        establish_preview_frames(recording_settings)
+
+    for key, img_pil in preview_images.items():
+        try:
+            if key in preview_labels:
                 # Update existing label with resized image
                 ctk_img = ctk.CTkImage(
                     light_image=img_pil,
                     dark_image=img_pil,
-                    size=(preview_width, preview_height)
+                    size=img_pil.size
                 )
                 preview_labels[key].configure(image=ctk_img)
                 preview_labels[key].image = ctk_img  # Prevent garbage collection
@@ -1642,7 +2168,7 @@ def render_charts():
 
             # Set title and labels ONCE
             ax.set_title("X Average")
-            ax.set_xlabel("Frame Index")
+            ax.set_xlabel(chart_x_label())
             ax.set_ylabel("Pixel Value")
 
             # Now call plot_feature_on_axes without title/xlabel/ylabel every time
@@ -1678,7 +2204,7 @@ def render_charts():
             
             # Set title and labels ONCE
             ax.set_title("X Maximum")
-            ax.set_xlabel("Frame Index")
+            ax.set_xlabel(chart_x_label())
             ax.set_ylabel("Pixel Value")
 
             
@@ -1715,7 +2241,7 @@ def render_charts():
             x_minimum_frame.grid(row=1,column=column_index, sticky = "w", padx=10, pady=5)
             # Set title and labels ONCE
             ax.set_title("X Minimum")
-            ax.set_xlabel("Frame Index")
+            ax.set_xlabel(chart_x_label())
             ax.set_ylabel("Pixel Value")
 
             
@@ -1761,7 +2287,7 @@ def render_charts():
             y_average_frame.grid(row=1,column=column_index, sticky = "w", padx=10, pady=5)
             # Set title and labels ONCE
             ax.set_title("Y Average")
-            ax.set_xlabel("Frame Index")
+            ax.set_xlabel(chart_x_label())
             ax.set_ylabel("Pixel Value")
 
             
@@ -1798,7 +2324,7 @@ def render_charts():
             y_maximum_frame.grid(row=1,column=column_index, sticky = "w", padx=10, pady=5)
             # Set title and labels ONCE
             ax.set_title("Y Maximum")
-            ax.set_xlabel("Frame Index")
+            ax.set_xlabel(chart_x_label())
             ax.set_ylabel("Pixel Value")
 
             
@@ -1833,7 +2359,7 @@ def render_charts():
             y_minimum_frame = ctk.CTkFrame(y_position_frame)
             y_minimum_frame.grid(row=1,column=column_index, sticky = "w", padx=10, pady=5)
             ax.set_title("Y Minimum")
-            ax.set_xlabel("Frame Index")
+            ax.set_xlabel(chart_x_label())
             ax.set_ylabel("Pixel Value")
 
             
@@ -1875,7 +2401,7 @@ def render_charts():
             x_avg_std_dev_frame = ctk.CTkFrame(position_std_frame)
             x_avg_std_dev_frame.grid(row=1,column=column_index, sticky = "w", padx=10, pady=5)
             ax.set_title("X Average Standard Deviation")
-            ax.set_xlabel("Frame Index")
+            ax.set_xlabel(chart_x_label())
             ax.set_ylabel("Pixel Value")
 
             
@@ -1910,7 +2436,7 @@ def render_charts():
             y_avg_std_dev_frame = ctk.CTkFrame(position_std_frame)
             y_avg_std_dev_frame.grid(row=1,column=column_index, sticky = "w", padx=10, pady=5)
             ax.set_title("Y Average Standard Deviation")
-            ax.set_xlabel("Frame Index")
+            ax.set_xlabel(chart_x_label())
             ax.set_ylabel("Pixel Value")
 
             
@@ -1953,7 +2479,7 @@ def render_charts():
             class_area_sub_frame = ctk.CTkFrame(class_area_frame)
             class_area_sub_frame.grid(row=1,column=column_index, sticky = "w", padx=10, pady=5)
             ax.set_title("Class Area")
-            ax.set_xlabel("Frame Index")
+            ax.set_xlabel(chart_x_label())
             ax.set_ylabel("Pixel Value")
 
             
@@ -1989,7 +2515,7 @@ def render_charts():
             class_std_dev_sub_frame = ctk.CTkFrame(class_area_frame)
             class_std_dev_sub_frame.grid(row=1,column=column_index, sticky = "w", padx=10, pady=5)
             ax.set_title("Class Area Standard Deviation")
-            ax.set_xlabel("Frame Index")
+            ax.set_xlabel(chart_x_label())
             ax.set_ylabel("Pixel Value")
 
             
@@ -2036,16 +2562,8 @@ render_charts()
     
 
 
-def detect_basler_camera():
-    try:
-        tl_factory = pylon.TlFactory.GetInstance()
-        devices = tl_factory.EnumerateDevices()
-        return devices[0] if devices else None
-    except Exception as e:
-        print(f"Error detecting camera: {e}")
-        return None
-
 def update_status_loop(label):
+    """Connect to the camera selected in the recording settings (Basler or replay)."""
     global cam, camera
     connected_once = False
 
@@ -2053,25 +2571,21 @@ def update_status_loop(label):
         # Show "Attempting to connect"
         label.after(0, lambda: label.configure(text="Attempting to connect", text_color="yellow"))
 
-        device = detect_basler_camera()
+        cam_obj = create_camera(recording_settings)
 
-        if device:
+        if cam_obj:
             try:
-                cam_obj = pylon.InstantCamera(pylon.TlFactory.GetInstance().CreateDevice(device))
-                cam_obj.Open()
+                cam_obj.open()
                 camera = cam_obj  # Store for later use
-                # camera.AcquisitionFrameRateEnable.SetValue(True)
-                
-                # camera.AcquisitionFrameRate.SetValue(20.0)
                 connected_once = True
 
                 # Update label to Connected
-                label.after(0, lambda: label.configure(text="Connected", text_color="green"))
+                label.after(0, lambda: label.configure(text=f"Connected ({camera.model_name})", text_color="green"))
 
                 with cam_lock:
                     cam = 1
 
-                print(f"✅ Camera connected: {camera.GetDeviceInfo().GetModelName()}")
+                print(f"✅ Camera connected: {camera.model_name}")
             except Exception as e:
                 print(f"❌ Failed to open camera: {e}")
                 label.after(0, lambda: label.configure(text="Disconnected", text_color="red"))
@@ -2084,6 +2598,20 @@ def update_status_loop(label):
 
         if not connected_once:
             time.sleep(2)
+
+def reconnect_camera():
+    """Drop the current camera and connect to whatever the settings now select."""
+    global camera
+    if is_recording:
+        print("Camera source changes take effect after the current recording stops.")
+        return
+    if camera is not None:
+        try:
+            camera.close()
+        except Exception as e:
+            print(f"Error closing camera: {e}")
+        camera = None
+    threading.Thread(target=update_status_loop, args=(big_camera_display,), daemon=True).start()
     
 
 thread = threading.Thread(target=update_status_loop, args=(big_camera_display,), daemon=True)
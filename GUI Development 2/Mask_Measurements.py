@@ -0,0 +1,114 @@
+import cv2
+import torch
+from Inference_Input import boxes_to_image
+
+
+def mask_pixel_spans(mask_size, image_size, scale, offset, device):
+    """Image pixels covered by each mask pixel under nearest-neighbour sampling.
+
+    Image pixel X samples mask pixel floor(X * scale + offset), so mask pixel j
+    covers image pixels [starts[j], starts[j] + spans[j]). Pixels in the
+    letterbox padding cover nothing.
+    """
+    edges = torch.arange(mask_size + 1, device=device, dtype=torch.float64)
+    starts = torch.ceil((edges - offset) / scale).clamp(min=0, max=image_size).long()
+    return starts[:-1], starts[1:] - starts[:-1]
+
+
+def measure_masks(results, image_size, transform, input_size, class_names, need_masks, letterbox):
+    """Dense measurement path: per-class measurements, largest masks and boxes of one frame's Results.
+
+    Measurements are taken at the model's mask resolution and mapped to image
+    pixels analytically (mask_pixel_spans), for every instance at once. Only
+    the largest mask of each class is upsampled to the frame, and only when
+    need_masks is set. letterbox is the LetterboxInput the frame went through.
+    Returns (measurements, largest_masks, largest_boxes) in frame pixels.
+    """
+    orig_H, orig_W = image_size
+    letterbox_scale, pad_x, pad_y = transform
+
+    # Initialize data structures
+    data = {name: {
+        'area': None,
+        'x_min': None,
+        'x_max': None,
+        'y_min': None,
+        'y_max': None,
+        'width': None,
+        'height': None
+    } for name in class_names}
+
+    largest_masks = {i: None for i in range(len(class_names))}
+    largest_boxes = {i: None for i in range(len(class_names))}
+    largest_areas = {i: 0 for i in range(len(class_names))}
+
+    if hasattr(results, 'masks') and results.masks is not None:
+        masks = results.masks.data
+        boxes = results.boxes.data
+        mask_H, mask_W = masks.shape[1:]
+
+        # Image rows/columns each mask row/column stands for, through the letterbox
+        row_starts, row_heights = mask_pixel_spans(
+            mask_H, orig_H, letterbox_scale * mask_H / input_size, pad_y * mask_H / input_size, masks.device)
+        col_starts, col_widths = mask_pixel_spans(
+            mask_W, orig_W, letterbox_scale * mask_W / input_size, pad_x * mask_W / input_size, masks.device)
+
+        # Statistics for every instance at once: (N, H, W) -> (N,)
+        binary_masks = masks > 0.5
+        rows = binary_masks.any(dim=2)
+        cols = binary_masks.any(dim=1)
+        # Exact pixel count of each mask once upsampled to the frame
+        areas = torch.einsum('nhw,h,w->n', binary_masks.double(), row_heights.double(), col_widths.double())
+        row_index = torch.arange(mask_H, device=masks.device)
+        col_index = torch.arange(mask_W, device=masks.device)
+        first_row = torch.where(rows, row_index, mask_H).amin(dim=1).clamp(max=mask_H - 1)
+        last_row = torch.where(rows, row_index, -1).amax(dim=1).clamp(min=0)
+        first_col = torch.where(cols, col_index, mask_W).amin(dim=1).clamp(max=mask_W - 1)
+        last_col = torch.where(cols, col_index, -1).amax(dim=1).clamp(min=0)
+
+        # Largest instance per class: scatter-max of the areas, first instance wins ties
+        classes = boxes[:, 5].long()
+        num_classes = len(class_names)
+        valid = (classes < num_classes) & (areas > 0)
+        classes = classes.clamp(max=num_classes - 1)
+        best_area = torch.zeros(num_classes, dtype=areas.dtype, device=areas.device)
+        best_area = best_area.scatter_reduce(0, classes[valid], areas[valid], reduce='amax')
+        is_best = valid & (areas == best_area[classes])
+        instance_index = torch.arange(len(areas), device=areas.device)
+        best_index = torch.full((num_classes,), len(areas), dtype=torch.long, device=areas.device)
+        best_index = best_index.scatter_reduce(0, classes[is_best], instance_index[is_best], reduce='amin')
+
+        # One transfer to the host for everything that is reported
+        stats = torch.stack([
+            areas.long(),
+            col_starts[first_col], col_starts[last_col] + col_widths[last_col] - 1,
+            row_starts[first_row], row_starts[last_row] + row_heights[last_row] - 1,
+        ], dim=1)
+        found = best_index < len(areas)
+        winners = best_index[found]
+        winner_stats = stats[winners].cpu().tolist()
+        winner_boxes = boxes_to_image(boxes[winners].detach().cpu(), (letterbox_scale, pad_x, pad_y))
+        largest_indices = {}
+        for cls, i, (area, x_min, x_max, y_min, y_max), box in zip(
+                torch.nonzero(found).squeeze(1).tolist(), winners.tolist(), winner_stats, winner_boxes):
+            largest_indices[cls] = i
+            largest_areas[cls] = area
+            largest_boxes[cls] = box
+            data[class_names[cls]].update({
+                'area': area,
+                'x_min': x_min,
+                'x_max': x_max,
+                'y_min': y_min,
+                'y_max': y_max,
+                'width': x_max - x_min,
+                'height': y_max - y_min
+            })
+
+        if need_masks:
+            # Cut the letterbox padding off before scaling back to the frame
+            y0, y1, x0, x1 = letterbox.content_region((mask_H, mask_W))
+            for cls, i in largest_indices.items():
+                small_mask = (masks[i, y0:y1, x0:x1] > 0.5).to(torch.uint8).cpu().numpy()
+                largest_masks[cls] = cv2.resize(small_mask, (orig_W, orig_H), interpolation=cv2.INTER_NEAREST)
+
+    return data, largest_masks, largest_boxes
@@ -0,0 +1,51 @@
+import threading
+import time
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+
+class MeasurementWorkbook:
+    """Streams one measurement row per frame into a write-only workbook for a whole recording.
+
+    openpyxl's write-only mode serialises each appended row straight to a
+    temporary file instead of keeping cells in memory, so memory stays flat
+    and every row costs the same however long the recording runs. The .xlsx
+    file itself is written once, by close().
+    """
+
+    def __init__(self, path, columns, sheet_title="Measurements"):
+        self.path = path
+        self.columns = list(columns)
+        self.lock = threading.Lock()
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(sheet_title)
+        header = []
+        for key in self.columns:
+            cell = WriteOnlyCell(self.sheet, value=key)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        self.sheet.append(header)
+        self.row_count = 0
+
+    def append(self, row_data):
+        """Add a row from a {column: value} dict; columns it lacks stay blank."""
+        with self.lock:
+            if self.workbook is None:
+                return
+            self.sheet.append([row_data.get(key, "") for key in self.columns])
+            self.row_count += 1
+
+    def close(self):
+        with self.lock:
+            if self.workbook is None:
+                return
+            workbook, self.workbook = self.workbook, None
+        t0 = time.perf_counter()
+        try:
+            workbook.save(self.path)
+        except Exception as e:
+            print(f"❌ Error saving {self.path}: {e}")
+            return
+        print(f"Measurement workbook: {self.row_count} rows written to {self.path} "
+              f"in {time.perf_counter() - t0:.1f} s")
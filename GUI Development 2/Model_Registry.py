@@ -0,0 +1,247 @@
+import os
+import statistics
+import threading
+import time
+import torch
+from ultralytics import YOLO
+
+
+class ModelRegistry:
+    """Loads each segmentation weights file once and keeps it ready for inference.
+
+    Models are cached by (absolute path, modification time), so reselecting a
+    file is free and retraining into the same path is picked up. PyTorch
+    weights are moved to the device and have their precision (FP16 on CUDA)
+    fixed once, and are fused (conv + batch norm) and optionally compiled
+    with torch.compile; ONNX and OpenVINO exports load through the same YOLO
+    wrapper in FP32 at their export imgsz. Every model is warmed up with
+    dummy inputs at its real input size (plus every batch size in
+    warmup_batch_sizes and extra input size in warmup_imgsz) before it is
+    used, and the first (cold-start) and settled (steady-state) latencies
+    are kept in self.latency. load_async() does all of this on a background
+    thread and only then swaps the active model, so the GUI and the
+    segmentation stage never wait on a load.
+    """
+
+    def __init__(self, device, half=None, compile_model=False, warmup_runs=5):
+        self.device = device
+        self.half = (device == "cuda") if half is None else half
+        self.compile_model = compile_model
+        self.warmup_runs = int(warmup_runs)
+        self.warmup_batch_sizes = (1,)
+        self.warmup_imgsz = ()  # Extra input sizes the model will also run at (crop inference)
+        self.unsupported_imgsz = {}  # path -> extra input sizes the model failed to run at
+        self.lock = threading.Lock()
+        self.cache = {}  # (path, mtime) -> model
+        self.load_locks = {}  # path -> lock held while that file is loaded and warmed up
+        self.latency = {}  # path -> {"load_s", "cold_ms", "steady_ms"}
+        self.active_key = None
+        self.active_model = None
+        self.loading_path = None
+        self.load_generation = 0  # Bumped by every load_async(); only the newest request may activate
+
+    @staticmethod
+    def cache_key(path):
+        path = os.path.abspath(path)
+        return path, os.path.getmtime(path)
+
+    def get(self, path, imgsz=None):
+        """Return the model for a weights file or export, loading and warming it up on first use."""
+        key = self.cache_key(path)
+        with self.lock:
+            model = self.cache.get(key)
+            load_lock = self.load_locks.setdefault(key[0], threading.Lock())
+        if model is not None:
+            return model
+
+        # Concurrent calls for the same file (load_async and a worker) wait for one load instead of each doing it
+        with load_lock:
+            with self.lock:
+                model = self.cache.get(key)
+            if model is not None:
+                return model
+            return self._load(key, imgsz)
+
+    def _load(self, key, imgsz):
+        """Build, warm up and cache one model; called with that file's load lock held."""
+        t0 = time.perf_counter()
+        if key[0].endswith(".pt"):
+            model = YOLO(key[0])
+            model.fuse()
+            model.to(self.device)
+            model.eval()
+            # The predictor reads this once when it is built by the warm-up below
+            model.overrides["half"] = self.half
+        else:
+            # Exported models have a fixed input shape and run in the precision they were exported with
+            model = YOLO(key[0], task="segment")
+            model.overrides["half"] = False
+            model.overrides["device"] = self.device
+            if imgsz is not None:
+                model.overrides["imgsz"] = int(imgsz)
+        cold_ms, steady_ms, failed_imgsz = self.warm_up(model)
+        self.unsupported_imgsz[key[0]] = failed_imgsz
+        load_s = time.perf_counter() - t0
+        self.latency[key[0]] = {"load_s": load_s, "cold_ms": cold_ms, "steady_ms": steady_ms}
+        print(f"✅ Loaded {os.path.basename(key[0])} on {self.device} in {load_s:.2f} s "
+              f"(cold start {cold_ms:.0f} ms, steady state {steady_ms:.1f} ms)")
+
+        with self.lock:
+            # Drop older versions of the same file
+            for old_key in [k for k in self.cache if k[0] == key[0] and k != key]:
+                del self.cache[old_key]
+            self.cache[key] = model
+        return model
+
+    @staticmethod
+    def input_size(model):
+        """Square input size the model was trained or exported at (its imgsz), 640 if unknown."""
+        args = getattr(model.model, "args", None)
+        if isinstance(args, dict):
+            imgsz = args.get("imgsz", 640)
+        else:
+            imgsz = model.overrides.get("imgsz", 640)
+        if isinstance(imgsz, (list, tuple)):
+            imgsz = max(imgsz)
+        return int(imgsz)
+
+    def warm_up(self, model):
+        """Run dummy inferences so the first real frame doesn't pay for lazy initialisation.
+
+        The first call builds the predictor and picks the kernels; with
+        compile_model the network is compiled after that and warmed again.
+        The extra batch sizes and input sizes are optional: a model that can't
+        run them (e.g. a fixed-shape export) is logged and still loads.
+        Returns (cold-start ms, steady-state ms) for a single frame and the set
+        of warmup_imgsz sizes that failed.
+        """
+        size = self.input_size(model)
+        dtype = torch.float16 if model.overrides.get("half") else torch.float32
+        batch_sizes = sorted(set((1,) + tuple(int(b) for b in self.warmup_batch_sizes)))
+        dummies = {b: torch.full((b, 3, size, size), 114 / 255, dtype=dtype, device=self.device) for b in batch_sizes}
+
+        with torch.no_grad():
+            cold_ms = self._timed_inference(model, dummies[1])
+            if self.compile_model and isinstance(getattr(model.predictor.model, "model", None), torch.nn.Module):
+                try:
+                    model.predictor.model.model = torch.compile(model.predictor.model.model)
+                    cold_ms += self._timed_inference(model, dummies[1])
+                except Exception as e:
+                    print(f"⚠️ torch.compile failed, running uncompiled: {e}")
+            for batch in batch_sizes[1:]:
+                try:
+                    self._timed_inference(model, dummies[batch])
+                except Exception as e:
+                    print(f"⚠️ Model can't run batch size {batch}, batched segmentation will fail: {e}")
+            failed_imgsz = set()
+            for extra_size in (int(s) for s in self.warmup_imgsz):
+                if extra_size == size:
+                    continue
+                extra = torch.full((1, 3, extra_size, extra_size), 114 / 255, dtype=dtype, device=self.device)
+                try:
+                    self._timed_inference(model, extra)
+                except Exception as e:
+                    print(f"⚠️ Model can't run at imgsz {extra_size}, crop inference is off for it: {e}")
+                    failed_imgsz.add(extra_size)
+            steady = [self._timed_inference(model, dummies[1]) for _ in range(max(self.warmup_runs, 1))]
+        return cold_ms, statistics.median(steady), failed_imgsz
+
+    def _timed_inference(self, model, dummy):
+        if self.device == "cuda":
+            torch.cuda.synchronize()
+        t0 = time.perf_counter()
+        model(dummy, verbose=False)
+        if self.device == "cuda":
+            torch.cuda.synchronize()
+        return (time.perf_counter() - t0) * 1000
+
+    def format_status(self):
+        """One line for the status panel: whether the active model is ready and how fast it is."""
+        with self.lock:
+            active_key = self.active_key
+            loading_path = self.loading_path
+        if loading_path is not None:
+            return f"Segmentation model: warming up {os.path.basename(loading_path)}..."
+        if active_key is None:
+            return "Segmentation model: not loaded"
+        latency = self.latency.get(active_key[0])
+        if latency is None:
+            return f"Segmentation model: {os.path.basename(active_key[0])} ready"
+        return (f"Segmentation model: {os.path.basename(active_key[0])} ready, "
+                f"cold start {latency['cold_ms']:.0f} ms, steady state {latency['steady_ms']:.1f} ms")
+
+    def set_compile(self, compile_model):
+        """Switch torch.compile on or off; cached PyTorch models are rebuilt on their next load."""
+        compile_model = bool(compile_model)
+        if compile_model == self.compile_model:
+            return
+        self.compile_model = compile_model
+        with self.lock:
+            for key in [k for k in self.cache if k[0].endswith(".pt")]:
+                del self.cache[key]
+            self.active_key = None  # The current model keeps serving until the reload finishes
+
+    def load(self, path, imgsz=None):
+        """Load a weights file or export and make it the active model (blocking)."""
+        model = self.get(path, imgsz)
+        with self.lock:
+            self.active_key = self.cache_key(path)
+            self.active_model = model
+        return model
+
+    def load_async(self, path, on_ready=None, imgsz=None):
+        """Switch the active model in the background; the old one keeps serving until then."""
+        try:
+            key = self.cache_key(path)
+        except OSError as e:
+            print(f"❌ Segmentation model not found: {e}")
+            return
+        with self.lock:
+            if self.loading_path == path:
+                return  # Already on its way
+            # Whatever was loading before is no longer wanted
+            self.load_generation += 1
+            generation = self.load_generation
+            if key == self.active_key:
+                self.loading_path = None
+                return
+            self.loading_path = path
+
+        def worker():
+            try:
+                model = self.get(path, imgsz)
+                with self.lock:
+                    if generation != self.load_generation:
+                        return  # Superseded by a newer request: the model stays cached but isn't activated
+                    self.active_key = key
+                    self.active_model = model
+                if on_ready is not None:
+                    on_ready(model)
+            except Exception as e:
+                print(f"❌ Error loading segmentation model {path}: {e}")
+            finally:
+                with self.lock:
+                    # Only the newest request reports the load as finished
+                    if generation == self.load_generation and self.loading_path == path:
+                        self.loading_path = None
+
+        threading.Thread(target=worker, name="model-loader", daemon=True).start()
+
+    def supports_imgsz(self, imgsz):
+        """False if the active model failed its warm-up at this extra input size."""
+        with self.lock:
+            active_key = self.active_key
+        if active_key is None:
+            return True
+        return int(imgsz) not in self.unsupported_imgsz.get(active_key[0], ())
+
+    def mark_unsupported_imgsz(self, imgsz):
+        """Record that the active model can't run at this extra input size."""
+        with self.lock:
+            if self.active_key is not None:
+                self.unsupported_imgsz.setdefault(self.active_key[0], set()).add(int(imgsz))
+
+    def active(self):
+        """The model to run inference with right now, or None while the first load is still running."""
+        with self.lock:
+            return self.active_model
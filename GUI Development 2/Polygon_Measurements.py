@@ -0,0 +1,237 @@
+import struct
+import threading
+import numpy as np
+import cv2
+
+MEASUREMENT_MODES = ("Dense", "Polygon")
+
+# File layout: POLYGON_FILE_MAGIC, then one record per frame:
+#   uint32 frame index, uint16 polygon count, then per polygon
+#   uint8 class, uint32 point count, int16 x/y pairs in image pixels
+POLYGON_FILE_MAGIC = b"POLYREC1"
+POLYGON_FRAME_HEADER = struct.Struct("<IH")
+POLYGON_HEADER = struct.Struct("<BI")
+
+
+def polygon_stats(points):
+    """Area (shoelace), extents and centroid of one closed polygon given as an (N, 2) array."""
+    x = points[:, 0].astype(np.float64)
+    y = points[:, 1].astype(np.float64)
+    x_next = np.roll(x, -1)
+    y_next = np.roll(y, -1)
+    cross = x * y_next - x_next * y
+    signed_area = cross.sum() / 2.0
+    if abs(signed_area) > 1e-9:
+        centroid_x = ((x + x_next) * cross).sum() / (6.0 * signed_area)
+        centroid_y = ((y + y_next) * cross).sum() / (6.0 * signed_area)
+    else:
+        # Degenerate outline (a line or a point): fall back to the vertex mean
+        centroid_x, centroid_y = x.mean(), y.mean()
+    return {
+        "area": abs(signed_area),
+        "x_min": x.min(),
+        "x_max": x.max(),
+        "y_min": y.min(),
+        "y_max": y.max(),
+        "centroid_x": centroid_x,
+        "centroid_y": centroid_y,
+    }
+
+
+def polygons_to_image(polygons, transform, image_size):
+    """Map outlines from letterboxed input coordinates back into the frame, clipped to it."""
+    scale, pad_x, pad_y = transform
+    height, width = image_size
+    mapped = []
+    for points in polygons:
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        points = (points - (pad_x, pad_y)) / scale
+        np.clip(points[:, 0], 0, width - 1, out=points[:, 0])
+        np.clip(points[:, 1], 0, height - 1, out=points[:, 1])
+        mapped.append(points)
+    return mapped
+
+
+def measure_polygons(results, transform, image_size, class_names):
+    """Per-class measurements of the largest instance, taken from the mask outlines (results.masks.xy).
+
+    Returns (data, largest_polygons, polygons): data has the same keys as the
+    dense path plus centroid_x / centroid_y, largest_polygons maps class index
+    to the outline of the measured instance, and polygons lists
+    (class index, outline) for every instance in frame coordinates.
+    """
+    data = {name: {
+        'area': None,
+        'x_min': None,
+        'x_max': None,
+        'y_min': None,
+        'y_max': None,
+        'width': None,
+        'height': None,
+        'centroid_x': None,
+        'centroid_y': None,
+    } for name in class_names}
+    largest_polygons = {}
+    polygons = []
+    if results.masks is None or results.boxes is None or len(results.boxes) == 0:
+        return data, largest_polygons, polygons
+
+    largest_areas = {}
+    outlines = polygons_to_image(results.masks.xy, transform, image_size)
+    for cls, points in zip(results.boxes.cls.long().cpu().tolist(), outlines):
+        if cls >= len(class_names) or len(points) < 3:
+            continue
+        polygons.append((cls, points))
+        stats = polygon_stats(points)
+        if stats["area"] <= largest_areas.get(cls, 0):
+            continue
+        largest_areas[cls] = stats["area"]
+        largest_polygons[cls] = points
+        x_min, x_max = int(round(stats["x_min"])), int(round(stats["x_max"]))
+        y_min, y_max = int(round(stats["y_min"])), int(round(stats["y_max"]))
+        data[class_names[cls]].update({
+            'area': int(round(stats["area"])),
+            'x_min': x_min,
+            'x_max': x_max,
+            'y_min': y_min,
+            'y_max': y_max,
+            'width': x_max - x_min,
+            'height': y_max - y_min,
+            'centroid_x': round(float(stats["centroid_x"]), 1),
+            'centroid_y': round(float(stats["centroid_y"]), 1),
+        })
+    return data, largest_polygons, polygons
+
+
+def polygon_mask(points, image_size):
+    """Filled uint8 mask of one outline, for the segmented preview."""
+    mask = np.zeros(image_size, dtype=np.uint8)
+    cv2.fillPoly(mask, [np.round(points).astype(np.int32)], 1)
+    return mask
+
+
+class PolygonRecorder:
+    """Appends each frame's instance outlines to a compact binary file (int16 pixel coordinates)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(POLYGON_FILE_MAGIC)
+        self.lock = threading.Lock()
+        self.frame_count = 0
+
+    def write(self, frame_index, polygons):
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(POLYGON_FRAME_HEADER.pack(frame_index, len(polygons)))
+            for cls, points in polygons:
+                coords = np.round(points).astype("<i2")
+                self.file.write(POLYGON_HEADER.pack(cls, len(coords)))
+                self.file.write(coords.tobytes())
+            self.frame_count += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+        print(f"Polygon recorder: {self.frame_count} frames written to {self.path}")
+
+
+def read_polygon_recording(path):
+    """Return {frame index: [(class index, (N, 2) int16 outline), ...]} from a PolygonRecorder file.
+
+    A frame record cut short (recording killed mid-write) ends the read;
+    every complete frame before it is returned.
+    """
+    frames = {}
+    with open(path, "rb") as f:
+        if f.read(len(POLYGON_FILE_MAGIC)) != POLYGON_FILE_MAGIC:
+            raise ValueError(f"{path} is not a polygon recording")
+        while True:
+            header = f.read(POLYGON_FRAME_HEADER.size)
+            if len(header) < POLYGON_FRAME_HEADER.size:
+                break
+            frame_index, count = POLYGON_FRAME_HEADER.unpack(header)
+            polygons = []
+            for _ in range(count):
+                header = f.read(POLYGON_HEADER.size)
+                if len(header) < POLYGON_HEADER.size:
+                    return frames  # Truncated last record
+                cls, points = POLYGON_HEADER.unpack(header)
+                data = f.read(points * 4)
+                if len(data) < points * 4:
+                    return frames
+                polygons.append((cls, np.frombuffer(data, dtype="<i2").reshape(-1, 2)))
+            frames[frame_index] = polygons
+    return frames
+
+
+def parity_benchmark(registry, model_path, frame_paths, imgsz=640):
+    """Compare the polygon path with the app's dense path (Mask_Measurements) on recorded frames.
+
+    Both run on the same Results; reports measurement time and how far the
+    polygon areas and box edges are from the dense ones.
+    """
+    import time
+    import torch
+    from Inference_Backends import load_frame
+    from Inference_Input import LetterboxInput
+    from Mask_Measurements import measure_masks
+
+    model = registry.get(model_path, imgsz=imgsz)
+    class_names = [model.names[i] for i in sorted(model.names)]
+    letterbox = LetterboxInput(imgsz, registry.device, model.overrides.get("half", False))
+    timings = {"dense": [], "polygon": []}
+    errors = {"area_pct": [], "box_px": []}
+    with torch.no_grad():
+        for path in frame_paths:
+            frame = load_frame(path)
+            if frame is None:
+                continue
+            tensor, transform = letterbox.prepare(frame)
+            results = model(tensor, verbose=False)[0]
+            image_size = frame.shape[:2]
+
+            # need_masks off, as in a run without segmented images or video
+            t0 = time.perf_counter()
+            dense, _, _ = measure_masks(results, image_size, transform, imgsz, class_names, False, letterbox)
+            t1 = time.perf_counter()
+            polygon, _, _ = measure_polygons(results, transform, image_size, class_names)
+            t2 = time.perf_counter()
+            timings["dense"].append((t1 - t0) * 1000)
+            timings["polygon"].append((t2 - t1) * 1000)
+
+            for name, reference in dense.items():
+                measured = polygon[name]
+                if not reference["area"] or measured["area"] is None:
+                    continue
+                errors["area_pct"].append(abs(measured["area"] - reference["area"]) / reference["area"] * 100)
+                errors["box_px"].append(max(abs(measured[key] - reference[key])
+                                            for key in ("x_min", "x_max", "y_min", "y_max")))
+
+    def summary(values):
+        values = np.asarray(values) if values else np.zeros(1)
+        return float(np.mean(values)), float(np.percentile(values, 95))
+
+    return {name: summary(values) for name, values in {**timings, **errors}.items()}
+
+
+if __name__ == "__main__":
+    # python Polygon_Measurements.py <model> <recording folder> [imgsz]
+    import sys
+    import torch
+    from Inference_Backends import recorded_frames
+    from Model_Registry import ModelRegistry
+
+    model_path, folder = sys.argv[1], sys.argv[2]
+    imgsz = int(sys.argv[3]) if len(sys.argv) > 3 else 640
+    registry = ModelRegistry("cuda" if torch.cuda.is_available() else "cpu")
+    paths = recorded_frames(folder, limit=200)
+    report = parity_benchmark(registry, model_path, paths, imgsz)
+    print(f"{len(paths)} frames (mean / p95)")
+    print(f"Dense measurement:   {report['dense'][0]:.2f} / {report['dense'][1]:.2f} ms")
+    print(f"Polygon measurement: {report['polygon'][0]:.2f} / {report['polygon'][1]:.2f} ms")
+    print(f"Area difference:     {report['area_pct'][0]:.2f} / {report['area_pct'][1]:.2f} %")
+    print(f"Box edge difference: {report['box_px'][0]:.1f} / {report['box_px'][1]:.1f} px")
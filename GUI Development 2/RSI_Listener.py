@@ -0,0 +1,361 @@
+import socket
+import threading
+import time
+import xml.etree.ElementTree as ET
+import numpy as np
+
+RSI_CYCLE_S = 0.004  # KUKA RSI sends one packet every 4 ms
+RSI_MAX_PACKET = 2048
+
+# One decoded telegram. Missing tags are left as -1 (cam, ipoc) or NaN (pose).
+RSI_RECORD_DTYPE = np.dtype([
+    ("arrival", np.float64),  # time.perf_counter() when the datagram was read
+    ("ipoc", np.int64),
+    ("cam", np.int8),
+    ("x", np.float64), ("y", np.float64), ("z", np.float64),
+    ("a", np.float64), ("b", np.float64), ("c", np.float64),
+])
+POSE_AXES = ("X", "Y", "Z", "A", "B", "C")
+POSE_FIELDS = ("x", "y", "z", "a", "b", "c")
+DEFAULT_RSI_TAGS = ("CAM", "RIst", "IPOC")
+
+
+def parse_rsi_data(xml_data):
+    """Parses RSI XML data and extracts the CAM value (reference parser, see RSIParser)."""
+    try:
+        root = ET.fromstring(xml_data)
+        cam_value = int(root.find("CAM").text)  # Convert CAM to integer (0 or 1)
+        return cam_value
+    except Exception as e:
+        print(f"Error parsing XML: {e}")
+        return None
+
+
+class RSIRing:
+    """Preallocated ring of decoded RSI telegrams (RSI_RECORD_DTYPE).
+
+    Written by a single thread without the lock; readers use latest() and
+    pose_at(), which only hold the lock for a copy and never read the slot
+    the writer is filling.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = int(capacity)
+        self.records = np.zeros(self.capacity, dtype=RSI_RECORD_DTYPE)
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def next_index(self):
+        return self.count % self.capacity
+
+    def commit(self):
+        """Publish the record written at next_index()."""
+        with self.lock:
+            self.count += 1
+
+    def latest(self):
+        with self.lock:
+            if self.count == 0:
+                return None
+            return self.records[(self.count - 1) % self.capacity].copy()
+
+    def pose_at(self, t, max_gap=0.05):
+        """Robot pose at perf_counter time t, interpolated between the two telegrams around it.
+
+        Binary search over the ring in arrival order. Returns a dict with the
+        pose fields, "ipoc" and "rsi_age" (how far t is from the nearest
+        telegram), or None when no telegram lies within max_gap seconds of t.
+        """
+        with self.lock:
+            count = self.count
+            # The oldest slot may be overwritten by the writer at any moment, so skip it
+            first = max(count - self.capacity + 1, 0)
+            if count - first < 1:
+                return None
+            records = self.records
+            capacity = self.capacity
+            arrival = records["arrival"]
+
+            lo, hi = first, count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if arrival[mid % capacity] <= t:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            # lo is the first telegram that arrived after t
+            before = records[(lo - 1) % capacity].copy() if lo > first else None
+            after = records[lo % capacity].copy() if lo < count else None
+
+        if before is None or after is None:
+            nearest = before if before is not None else after
+            age = abs(t - nearest["arrival"])
+            if age > max_gap:
+                return None
+            pose = {field: float(nearest[field]) for field in POSE_FIELDS}
+            pose["ipoc"] = int(nearest["ipoc"])
+            pose["rsi_age"] = age
+            return pose
+
+        span = after["arrival"] - before["arrival"]
+        weight = (t - before["arrival"]) / span if span > 0 else 0.0
+        age = min(t - before["arrival"], after["arrival"] - t)
+        if age > max_gap:
+            return None
+        pose = {field: float(before[field] + weight * (after[field] - before[field])) for field in POSE_FIELDS}
+        pose["ipoc"] = int(round(before["ipoc"] + weight * (after["ipoc"] - before["ipoc"])))
+        pose["rsi_age"] = age
+        return pose
+
+
+class RSIParser:
+    """Byte-level decoder for the few tags we need from an RSI telegram.
+
+    Scans the raw datagram with bytes.find instead of building an XML tree
+    and writes the values straight into a record of an RSIRing. Only the
+    tags listed in `tags` are decoded.
+
+    This reduces per-packet allocation, it does not remove it: every decoded
+    number still costs a short bytes slice and the int/float made from it
+    (about a dozen small objects per telegram), since Python can't turn text
+    into a number any other way. No XML tree, dict or per-packet buffer is built.
+    """
+
+    def __init__(self, tags=DEFAULT_RSI_TAGS):
+        self.tags = tuple(tags)
+        self.want_cam = "CAM" in self.tags
+        self.want_pose = "RIst" in self.tags
+        self.want_ipoc = "IPOC" in self.tags
+        self.axis_keys = [(f' {axis}="'.encode(), axis.lower()) for axis in POSE_AXES]
+
+    @staticmethod
+    def _element_text(data, open_tag, end):
+        start = data.find(open_tag, 0, end)
+        if start < 0:
+            return None
+        start += len(open_tag)
+        stop = data.find(b"<", start, end)
+        if stop < 0:
+            return None
+        return data[start:stop]
+
+    def parse_into(self, data, nbytes, record):
+        """Decode data[:nbytes] into `record` (one element of RSIRing.records). Returns CAM or -1."""
+        cam = -1
+        if self.want_cam:
+            text = self._element_text(data, b"<CAM>", nbytes)
+            cam = int(text) if text else -1
+        record["cam"] = cam
+
+        ipoc = -1
+        if self.want_ipoc:
+            text = self._element_text(data, b"<IPOC>", nbytes)
+            ipoc = int(text) if text else -1
+        record["ipoc"] = ipoc
+
+        if self.want_pose:
+            element = data.find(b"<RIst", 0, nbytes)
+            element_end = data.find(b">", element, nbytes) if element >= 0 else -1
+            for key, field in self.axis_keys:
+                value = np.nan
+                if element_end >= 0:
+                    start = data.find(key, element, element_end)
+                    if start >= 0:
+                        start += len(key)
+                        value = float(data[start:data.find(b'"', start, element_end)])
+                record[field] = value
+        return cam
+
+
+class RSIListener:
+    """One long-lived UDP listener for the robot's RSI packets.
+
+    The socket is bound once and read on a background thread into a reused
+    buffer, and every telegram is decoded by RSIParser into an RSIRing, so
+    the robot pose history is kept alongside the CAM state. The latest CAM
+    value and its arrival time are always available, and CAM edges are
+    published as events so the recording can start and stop within one RSI
+    cycle without polling:
+
+      cam_high    - set while CAM is 1
+      cam_rising  - set on every 0 -> 1 edge, cleared by whoever consumes it
+      cam_falling - set on every 1 -> 0 edge, cleared by whoever consumes it
+    """
+
+    def __init__(self, ip, port, recv_timeout=0.1, tags=DEFAULT_RSI_TAGS, ring_capacity=4096):
+        self.ip = ip
+        self.port = int(port)
+        self.recv_timeout = recv_timeout
+        self.parser = RSIParser(tags)
+        self.ring = RSIRing(ring_capacity)
+        self.buffer = bytearray(RSI_MAX_PACKET)
+        self.recorder = None  # RSIRecorder that gets every raw datagram, if set
+        self.lock = threading.Lock()
+        self.cam = 0
+        self.last_arrival = None  # time.perf_counter() of the newest packet
+        self.packet_count = 0
+        self.cam_high = threading.Event()
+        self.cam_rising = threading.Event()
+        self.cam_falling = threading.Event()
+        self.running = False
+        self.thread = None
+        self.sock = None
+
+    def start(self):
+        if self.running:
+            return
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((self.ip, self.port))
+        self.sock.settimeout(self.recv_timeout)
+        self.running = True
+        self.thread = threading.Thread(target=self._listen, name="rsi-listener", daemon=True)
+        self.thread.start()
+        print(f"Listening on {self.ip}:{self.port}")
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def latest(self):
+        """Return (CAM value, arrival time) of the newest packet."""
+        with self.lock:
+            return self.cam, self.last_arrival
+
+    def _listen(self):
+        buffer = self.buffer
+        records = self.ring.records
+        while self.running:
+            try:
+                nbytes = self.sock.recv_into(buffer)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                if self.running:
+                    print(f"Error receiving data: {e}")
+                continue
+            arrival = time.perf_counter()
+            recorder = self.recorder
+            if recorder is not None:
+                recorder.write(arrival, buffer, nbytes)
+
+            record = records[self.ring.next_index()]
+            record["arrival"] = arrival
+            try:
+                new_cam = self.parser.parse_into(buffer, nbytes, record)
+            except ValueError as e:
+                print(f"Error parsing RSI packet: {e}")
+                continue
+            self.ring.commit()
+            if new_cam < 0:
+                new_cam = 0
+            with self.lock:
+                previous = self.cam
+                self.cam = new_cam
+                self.last_arrival = arrival
+                self.packet_count += 1
+
+            if new_cam == 1:
+                self.cam_high.set()
+                if previous != 1:
+                    self.cam_rising.set()
+            else:
+                self.cam_high.clear()
+                if previous == 1:
+                    self.cam_falling.set()
+
+
+class RSISender:
+    """Stand-in for the robot controller: sends CAM packets to a local listener."""
+
+    def __init__(self, ip="127.0.0.1", port=59152):
+        self.address = (ip, int(port))
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, cam, ipoc=0, pose=(0.0, 0.0, 0.0, 0.0, 0.0, 0.0)):
+        axes = " ".join(f'{axis}="{value:.4f}"' for axis, value in zip(POSE_AXES, pose))
+        packet = f'<Rob Type="KUKA"><RIst {axes} /><CAM>{int(cam)}</CAM><IPOC>{int(ipoc)}</IPOC></Rob>'
+        self.sock.sendto(packet.encode('utf-8'), self.address)
+
+    def run_weld(self, idle_s=1.0, weld_s=3.0, cycle_s=RSI_CYCLE_S, travel_speed=10.0):
+        """Send CAM 0, then CAM 1 for weld_s seconds, then CAM 0 again, at the RSI cycle rate.
+
+        The simulated torch moves along X at travel_speed mm/s while CAM is 1.
+        """
+        ipoc = 0
+        x = 0.0
+        for cam, duration in ((0, idle_s), (1, weld_s), (0, idle_s)):
+            t_end = time.perf_counter() + duration
+            while time.perf_counter() < t_end:
+                self.send(cam, ipoc, (x, 0.0, 0.0, 0.0, 0.0, 0.0))
+                ipoc += int(cycle_s * 1000)
+                if cam:
+                    x += travel_speed * cycle_s
+                time.sleep(cycle_s)
+
+    def close(self):
+        self.sock.close()
+
+
+def benchmark(rate_hz=1000.0, duration=5.0, port=59153):
+    """Decode cost per telegram, then a loopback run at rate_hz to check no packets are lost."""
+    sender = RSISender("127.0.0.1", port)
+    packet = ('<Rob Type="KUKA"><RIst X="1200.1234" Y="-35.5000" Z="850.0000" A="0.0000" '
+              'B="90.0000" C="0.0000" /><CAM>1</CAM><IPOC>123456789</IPOC></Rob>').encode()
+    buffer = bytearray(RSI_MAX_PACKET)
+    buffer[:len(packet)] = packet
+    ring = RSIRing(16)
+    parser = RSIParser()
+    n = 20000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        parser.parse_into(buffer, len(packet), ring.records[0])
+    t1 = time.perf_counter()
+    for _ in range(n):
+        parse_rsi_data(packet.decode('utf-8'))
+    t2 = time.perf_counter()
+    print(f"Byte parser: {(t1 - t0) / n * 1e6:.1f} us/packet, ElementTree: {(t2 - t1) / n * 1e6:.1f} us/packet")
+
+    listener = RSIListener("127.0.0.1", port)
+    listener.start()
+    sent = 0
+    period = 1.0 / rate_hz
+    next_due = time.perf_counter()
+    t_end = next_due + duration
+    while next_due < t_end:
+        sender.send(1, sent, (sent * 0.01, 0.0, 0.0, 0.0, 0.0, 0.0))
+        sent += 1
+        next_due += period
+        wait = next_due - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+    time.sleep(0.2)
+    received = listener.packet_count
+    listener.stop()
+    sender.close()
+    print(f"Loopback at {rate_hz:.0f} Hz: sent {sent}, decoded {received} ({sent - received} lost)")
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+        benchmark(float(sys.argv[2]) if len(sys.argv) > 2 else 1000.0)
+        sys.exit(0)
+
+    # Loopback check: a simulated weld should produce one rising and one falling edge
+    listener = RSIListener("127.0.0.1", 59152)
+    listener.start()
+    sender = RSISender("127.0.0.1", 59152)
+    threading.Thread(target=sender.run_weld, daemon=True).start()
+
+    listener.cam_rising.wait(timeout=5.0)
+    t_rise = time.perf_counter()
+    print(f"CAM rising edge after {listener.packet_count} packets")
+    listener.cam_falling.wait(timeout=10.0)
+    print(f"CAM falling edge {time.perf_counter() - t_rise:.3f} s later, {listener.packet_count} packets total")
+    listener.stop()
+    sender.close()
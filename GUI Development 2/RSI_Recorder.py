@@ -0,0 +1,151 @@
+import socket
+import struct
+import threading
+import time
+
+# File layout: RSI_FILE_MAGIC, then one record per datagram:
+#   float64 seconds since the first datagram (monotonic clock), uint16 length, raw bytes
+RSI_FILE_MAGIC = b"RSIREC01"
+RSI_RECORD_HEADER = struct.Struct("<dH")
+
+
+class RSIRecorder:
+    """Writes raw RSI datagrams with their arrival times to a compact binary file.
+
+    write() is called from the RSI listener thread for every datagram, so it
+    only appends to a buffered file; nothing is decoded here.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(RSI_FILE_MAGIC)
+        self.lock = threading.Lock()
+        self.start_time = None
+        self.packet_count = 0
+
+    def write(self, arrival, data, nbytes):
+        with self.lock:
+            if self.file is None:
+                return
+            if self.start_time is None:
+                self.start_time = arrival
+            self.file.write(RSI_RECORD_HEADER.pack(arrival - self.start_time, nbytes))
+            self.file.write(memoryview(data)[:nbytes])
+            self.packet_count += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+        print(f"RSI recorder: {self.packet_count} packets written to {self.path}")
+
+
+def read_rsi_recording(path):
+    """Return [(seconds since first datagram, raw bytes), ...] from an RSIRecorder file."""
+    packets = []
+    with open(path, "rb") as f:
+        if f.read(len(RSI_FILE_MAGIC)) != RSI_FILE_MAGIC:
+            raise ValueError(f"{path} is not an RSI recording")
+        while True:
+            header = f.read(RSI_RECORD_HEADER.size)
+            if len(header) < RSI_RECORD_HEADER.size:
+                break
+            t, nbytes = RSI_RECORD_HEADER.unpack(header)
+            data = f.read(nbytes)
+            if len(data) < nbytes:
+                break  # Truncated last record
+            packets.append((t, data))
+    return packets
+
+
+class RSIReplayer:
+    """Re-sends a recorded RSI stream to a UDP port with the original timing.
+
+    speed > 1 plays faster than real time. send_times holds the perf_counter
+    time each packet actually went out, for latency measurements.
+    """
+
+    def __init__(self, path, ip="127.0.0.1", port=59152, speed=1.0):
+        self.packets = read_rsi_recording(path)
+        self.address = (ip, int(port))
+        self.speed = float(speed)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.send_times = []
+        self.running = False
+        self.thread = None
+
+    def run(self):
+        self.running = True
+        self.send_times = []
+        t0 = time.perf_counter()
+        for t, data in self.packets:
+            if not self.running:
+                break
+            wait = t0 + t / self.speed - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            self.sock.sendto(data, self.address)
+            self.send_times.append(time.perf_counter())
+        self.running = False
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="rsi-replayer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        self.sock.close()
+
+
+if __name__ == "__main__":
+    # python RSI_Recorder.py record <file> [ip] [port] [seconds]
+    # python RSI_Recorder.py replay <file> [port] [speed]
+    # python RSI_Recorder.py latency <file> [speed]   replay into a local listener and time the CAM edges
+    import sys
+    from RSI_Listener import RSIListener, parse_rsi_data
+
+    command, path = sys.argv[1], sys.argv[2]
+    if command == "record":
+        ip = sys.argv[3] if len(sys.argv) > 3 else "192.168.1.25"
+        port = int(sys.argv[4]) if len(sys.argv) > 4 else 59152
+        duration = float(sys.argv[5]) if len(sys.argv) > 5 else 60.0
+        listener = RSIListener(ip, port)
+        listener.recorder = RSIRecorder(path)
+        listener.start()
+        time.sleep(duration)
+        listener.stop()
+
+    elif command == "replay":
+        port = int(sys.argv[3]) if len(sys.argv) > 3 else 59152
+        speed = float(sys.argv[4]) if len(sys.argv) > 4 else 1.0
+        replayer = RSIReplayer(path, port=port, speed=speed)
+        print(f"Replaying {len(replayer.packets)} packets to 127.0.0.1:{port} at {speed}x")
+        replayer.run()
+
+    elif command == "latency":
+        speed = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+        port = 59154
+        listener = RSIListener("127.0.0.1", port)
+        listener.start()
+        replayer = RSIReplayer(path, port=port, speed=speed)
+        # Index of the first packet where CAM goes high, to match against the rising edge event
+        cams = [parse_rsi_data(data.decode("utf-8")) for _, data in replayer.packets]
+        rising = next((i for i in range(1, len(cams)) if cams[i] == 1 and cams[i - 1] != 1), None)
+        replayer.start()
+        if rising is not None and listener.cam_rising.wait(timeout=replayer.packets[-1][0] / speed + 5.0):
+            t_edge = time.perf_counter()
+            while len(replayer.send_times) <= rising:
+                time.sleep(0.001)
+            print(f"CAM rising edge seen {(t_edge - replayer.send_times[rising]) * 1000:.2f} ms after it was sent")
+        else:
+            print("No CAM rising edge in the recording")
+        replayer.thread.join()
+        time.sleep(0.1)
+        print(f"Listener decoded {listener.packet_count} of {len(replayer.packets)} packets")
+        replayer.stop()
+        listener.stop()
@@ -39,6 +39,7 @@ class RecordingsettingsGUI:
         self.video_raw = ctk.BooleanVar(value=False)
         self.video_annotated = ctk.BooleanVar(value=False)
         self.video_segmented = ctk.BooleanVar(value=False)
+        self.raw_format = ctk.StringVar(value="RGB")
         
         # Image recording settings
         self.image_raw = ctk.BooleanVar(value=False)
@@ -55,9 +56,23 @@ class RecordingsettingsGUI:
         
         # RSI mode setting
         self.rsi_mode = ctk.StringVar(value="Manual")
+        self.rsi_ip = ctk.StringVar(value="192.168.1.25")
+        self.rsi_port = ctk.StringVar(value="59152")
         
         # Initialize recording save location
         self.recording_save_location = ctk.StringVar(value="")
+        
+        # Camera source: live Basler camera or replay of a recorded experiment
+        self.camera_source = ctk.StringVar(value="Basler")
+        self.replay_folder = ctk.StringVar(value="")
+        self.replay_fps = ctk.StringVar(value="200")
+        self.replay_bayer = ctk.BooleanVar(value=True)
+        self.replay_loop = ctk.BooleanVar(value=True)
+        
+        # Adaptive ROI: read out only the region around the melt pool
+        self.adaptive_roi = ctk.BooleanVar(value=False)
+        self.roi_padding = ctk.StringVar(value="64")
+        self.roi_hysteresis = ctk.StringVar(value="32")
 
     def load_settings(self):
         """Load settings from JSON file"""
@@ -70,6 +85,7 @@ class RecordingsettingsGUI:
                     self.video_raw.set(settings.get('video_raw', False))
                     self.video_annotated.set(settings.get('video_annotated', False))
                     self.video_segmented.set(settings.get('video_segmented', False))
+                    self.raw_format.set(settings.get('raw_format', 'RGB'))
                     
                     # Load image settings
                     self.image_raw.set(settings.get('image_raw', False))
@@ -89,6 +105,18 @@ class RecordingsettingsGUI:
                     
                     # Load RSI mode
                     self.rsi_mode.set(settings.get('rsi_mode', 'Manual'))
+                    self.rsi_ip.set(settings.get('rsi_ip', '192.168.1.25'))
+                    self.rsi_port.set(settings.get('rsi_port', '59152'))
+                    
+                    # Load camera source
+                    self.camera_source.set(settings.get('camera_source', 'Basler'))
+                    self.replay_folder.set(settings.get('replay_folder', ''))
+                    self.replay_fps.set(settings.get('replay_fps', '200'))
+                    self.replay_bayer.set(settings.get('replay_bayer', True))
+                    self.replay_loop.set(settings.get('replay_loop', True))
+                    self.adaptive_roi.set(settings.get('adaptive_roi', False))
+                    self.roi_padding.set(settings.get('roi_padding', '64'))
+                    self.roi_hysteresis.set(settings.get('roi_hysteresis', '32'))
         except Exception as e:
             print(f"Error loading settings: {e}")
 
@@ -99,6 +127,7 @@ class RecordingsettingsGUI:
             'video_raw': self.video_raw.get(),
             'video_annotated': self.video_annotated.get(),
             'video_segmented': self.video_segmented.get(),
+            'raw_format': self.raw_format.get(),
             
             # Image settings
             'image_raw': self.image_raw.get(),
@@ -115,9 +144,23 @@ class RecordingsettingsGUI:
             
             # RSI mode
             'rsi_mode': self.rsi_mode.get(),
+            'rsi_ip': self.rsi_ip.get(),
+            'rsi_port': self.rsi_port.get(),
             
             # Save Location
-            'recording_save_location': self.recording_save_location.get()
+            'recording_save_location': self.recording_save_location.get(),
+            
+            # Camera source
+            'camera_source': self.camera_source.get(),
+            'replay_folder': self.replay_folder.get(),
+            'replay_fps': self.replay_fps.get(),
+            'replay_bayer': self.replay_bayer.get(),
+            'replay_loop': self.replay_loop.get(),
+            
+            # Adaptive ROI
+            'adaptive_roi': self.adaptive_roi.get(),
+            'roi_padding': self.roi_padding.get(),
+            'roi_hysteresis': self.roi_hysteresis.get()
         }
         
         try:
@@ -144,6 +187,13 @@ class RecordingsettingsGUI:
             checkbox = ctk.CTkCheckBox(Record_videos_frame, text=text, variable=var, command=self.handle_image_settings)
             checkbox.pack(pady=5, padx=20, anchor="w")
         
+        # Raw frames can be saved as single-channel Bayer data (3x smaller) or debayered RGB
+        raw_format_frame = ctk.CTkFrame(Record_videos_frame)
+        raw_format_frame.pack(fill="x", padx=20, pady=5)
+        ctk.CTkLabel(raw_format_frame, text="Raw Format:").pack(side="left", padx=5)
+        for text, value in [("RGB", "RGB"), ("Bayer (raw sensor data)", "Bayer")]:
+            ctk.CTkRadioButton(raw_format_frame, text=text, variable=self.raw_format, value=value).pack(side="left", padx=10)
+        
         Record_videos_frame.pack(pady=10, padx=10, fill="both", expand=True)
 
         # Record Images section
@@ -236,8 +286,61 @@ class RecordingsettingsGUI:
             value="Automatic"
         ).pack(pady=5, padx=20, anchor="w")
         
+        # Address the RSI listener binds to (127.0.0.1 to test with a local sender)
+        rsi_address_frame = ctk.CTkFrame(RSI_integration_frame)
+        rsi_address_frame.pack(fill="x", padx=20, pady=2)
+        ctk.CTkLabel(rsi_address_frame, text="Listen IP:").pack(side="left", padx=5)
+        ctk.CTkEntry(rsi_address_frame, textvariable=self.rsi_ip, width=120).pack(side="left", padx=5)
+        ctk.CTkLabel(rsi_address_frame, text="Port:").pack(side="left", padx=5)
+        ctk.CTkEntry(rsi_address_frame, textvariable=self.rsi_port, width=70).pack(side="left", padx=5)
+        
         RSI_integration_frame.pack(pady=10, padx=10, fill="both", expand=True)
         
+        # Camera Source section
+        Camera_source_frame = ctk.CTkFrame(master=self.window)
+        Camera_source_label = ctk.CTkLabel(Camera_source_frame, text="Camera Source", font=("Arial", 16, "bold"))
+        Camera_source_label.pack(pady=10, padx=10, anchor="w")
+        
+        source_mode_frame = ctk.CTkFrame(Camera_source_frame)
+        source_mode_frame.pack(fill="x", padx=10, pady=5)
+        for text, value in [("Basler camera", "Basler"), ("Replay recorded frames", "Replay")]:
+            ctk.CTkRadioButton(
+                source_mode_frame,
+                text=text,
+                variable=self.camera_source,
+                value=value,
+                command=self.update_camera_source_fields
+            ).pack(side="left", padx=20)
+        
+        # Replay options
+        self.replay_frame = ctk.CTkFrame(Camera_source_frame)
+        folder_frame = ctk.CTkFrame(self.replay_frame)
+        folder_frame.pack(fill="x", pady=2)
+        ctk.CTkLabel(folder_frame, text="Folder:").pack(side="left", padx=5)
+        ctk.CTkLabel(folder_frame, textvariable=self.replay_folder).pack(side="left", padx=5, fill="x", expand=True)
+        ctk.CTkButton(folder_frame, text="Select Folder", command=self.get_replay_folder, width=100).pack(side="right", padx=5)
+        
+        fps_frame = ctk.CTkFrame(self.replay_frame)
+        fps_frame.pack(fill="x", pady=2)
+        ctk.CTkLabel(fps_frame, text="Replay Rate (fps):").pack(side="left", padx=5)
+        ctk.CTkEntry(fps_frame, textvariable=self.replay_fps).pack(side="left", padx=5)
+        
+        ctk.CTkCheckBox(self.replay_frame, text="Re-mosaic colour frames to Bayer", variable=self.replay_bayer).pack(pady=2, padx=5, anchor="w")
+        ctk.CTkCheckBox(self.replay_frame, text="Loop frames", variable=self.replay_loop).pack(pady=2, padx=5, anchor="w")
+        
+        if self.camera_source.get() == "Replay":
+            self.replay_frame.pack(fill="x", padx=20, pady=5)
+        
+        ctk.CTkCheckBox(Camera_source_frame, text="Adaptive ROI (follow the melt pool)", variable=self.adaptive_roi).pack(pady=5, padx=20, anchor="w")
+        roi_frame = ctk.CTkFrame(Camera_source_frame)
+        roi_frame.pack(fill="x", padx=20, pady=2)
+        ctk.CTkLabel(roi_frame, text="ROI Padding (px):").pack(side="left", padx=5)
+        ctk.CTkEntry(roi_frame, textvariable=self.roi_padding, width=60).pack(side="left", padx=5)
+        ctk.CTkLabel(roi_frame, text="Hysteresis (px):").pack(side="left", padx=5)
+        ctk.CTkEntry(roi_frame, textvariable=self.roi_hysteresis, width=60).pack(side="left", padx=5)
+        
+        Camera_source_frame.pack(pady=10, padx=10, fill="both", expand=True)
+        
         # Select Folder Save Button
         save_location_frame = ctk.CTkFrame(master=self.window)
         save_location_label = ctk.CTkLabel(save_location_frame, text="Save Location", padx=5, pady=5)
@@ -260,6 +363,18 @@ class RecordingsettingsGUI:
         if folder_path:
             self.recording_save_location.set(folder_path)
     
+    def get_replay_folder(self):
+        folder_path = easygui.diropenbox(title="Select Experiment or Image Folder to Replay")
+        if folder_path:
+            self.replay_folder.set(folder_path)
+    
+    def update_camera_source_fields(self):
+        """Show replay options only when replaying recorded frames"""
+        if self.camera_source.get() == "Replay":
+            self.replay_frame.pack(fill="x", padx=20, pady=5)
+        else:
+            self.replay_frame.pack_forget()
+    
     # Setup closing function
     def on_closing(self):
         self.window.grab_release()  # Release the grab
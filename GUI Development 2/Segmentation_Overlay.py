@@ -0,0 +1,50 @@
+import numpy as np
+
+
+class LabelMapRenderer:
+    """Draws segmentation masks onto a frame in one pass through a colour lookup table.
+
+    The masks of a frame are first collapsed into a single uint8 label map
+    (0 = background, class index + 1 elsewhere; later masks win where they
+    overlap). Rendering then copies the frame into the output and blends only
+    the labelled pixels, looking up lut[label, value, channel] =
+    (1 - alpha) * value + alpha * colour. The label map is reused between
+    frames of the same size, so use one renderer per thread.
+    """
+
+    def __init__(self, colors, alpha=0.3):
+        # colors: one (c0, c1, c2) per class index, in the frame's channel order
+        self.colors = [tuple(int(c) for c in color) for color in colors]
+        self.alpha = float(alpha)
+        values = np.arange(256, dtype=np.float32)[None, :, None]
+        palette = np.array([(0, 0, 0)] + self.colors, dtype=np.float32)[:, None, :]
+        lut = values * (1.0 - self.alpha) + palette * self.alpha
+        lut[0] = values[0]  # Background is copied unchanged
+        self.lut = np.clip(np.round(lut), 0, 255).astype(np.uint8)  # (classes + 1, 256, 3)
+        self.channels = np.arange(3)
+        self.labels = None
+
+    def label_map(self, shape):
+        """Cleared label map for a frame of shape (h, w), reused while the size stays the same."""
+        if self.labels is None or self.labels.shape != tuple(shape[:2]):
+            self.labels = np.zeros(shape[:2], dtype=np.uint8)
+        else:
+            self.labels.fill(0)
+        return self.labels
+
+    @staticmethod
+    def add_mask(labels, cls, mask):
+        """Paint one class mask (non-zero = inside) into the label map."""
+        np.putmask(labels, mask, cls + 1)
+
+    def render(self, frame, labels, output=None):
+        """Blend the labelled pixels of frame into output (a new copy if output is None)."""
+        if output is None:
+            output = frame.copy()
+        else:
+            np.copyto(output, frame)
+        index = np.flatnonzero(labels)
+        if index.size:
+            pixels = frame.reshape(-1, 3)[index]
+            output.reshape(-1, 3)[index] = self.lut[labels.reshape(-1)[index, None], pixels, self.channels]
+        return output
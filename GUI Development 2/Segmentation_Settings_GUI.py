@@ -2,8 +2,14 @@ import tkinter as tk
 from tkinter import ttk
 import json
 import os
+import threading
 import customtkinter as ctk
 import easygui
+import torch
+from Inference_Backends import (BACKENDS, compare_backends, export_model, exported_model_path,
+                                format_comparison, recorded_frames)
+from Model_Registry import ModelRegistry
+from Polygon_Measurements import MEASUREMENT_MODES
 
 class SegmentationSettingsGUI:
     
@@ -287,7 +293,23 @@ class SegmentationSettingsGUI:
             "apply_segmentation": bool(self.apply_segmentation.get()),
             "compare_values": bool(self.compare_values.get()),
             "segmentation_file": str(self.segmentation_file.get()),
-            "save_raw_excel": self.save_excel_var.get()
+            "save_raw_excel": self.save_excel_var.get(),
+            "inference_backend": self.inference_backend.get(),
+            "int8_quantization": bool(self.int8_quantization.get()),
+            "calibration_folder": self.calibration_folder.get(),
+            "export_imgsz": self.get_export_imgsz(),
+            "batch_size": max(1, int(float(self.batch_size.get() or 1))),
+            "batch_max_wait_ms": float(self.batch_max_wait_ms.get() or 0),
+            "measurement_mode": self.measurement_mode.get(),
+            "arc_gate": bool(self.arc_gate.get()),
+            "arc_brightness_threshold": float(self.arc_brightness_threshold.get() or 0),
+            "arc_saturated_percent": float(self.arc_saturated_percent.get() or 0),
+            "compile_model": bool(self.compile_model.get()),
+            "crop_inference": bool(self.crop_inference.get()),
+            "crop_imgsz": max(32, int(float(self.crop_imgsz.get() or 320)) // 32 * 32),
+            "crop_padding": max(0, int(float(self.crop_padding.get() or 0))),
+            "adaptive_inference": bool(self.adaptive_inference.get()),
+            "max_inference_interval": max(1, int(float(self.max_inference_interval.get() or 1)))
         }
 
         # Always save metadata
@@ -343,6 +365,38 @@ class SegmentationSettingsGUI:
                 self.compare_values.set(bool(settings["compare_values"]))
             if "segmentation_file" in settings:
                 self.segmentation_file.set(settings["segmentation_file"])
+            if "inference_backend" in settings:
+                self.inference_backend.set(settings["inference_backend"])
+            if "int8_quantization" in settings:
+                self.int8_quantization.set(bool(settings["int8_quantization"]))
+            if "calibration_folder" in settings:
+                self.calibration_folder.set(settings["calibration_folder"])
+            if "export_imgsz" in settings:
+                self.export_imgsz.set(str(settings["export_imgsz"]))
+            if "batch_size" in settings:
+                self.batch_size.set(str(settings["batch_size"]))
+            if "batch_max_wait_ms" in settings:
+                self.batch_max_wait_ms.set(str(settings["batch_max_wait_ms"]))
+            if "compile_model" in settings:
+                self.compile_model.set(bool(settings["compile_model"]))
+            if "arc_gate" in settings:
+                self.arc_gate.set(bool(settings["arc_gate"]))
+            if "arc_brightness_threshold" in settings:
+                self.arc_brightness_threshold.set(str(settings["arc_brightness_threshold"]))
+            if "arc_saturated_percent" in settings:
+                self.arc_saturated_percent.set(str(settings["arc_saturated_percent"]))
+            if "measurement_mode" in settings:
+                self.measurement_mode.set(settings["measurement_mode"])
+            if "crop_inference" in settings:
+                self.crop_inference.set(bool(settings["crop_inference"]))
+            if "crop_imgsz" in settings:
+                self.crop_imgsz.set(str(settings["crop_imgsz"]))
+            if "crop_padding" in settings:
+                self.crop_padding.set(str(settings["crop_padding"]))
+            if "adaptive_inference" in settings:
+                self.adaptive_inference.set(bool(settings["adaptive_inference"]))
+            if "max_inference_interval" in settings:
+                self.max_inference_interval.set(str(settings["max_inference_interval"]))
             if "raw_experiment_excel_data" in settings:
                 self.raw_experiment_excel_data.set(settings["raw_experiment_excel_data"])
                 
@@ -383,6 +437,36 @@ class SegmentationSettingsGUI:
         # Setup Segmentation Best File
         self.segmentation_file = ctk.StringVar(value="")
 
+        # Inference backend and its export
+        self.inference_backend = ctk.StringVar(master=self.window, value="PyTorch")
+        self.int8_quantization = ctk.BooleanVar(master=self.window, value=False)
+        self.calibration_folder = ctk.StringVar(master=self.window, value="")
+        self.export_imgsz = ctk.StringVar(master=self.window, value="640")
+
+        # Batched segmentation (batch size 1 segments every frame on its own)
+        self.batch_size = ctk.StringVar(master=self.window, value="1")
+        self.batch_max_wait_ms = ctk.StringVar(master=self.window, value="20")
+
+        # Compile PyTorch models with torch.compile when they are loaded
+        self.compile_model = ctk.BooleanVar(master=self.window, value=False)
+
+        # Arc gate: skip segmentation on dark frames
+        self.arc_gate = ctk.BooleanVar(master=self.window, value=False)
+        self.arc_brightness_threshold = ctk.StringVar(master=self.window, value="20")
+        self.arc_saturated_percent = ctk.StringVar(master=self.window, value="0.05")
+
+        # Crop-to-ROI inference around the previous frame's detections
+        self.crop_inference = ctk.BooleanVar(master=self.window, value=False)
+        self.crop_imgsz = ctk.StringVar(master=self.window, value="320")
+        self.crop_padding = ctk.StringVar(master=self.window, value="48")
+
+        # Measure from dense masks or from the mask outlines
+        self.measurement_mode = ctk.StringVar(master=self.window, value="Dense")
+
+        # Adaptive inference rate (segment every k-th frame, track the rest)
+        self.adaptive_inference = ctk.BooleanVar(master=self.window, value=False)
+        self.max_inference_interval = ctk.StringVar(master=self.window, value="8")
+
     def load_values(self):
         """Load values from JSON file or create default structure"""
         try:
@@ -460,6 +544,175 @@ class SegmentationSettingsGUI:
         if file_path:
             self.segmentation_file.set(file_path)
 
+    def get_calibration_folder(self):
+        folder = easygui.diropenbox(title="Select Recorded Frames for Calibration")
+        if folder:
+            self.calibration_folder.set(folder)
+
+    def get_export_imgsz(self):
+        try:
+            return int(float(self.export_imgsz.get()))
+        except ValueError:
+            return 640
+
+    def init_backend_frame(self, settings_frame):
+        backend_frame = ctk.CTkFrame(settings_frame)
+        backend_frame.pack(fill="x", padx=20, pady=10)
+
+        backend_row = ctk.CTkFrame(backend_frame)
+        backend_row.pack(fill="x", pady=2)
+        ctk.CTkLabel(backend_row, text="Inference Backend:").pack(side="left", padx=5)
+        for backend in BACKENDS:
+            ctk.CTkRadioButton(
+                backend_row, text=backend, variable=self.inference_backend, value=backend
+            ).pack(side="left", padx=5)
+
+        export_row = ctk.CTkFrame(backend_frame)
+        export_row.pack(fill="x", pady=2)
+        ctk.CTkCheckBox(
+            export_row, text="INT8 quantization", variable=self.int8_quantization
+        ).pack(side="left", padx=5)
+        ctk.CTkCheckBox(
+            export_row, text="Compile PyTorch model", variable=self.compile_model
+        ).pack(side="left", padx=5)
+        ctk.CTkLabel(export_row, text="Image Size:").pack(side="left", padx=5)
+        vcmd = (self.window.register(self.validate_entry), '%P')
+        ctk.CTkEntry(
+            export_row, textvariable=self.export_imgsz, width=60, validate="key", validatecommand=vcmd
+        ).pack(side="left", padx=5)
+
+        calibration_row = ctk.CTkFrame(backend_frame)
+        calibration_row.pack(fill="x", pady=2)
+        ctk.CTkLabel(calibration_row, text="Calibration Frames:").pack(side="left", padx=5)
+        ctk.CTkLabel(calibration_row, textvariable=self.calibration_folder).pack(side="left", padx=5, fill="x", expand=True)
+        ctk.CTkButton(
+            calibration_row, text="Select Folder", command=self.get_calibration_folder, width=100
+        ).pack(side="right", padx=5)
+
+        batch_row = ctk.CTkFrame(backend_frame)
+        batch_row.pack(fill="x", pady=2)
+        ctk.CTkLabel(batch_row, text="Batch Size:").pack(side="left", padx=5)
+        ctk.CTkEntry(
+            batch_row, textvariable=self.batch_size, width=60, validate="key", validatecommand=vcmd
+        ).pack(side="left", padx=5)
+        ctk.CTkLabel(batch_row, text="Max Batch Wait (ms):").pack(side="left", padx=5)
+        ctk.CTkEntry(
+            batch_row, textvariable=self.batch_max_wait_ms, width=60, validate="key", validatecommand=vcmd
+        ).pack(side="left", padx=5)
+
+        mode_row = ctk.CTkFrame(backend_frame)
+        mode_row.pack(fill="x", pady=2)
+        ctk.CTkLabel(mode_row, text="Measurement Mode:").pack(side="left", padx=5)
+        for mode in MEASUREMENT_MODES:
+            ctk.CTkRadioButton(
+                mode_row, text=mode, variable=self.measurement_mode, value=mode
+            ).pack(side="left", padx=5)
+
+        gate_row = ctk.CTkFrame(backend_frame)
+        gate_row.pack(fill="x", pady=2)
+        ctk.CTkCheckBox(
+            gate_row, text="Skip frames with the arc off", variable=self.arc_gate
+        ).pack(side="left", padx=5)
+        ctk.CTkLabel(gate_row, text="Min Mean Brightness (0-255):").pack(side="left", padx=5)
+        ctk.CTkEntry(
+            gate_row, textvariable=self.arc_brightness_threshold, width=60, validate="key", validatecommand=vcmd
+        ).pack(side="left", padx=5)
+        ctk.CTkLabel(gate_row, text="or Saturated Pixels (%):").pack(side="left", padx=5)
+        ctk.CTkEntry(
+            gate_row, textvariable=self.arc_saturated_percent, width=60, validate="key", validatecommand=vcmd
+        ).pack(side="left", padx=5)
+
+        crop_row = ctk.CTkFrame(backend_frame)
+        crop_row.pack(fill="x", pady=2)
+        ctk.CTkCheckBox(
+            crop_row, text="Crop inference to the last detections", variable=self.crop_inference
+        ).pack(side="left", padx=5)
+        ctk.CTkLabel(crop_row, text="Crop Image Size:").pack(side="left", padx=5)
+        ctk.CTkEntry(
+            crop_row, textvariable=self.crop_imgsz, width=60, validate="key", validatecommand=vcmd
+        ).pack(side="left", padx=5)
+        ctk.CTkLabel(crop_row, text="Padding (px):").pack(side="left", padx=5)
+        ctk.CTkEntry(
+            crop_row, textvariable=self.crop_padding, width=60, validate="key", validatecommand=vcmd
+        ).pack(side="left", padx=5)
+
+        rate_row = ctk.CTkFrame(backend_frame)
+        rate_row.pack(fill="x", pady=2)
+        ctk.CTkCheckBox(
+            rate_row, text="Adaptive inference rate (batch size 1)", variable=self.adaptive_inference
+        ).pack(side="left", padx=5)
+        ctk.CTkLabel(rate_row, text="Max Inference Interval (frames):").pack(side="left", padx=5)
+        ctk.CTkEntry(
+            rate_row, textvariable=self.max_inference_interval, width=60, validate="key", validatecommand=vcmd
+        ).pack(side="left", padx=5)
+
+        button_row = ctk.CTkFrame(backend_frame)
+        button_row.pack(fill="x", pady=2)
+        self.export_button = ctk.CTkButton(button_row, text="Export Model", command=self.export_backend_model, width=120)
+        self.export_button.pack(side="left", padx=5)
+        self.compare_button = ctk.CTkButton(button_row, text="Compare to PyTorch", command=self.compare_backend_model, width=140)
+        self.compare_button.pack(side="left", padx=5)
+
+        self.backend_status = ctk.CTkLabel(backend_frame, text="", justify="left", anchor="w")
+        self.backend_status.pack(fill="x", padx=5, pady=2)
+
+    def set_backend_status(self, text):
+        # Called from the export/compare threads; Tk must only be touched from the main loop
+        self.window.after(0, lambda: self.backend_status.configure(text=text))
+
+    def run_backend_task(self, task, busy_text):
+        self.export_button.configure(state="disabled")
+        self.compare_button.configure(state="disabled")
+        self.backend_status.configure(text=busy_text)
+
+        def worker():
+            try:
+                self.set_backend_status(task())
+            except Exception as e:
+                print(f"Inference backend error: {e}")
+                self.set_backend_status(f"❌ {e}")
+            finally:
+                self.window.after(0, lambda: (self.export_button.configure(state="normal"),
+                                              self.compare_button.configure(state="normal")))
+
+        threading.Thread(target=worker, name="backend-task", daemon=True).start()
+
+    def export_backend_model(self):
+        pt_path = self.segmentation_file.get()
+        backend = self.inference_backend.get()
+        int8 = bool(self.int8_quantization.get())
+        if backend == "PyTorch":
+            self.backend_status.configure(text="PyTorch uses the .pt weights directly")
+            return
+
+        def task():
+            path = export_model(pt_path, backend, self.get_export_imgsz(), int8, self.calibration_folder.get())
+            return f"✅ Exported to {path}"
+
+        self.run_backend_task(task, f"Exporting for {backend}...")
+
+    def compare_backend_model(self):
+        pt_path = self.segmentation_file.get()
+        backend = self.inference_backend.get()
+        candidate = exported_model_path(pt_path, backend, bool(self.int8_quantization.get()))
+        if not os.path.exists(candidate):
+            self.backend_status.configure(text=f"Export the model for {backend} first")
+            return
+        frames = recorded_frames(self.calibration_folder.get(), limit=100) if self.calibration_folder.get() else []
+        if not frames:
+            self.backend_status.configure(text="Select a folder of recorded frames to compare on")
+            return
+
+        def task():
+            # Separate registry so the comparison never disturbs the model used for recording
+            registry = ModelRegistry("cuda" if torch.cuda.is_available() else "cpu")
+            report = compare_backends(registry, pt_path, candidate, frames, self.get_export_imgsz())
+            text = format_comparison(report, backend)
+            print(text)
+            return text
+
+        self.run_backend_task(task, f"Comparing {backend} to PyTorch...")
+
     def init_segmentation_tab(self):
         settings_frame = ctk.CTkFrame(self.seg_settings_tab)
         settings_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -499,6 +752,8 @@ class SegmentationSettingsGUI:
         )
         select_file_btn.pack(side="right", padx=5)
 
+        self.init_backend_frame(settings_frame)
+
         # Save Excel checkbox
         self.save_excel_var = tk.BooleanVar(value=False)
         self.save_excel_checkbox = ctk.CTkCheckBox(
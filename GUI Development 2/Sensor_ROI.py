@@ -0,0 +1,229 @@
+COORDINATE_KEYS = {"x_min": 0, "x_max": 0, "y_min": 1, "y_max": 1,
+                   "centroid_x": 0, "centroid_y": 1}  # key -> 0 for x, 1 for y
+
+
+def roi_to_full_frame(measurements, roi):
+    """Shift per-class coordinates measured inside an ROI back into full-sensor pixels."""
+    if roi is None:
+        return measurements
+    offsets = (roi[0], roi[1])
+    for data in measurements.values():
+        for key, axis in COORDINATE_KEYS.items():
+            if data.get(key) is not None:
+                data[key] += offsets[axis]
+    return measurements
+
+
+class AdaptiveROI:
+    """Chooses a padded sensor ROI around everything the segmentation found.
+
+    ROIs are (offset_x, offset_y, width, height) in full-sensor pixels.
+    update() takes measurements already mapped to full-frame coordinates,
+    together with the ROI the camera actually applied to that frame, and
+    returns a new ROI only when it is worth reprogramming the camera:
+
+      - the detections come within `hysteresis` pixels of the current ROI edge
+      - or the ROI is more than `shrink_ratio` times larger than needed
+      - or nothing has been detected for `lost_frames` frames (back to full sensor)
+
+    Offsets are kept even so the Bayer pattern stays BG, and sizes are rounded
+    up to `alignment` so they match the camera's width/height increments.
+
+    self.roi follows the frames, not the requests: frames grabbed before the
+    grab thread applied a request still carry the old ROI, and the camera may
+    round a request to its own increments. A request that is still on its
+    way (self.requested) is not repeated.
+    """
+
+    def __init__(self, sensor_size, padding=64, hysteresis=32, shrink_ratio=2.0,
+                 lost_frames=10, alignment=16, min_size=128):
+        self.sensor_height, self.sensor_width = sensor_size
+        self.padding = int(padding)
+        self.hysteresis = int(hysteresis)
+        self.shrink_ratio = float(shrink_ratio)
+        self.lost_frames = int(lost_frames)
+        self.alignment = int(alignment)
+        self.min_size = int(min_size)
+        self.roi = self.full_frame()
+        self.requested = None
+        self.missed = 0
+        self.change_count = 0
+
+    def full_frame(self):
+        return (0, 0, self.sensor_width, self.sensor_height)
+
+    def update(self, measurements, applied_roi=None):
+        """Feed one frame's full-frame measurements and the ROI it was read out with (None: full sensor).
+
+        Returns the new ROI to request, or None to keep the current one.
+        """
+        self.roi = applied_roi if applied_roi is not None else self.full_frame()
+        if self.requested == self.roi:
+            self.requested = None
+        bounds = self.detection_bounds(measurements)
+        if bounds is None:
+            self.missed += 1
+            if self.missed >= self.lost_frames and self.roi != self.full_frame():
+                return self._change(self.full_frame())
+            return None
+        self.missed = 0
+
+        x_min, y_min, x_max, y_max = bounds
+        ox, oy, w, h = self.roi
+        near_edge = (x_min < ox + self.hysteresis or y_min < oy + self.hysteresis or
+                     x_max > ox + w - self.hysteresis or y_max > oy + h - self.hysteresis)
+        target = self.fit(bounds)
+        too_large = w * h > self.shrink_ratio * target[2] * target[3]
+        if near_edge or too_large:
+            if target != self.roi:
+                return self._change(target)
+        return None
+
+    @staticmethod
+    def detection_bounds(measurements):
+        """Union of every class's box as (x_min, y_min, x_max, y_max), or None if nothing was found."""
+        boxes = [
+            (data["x_min"], data["y_min"], data["x_max"], data["y_max"])
+            for data in measurements.values()
+            if data.get("x_min") is not None and data.get("y_min") is not None
+        ]
+        if not boxes:
+            return None
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+    def fit(self, bounds):
+        """Padded, aligned ROI centred on the bounds and clamped to the sensor."""
+        x_min, y_min, x_max, y_max = bounds
+        width = self._align(max(x_max - x_min + 1 + 2 * self.padding, self.min_size), self.sensor_width)
+        height = self._align(max(y_max - y_min + 1 + 2 * self.padding, self.min_size), self.sensor_height)
+        center_x = (x_min + x_max) // 2
+        center_y = (y_min + y_max) // 2
+        offset_x = min(max(center_x - width // 2, 0), self.sensor_width - width) & ~1
+        offset_y = min(max(center_y - height // 2, 0), self.sensor_height - height) & ~1
+        return (offset_x, offset_y, width, height)
+
+    def _align(self, size, limit):
+        size = -(-int(size) // self.alignment) * self.alignment
+        return min(size, limit)
+
+    def _change(self, roi):
+        if roi == self.requested:
+            return None  # Already requested, the grab thread hasn't applied it yet
+        self.requested = roi
+        self.change_count += 1
+        return roi
+
+
+class InferenceCrop:
+    """Software crop window for inference around the previous frame's detections.
+
+    Windows are (x, y, width, height) in the frame's own pixel coordinates
+    (inside the sensor ROI, if any). update() takes that frame's measurements
+    and places a padded window, at least min_size on each side, around the
+    union of the class boxes. window() returns None (full frame) when:
+
+      - nothing has been detected for `lost_frames` frames
+      - the window would cover more than max_fraction of the frame anyway
+      - the frame size or sensor ROI changed since the window was placed
+      - every `refresh_interval` frames, so objects outside the window are found
+    """
+
+    def __init__(self, padding=48, min_size=160, lost_frames=1, max_fraction=0.6, refresh_interval=30):
+        self.padding = int(padding)
+        self.min_size = int(min_size)
+        self.lost_frames = int(lost_frames)
+        self.max_fraction = float(max_fraction)
+        self.refresh_interval = int(refresh_interval)
+        self.crop = None
+        self.reference = None  # (frame size, sensor roi) the window was placed in
+        self.missed = 0
+        self.frames_since_full = 0
+        self.crop_count = 0
+        self.full_count = 0
+
+    def window(self, frame_size, roi=None):
+        """Window to run inference on for this frame, or None for the full frame."""
+        use_crop = (
+            self.crop is not None
+            and self.reference == (tuple(frame_size), roi)
+            and self.frames_since_full < self.refresh_interval
+        )
+        if use_crop:
+            self.frames_since_full += 1
+            self.crop_count += 1
+            return self.crop
+        self.frames_since_full = 0
+        self.full_count += 1
+        return None
+
+    def update(self, measurements, frame_size, roi=None):
+        """Place the next window from this frame's measurements (frame coordinates)."""
+        bounds = AdaptiveROI.detection_bounds(measurements)
+        if bounds is None:
+            self.missed += 1
+            if self.missed >= self.lost_frames:
+                self.crop = None
+            return
+        self.missed = 0
+
+        height, width = frame_size
+        x_min, y_min, x_max, y_max = bounds
+        crop_w = min(max(x_max - x_min + 1 + 2 * self.padding, self.min_size), width)
+        crop_h = min(max(y_max - y_min + 1 + 2 * self.padding, self.min_size), height)
+        if crop_w * crop_h > self.max_fraction * width * height:
+            self.crop = None
+            return
+        x = min(max((x_min + x_max) // 2 - crop_w // 2, 0), width - crop_w)
+        y = min(max((y_min + y_max) // 2 - crop_h // 2, 0), height - crop_h)
+        self.crop = (int(x), int(y), int(crop_w), int(crop_h))
+        self.reference = (tuple(frame_size), roi)
+
+
+if __name__ == "__main__":
+    # Simulated run: replay a folder, use the bright arc region as a stand-in for
+    # the segmentation boxes and let the ROI follow it
+    import os
+    import sys
+    import time
+    import numpy as np
+    from Camera_Acquisition import AcquisitionEngine
+    from Camera_Backends import ReplayCamera
+    from Frame_Ring_Buffer import FrameRingBuffer
+
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "assets")
+    fps = float(sys.argv[2]) if len(sys.argv) > 2 else 200.0
+    duration = 5.0
+
+    camera = ReplayCamera(folder, fps=fps)
+    camera.open()
+    height, width = camera.get_sensor_size()
+    frame_ring = FrameRingBuffer(16, height, width, {"bayer": 1, "raw": 3})
+    controller = AdaptiveROI((height, width))
+    engine = AcquisitionEngine(camera, frame_ring=frame_ring)
+    engine.start()
+
+    received = 0
+    pixels = 0
+    t_end = time.perf_counter() + duration
+    while time.perf_counter() < t_end:
+        frame = engine.get_frame(timeout=0.5)
+        if frame is None:
+            continue
+        slot = frame["slot"]
+        bayer = frame_ring.view(slot, "bayer")
+        pixels += bayer.size
+        ys, xs = np.nonzero(bayer > 200)
+        measurements = {}
+        if len(xs):
+            measurements["Arc Flash"] = {"x_min": int(xs.min()), "x_max": int(xs.max()),
+                                         "y_min": int(ys.min()), "y_max": int(ys.max())}
+        roi_to_full_frame(measurements, frame.get("roi"))
+        new_roi = controller.update(measurements, frame.get("roi"))
+        if new_roi is not None:
+            engine.request_roi(new_roi)
+        frame_ring.release(slot)
+        received += 1
+    engine.stop()
+    print(f"Received {received / duration:.1f} fps, {controller.change_count} ROI changes, "
+          f"{pixels / max(received, 1) / (height * width):.0%} of the sensor read per frame on average")
@@ -0,0 +1,32 @@
+import numpy as np
+
+from Arc_Gate import ArcGate
+
+
+def bayer_frame(red=0, green=0, blue=0, shape=(64, 64)):
+    """BG Bayer mosaic: B at (0, 0), G at (0, 1) and (1, 0), R at (1, 1)."""
+    frame = np.zeros(shape, dtype=np.uint8)
+    frame[0::2, 0::2] = blue
+    frame[0::2, 1::2] = green
+    frame[1::2, 0::2] = green
+    frame[1::2, 1::2] = red
+    return frame
+
+
+def test_brightness_counts_every_colour_channel():
+    gate = ArcGate(brightness_threshold=20, saturated_percent=100, step=8)
+    # Bright only in red: single-site sampling at (0, 0) would read 0
+    assert gate.check(bayer_frame(red=200))
+    assert gate.last_stats["mean"] == 50.0
+
+
+def test_dark_frame_is_arc_off():
+    gate = ArcGate(brightness_threshold=20, saturated_percent=0.05, step=8)
+    assert not gate.check(bayer_frame(red=10, green=10, blue=10))
+    assert gate.off_count == 1
+
+
+def test_saturated_green_turns_the_gate_on():
+    gate = ArcGate(brightness_threshold=255, saturated_percent=10, step=8)
+    assert gate.check(bayer_frame(green=255))
+    assert gate.last_stats["saturated"] == 0.5
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import numpy as np
+
+from Frame_Pipeline import FramePipeline, PipelineStage
+from Frame_Ring_Buffer import FrameRingBuffer
+
+
+def slow_worker(seconds, processed=None):
+    def worker(item):
+        time.sleep(seconds)
+        if processed is not None:
+            processed.append(item)
+    return worker
+
+
+def stop_with_timeout(stage, timeout=5.0):
+    """stop(drain=True) on a helper thread; True if it returned in time."""
+    stopper = threading.Thread(target=stage.stop, kwargs={"drain": True}, daemon=True)
+    stopper.start()
+    stopper.join(timeout)
+    return not stopper.is_alive()
+
+
+def test_latest_only_stop_drains_after_evictions():
+    done = []
+    stage = PipelineStage("preview", slow_worker(0.05), policy="latest_only")
+    stage.on_done = done.append
+    stage.start()
+    for i in range(10):
+        stage.offer(i)
+
+    assert stop_with_timeout(stage)
+    assert stage.dropped_count > 0
+    assert stage.processed_count + stage.dropped_count == 10
+    # Every frame, processed or evicted, is handed back exactly once
+    assert sorted(done) == list(range(10))
+
+
+def test_latest_only_keeps_the_newest_frame():
+    processed = []
+    stage = PipelineStage("preview", slow_worker(0.05, processed), policy="latest_only")
+    stage.start()
+    for i in range(10):
+        stage.offer(i)
+
+    assert stop_with_timeout(stage)
+    assert processed[-1] == 9
+
+
+def test_never_drop_processes_every_frame_in_order():
+    processed = []
+    stage = PipelineStage("save_images", slow_worker(0.001, processed), policy="never_drop", maxsize=2)
+    stage.start()
+    for i in range(20):
+        assert stage.offer(i)
+
+    assert stop_with_timeout(stage)
+    assert processed == list(range(20))
+    assert stage.dropped_count == 0
+
+
+def test_block_drops_after_timeout_and_reports_it():
+    dropped = []
+    release = threading.Event()
+    stage = PipelineStage("metrics", lambda item: release.wait(), policy="block", maxsize=1, block_timeout=0.01)
+    stage.on_drop = dropped.append
+    stage.start()
+
+    results = [stage.offer(i) for i in range(5)]
+    release.set()
+    assert stop_with_timeout(stage)
+    assert results.count(False) == stage.dropped_count == len(dropped)
+    assert stage.processed_count + stage.dropped_count == 5
+
+
+def test_stop_without_drain_hands_back_queued_frames():
+    done = []
+    release = threading.Event()
+    stage = PipelineStage("save_images", lambda item: release.wait(), policy="never_drop", maxsize=8)
+    stage.on_done = done.append
+    stage.start()
+    for i in range(4):
+        stage.offer(i)
+    time.sleep(0.05)
+    release.set()
+    stage.stop(drain=False)
+    assert sorted(done) == list(range(4))
+
+
+def test_batching_stage_groups_frames():
+    batches = []
+    pipeline = FramePipeline()
+    stage = pipeline.add_stage("segment", batches.append, policy="never_drop", maxsize=16,
+                               batch_size=4, max_wait_ms=200)
+    for i in range(8):
+        stage.offer({"frame_count": i})
+    pipeline.start()
+    assert stop_with_timeout(stage)
+    assert [[frame["frame_count"] for frame in batch] for batch in batches] == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert stage.stats()["batches"] == 2
+
+
+def test_pipeline_returns_slot_to_the_ring_after_every_stage():
+    ring = FrameRingBuffer(2, 4, 4, {"bayer": 1})
+    pipeline = FramePipeline(ring)
+    pipeline.add_stage("fast", lambda item: None, policy="never_drop")
+    pipeline.add_stage("preview", slow_worker(0.02), policy="latest_only")
+    pipeline.start()
+
+    for i in range(6):
+        slot = ring.acquire(timeout=1.0)
+        assert slot is not None
+        pipeline.publish({"slot": slot, "frame_count": i})
+
+    pipeline.stop(drain=True)
+    assert ring.free_count() == 2
+    assert ring.ref_counts == [0, 0]
+    assert np.all(ring.planes["bayer"] == 0)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from Frame_Ring_Buffer import FrameRingBuffer
+
+
+def make_ring(slots=2):
+    return FrameRingBuffer(slots, 4, 6, {"bayer": 1, "raw": 3})
+
+
+def test_slot_is_freed_only_by_its_last_release():
+    ring = make_ring()
+    slot = ring.acquire(timeout=0)
+    ring.retain(slot, 2)
+    assert ring.free_count() == 1
+
+    ring.release(slot)
+    ring.release(slot)
+    assert ring.free_count() == 1
+    ring.release(slot)
+    assert ring.free_count() == 2
+
+
+def test_acquire_returns_none_when_every_slot_is_held():
+    ring = make_ring()
+    assert ring.acquire(timeout=0) is not None
+    assert ring.acquire(timeout=0) is not None
+    assert ring.acquire(timeout=0) is None
+    assert ring.acquire(timeout=0.01) is None
+
+
+def test_over_release_does_not_queue_the_slot_twice():
+    ring = make_ring()
+    slot = ring.acquire(timeout=0)
+    ring.release(slot)
+    ring.release(slot)
+    assert ring.free_count() == 2
+
+    first = ring.acquire(timeout=0)
+    second = ring.acquire(timeout=0)
+    assert first != second
+    assert ring.acquire(timeout=0) is None
+
+
+def test_release_of_more_holds_than_held_frees_once():
+    ring = make_ring()
+    slot = ring.acquire(timeout=0)
+    ring.release(slot, count=3)
+    assert ring.ref_counts[slot] == 0
+    assert ring.free_count() == 2
+
+
+def test_smaller_frame_gets_a_contiguous_view():
+    ring = make_ring()
+    slot = ring.acquire(timeout=0)
+    ring.set_shape(slot, 2, 4)
+    plane = ring.plane(slot, "raw")
+    assert plane.shape == (2, 4, 3)
+    assert plane.flags["C_CONTIGUOUS"]
+    plane[:] = 7
+    assert np.all(ring.view(slot, "raw") == 7)
+    assert not ring.view(slot, "raw").flags.writeable
+
+
+def test_frame_larger_than_the_slot_is_rejected():
+    ring = make_ring()
+    slot = ring.acquire(timeout=0)
+    with pytest.raises(ValueError):
+        ring.set_shape(slot, 8, 8)
@@ -0,0 +1,20 @@
+import openpyxl
+
+from Measurement_Log import MeasurementWorkbook
+
+
+def test_rows_are_written_against_the_fixed_columns(tmp_path):
+    path = tmp_path / "Raw Segmentation Data.xlsx"
+    log = MeasurementWorkbook(str(path), ["Frame", "IPOC", "Arc Flash_area"])
+    log.append({"Frame": 1, "Arc Flash_area": 120})
+    log.append({"Frame": 2, "IPOC": 5004, "Unknown": "ignored"})
+    log.close()
+    log.append({"Frame": 3})  # After close: ignored
+
+    sheet = openpyxl.load_workbook(path).active
+    rows = [[cell.value for cell in row] for row in sheet.iter_rows()]
+    assert rows[0] == ["Frame", "IPOC", "Arc Flash_area"]
+    assert sheet.cell(row=1, column=1).font.bold
+    assert rows[1][0] == 1 and rows[1][2] == 120 and rows[1][1] in (None, "")
+    assert rows[2][:2] == [2, 5004]
+    assert len(rows) == 3
@@ -0,0 +1,68 @@
+import numpy as np
+
+from Polygon_Measurements import PolygonRecorder, read_polygon_recording
+from RSI_Recorder import RSIRecorder, read_rsi_recording
+
+
+def test_rsi_recording_round_trip(tmp_path):
+    path = tmp_path / "rsi.bin"
+    recorder = RSIRecorder(str(path))
+    buffer = bytearray(64)
+    packets = [(10.0, b"<Rob><CAM>1</CAM></Rob>"), (10.004, b"<Rob><CAM>0</CAM></Rob>")]
+    for arrival, data in packets:
+        buffer[:len(data)] = data
+        recorder.write(arrival, buffer, len(data))
+    recorder.close()
+
+    replay = read_rsi_recording(str(path))
+    assert [data for _, data in replay] == [data for _, data in packets]
+    assert replay[0][0] == 0.0
+    assert abs(replay[1][0] - 0.004) < 1e-9
+
+
+def test_rsi_recording_stops_at_a_truncated_record(tmp_path):
+    path = tmp_path / "rsi.bin"
+    recorder = RSIRecorder(str(path))
+    for i in range(3):
+        data = f"<Rob>{i}</Rob>".encode()
+        recorder.write(float(i), data, len(data))
+    recorder.close()
+    path.write_bytes(path.read_bytes()[:-3])
+
+    assert len(read_rsi_recording(str(path))) == 2
+
+
+def polygons(offset):
+    square = np.array([[0, 0], [10, 0], [10, 10], [0, 10]], dtype=np.float32) + offset
+    triangle = np.array([[5, 5], [20, 5], [5, 25]], dtype=np.float32) + offset
+    return [(0, square), (2, triangle)]
+
+
+def test_polygon_recording_round_trip(tmp_path):
+    path = tmp_path / "polygons.bin"
+    recorder = PolygonRecorder(str(path))
+    recorder.write(1, polygons(0))
+    recorder.write(2, [])
+    recorder.write(5, polygons(100.4))
+    recorder.close()
+
+    frames = read_polygon_recording(str(path))
+    assert sorted(frames) == [1, 2, 5]
+    assert frames[2] == []
+    for (cls, points), (read_cls, read_points) in zip(polygons(100.4), frames[5]):
+        assert read_cls == cls
+        np.testing.assert_array_equal(read_points, np.round(points).astype(np.int16))
+
+
+def test_polygon_recording_stops_at_a_truncated_record(tmp_path):
+    path = tmp_path / "polygons.bin"
+    recorder = PolygonRecorder(str(path))
+    recorder.write(1, polygons(0))
+    recorder.write(2, polygons(1))
+    recorder.close()
+    data = path.read_bytes()
+
+    # Cut inside the last outline's coordinates, then inside its polygon header
+    for cut in (3, 3 * 4 + 2):
+        path.write_bytes(data[:-cut])
+        assert sorted(read_polygon_recording(str(path))) == [1]
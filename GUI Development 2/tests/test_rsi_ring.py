@@ -0,0 +1,65 @@
+import pytest
+
+from RSI_Listener import RSIRing
+
+
+def write(ring, arrival, ipoc, x):
+    record = ring.records[ring.next_index()]
+    record["arrival"] = arrival
+    record["ipoc"] = ipoc
+    record["cam"] = 1
+    for field in ("x", "y", "z", "a", "b", "c"):
+        record[field] = 0.0
+    record["x"] = x
+    ring.commit()
+
+
+def test_pose_is_interpolated_between_the_telegrams_around_t():
+    ring = RSIRing(capacity=16)
+    write(ring, 1.000, 100, 10.0)
+    write(ring, 1.004, 104, 14.0)
+
+    pose = ring.pose_at(1.001)
+    assert pose["x"] == pytest.approx(11.0)
+    assert pose["ipoc"] == 101
+    assert pose["rsi_age"] == pytest.approx(0.001)
+
+
+def test_exact_arrival_time_returns_that_telegram():
+    ring = RSIRing(capacity=16)
+    for i in range(4):
+        write(ring, 1.0 + i * 0.004, 100 + 4 * i, float(i))
+    assert ring.pose_at(1.008)["x"] == pytest.approx(2.0)
+
+
+def test_time_outside_the_ring_uses_the_nearest_telegram_within_max_gap():
+    ring = RSIRing(capacity=16)
+    write(ring, 1.000, 100, 10.0)
+    write(ring, 1.004, 104, 14.0)
+
+    assert ring.pose_at(1.010, max_gap=0.05)["x"] == pytest.approx(14.0)
+    assert ring.pose_at(0.990, max_gap=0.05)["x"] == pytest.approx(10.0)
+    assert ring.pose_at(1.100, max_gap=0.05) is None
+
+
+def test_gap_between_telegrams_larger_than_max_gap_gives_no_pose():
+    ring = RSIRing(capacity=16)
+    write(ring, 1.0, 100, 10.0)
+    write(ring, 2.0, 200, 20.0)
+    assert ring.pose_at(1.5, max_gap=0.05) is None
+
+
+def test_empty_ring_has_no_pose():
+    assert RSIRing(capacity=4).pose_at(1.0) is None
+    assert RSIRing(capacity=4).latest() is None
+
+
+def test_wrapped_ring_skips_the_slot_being_written():
+    ring = RSIRing(capacity=4)
+    for i in range(10):
+        write(ring, 1.0 + i * 0.004, 100 + 4 * i, float(i))
+
+    # Telegrams 7..9 are readable; 6 sits in the slot the writer fills next
+    assert ring.pose_at(1.0 + 8.5 * 0.004)["x"] == pytest.approx(8.5)
+    assert ring.pose_at(1.0 + 6 * 0.004, max_gap=0.001) is None
+    assert ring.latest()["x"] == 9.0
@@ -0,0 +1,39 @@
+from Sensor_ROI import AdaptiveROI, roi_to_full_frame
+
+
+def pool(x_min, y_min, x_max, y_max):
+    return {"Solidification Pool": {"x_min": x_min, "y_min": y_min, "x_max": x_max, "y_max": y_max}}
+
+
+def test_request_is_not_repeated_until_the_camera_applies_it():
+    controller = AdaptiveROI((1024, 1280), padding=32, min_size=128)
+    first = controller.update(pool(600, 500, 680, 560), None)
+    assert first is not None
+    # Frames grabbed before the grab thread switched still carry the full sensor
+    assert controller.update(pool(600, 500, 680, 560), None) is None
+    assert controller.change_count == 1
+
+    assert controller.update(pool(600, 500, 680, 560), first) is None
+    assert controller.roi == first and controller.requested is None
+
+
+def test_controller_follows_the_roi_the_camera_rounded_to():
+    controller = AdaptiveROI((1024, 1280), padding=32, min_size=128)
+    requested = controller.update(pool(600, 500, 680, 560), None)
+    applied = (requested[0] - 8, requested[1], requested[2] + 8, requested[3])
+    controller.update(pool(600, 500, 680, 560), applied)
+    assert controller.roi == applied
+
+
+def test_lost_detections_return_to_the_full_sensor_once():
+    controller = AdaptiveROI((1024, 1280), lost_frames=2)
+    roi = (512, 512, 256, 256)
+    assert controller.update({}, roi) is None
+    assert controller.update({}, roi) == controller.full_frame()
+    assert controller.update({}, roi) is None
+
+
+def test_roi_offsets_are_added_back():
+    measurements = pool(10, 20, 30, 40)
+    roi_to_full_frame(measurements, (100, 200, 64, 64))
+    assert measurements["Solidification Pool"] == {"x_min": 110, "y_min": 220, "x_max": 130, "y_max": 240}